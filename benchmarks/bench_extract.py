@@ -0,0 +1,120 @@
+# benchmarks/bench_extract.py
+"""
+HTML extraction micro-benchmark: BeautifulSoup vs the lxml fast path.
+
+Pages:
+- listing   the saved Flipkart search page (debug_flipkart.html), link harvesting
+- product   a product page: the stub product markup inside the same page
+            boilerplate, so the parser sees a realistically heavy document
+
+Time is the best of --repeat runs. Memory is the peak RSS growth of a fresh
+subprocess doing one extraction (tracemalloc would miss libxml2's own
+allocations, which is most of what lxml uses). Both backends are also
+checked to return identical results.
+
+Run from the project root:
+    python -m benchmarks.bench_extract --repeat 20
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.stub_site import LISTING_HTML, PRODUCT_TEMPLATE
+from utils.extract import BACKENDS, extract_links, extract_product
+
+BASE_URL = "https://www.flipkart.com/search?q=mobiles"
+
+
+def load_pages():
+    with open(LISTING_HTML, "rb") as f:
+        listing = f.read()
+    product_markup = PRODUCT_TEMPLATE.format(title="Stub Phone BENCH", price=42080, mrp=44080,
+                                             discount=12, rating=4, pid="BENCH")
+    body = product_markup.split("<body>", 1)[1].split("</body>", 1)[0]
+    product = listing.replace(b"</body>", body.encode("utf-8") + b"</body>", 1)
+    return {"listing": listing, "product": product}
+
+
+def run_once(kind, backend, html):
+    if kind == "listing":
+        return extract_links(html, BASE_URL, backend)
+    return extract_product(html, "https://www.flipkart.com/p/itm?pid=BENCH", backend)
+
+
+def best_time(kind, backend, html, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_once(kind, backend, html)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_rss_kb(kind, backend):
+    """Peak RSS growth (KB) of a fresh interpreter running one extraction."""
+    out = subprocess.check_output([sys.executable, "-m", "benchmarks.bench_extract",
+                                   "--child", kind, backend], text=True)
+    return int(out.strip())
+
+
+def _high_water_kb():
+    # VmHWM is per process image; ru_maxrss survives exec on Linux, so a child
+    # started from a big parent would report the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child(kind, backend):
+    html = load_pages()[kind]
+    run_once(kind, backend, html[:2048])   # warm lazy imports / selector compilation on a tiny page
+    before = _high_water_kb()
+    result = run_once(kind, backend, html)
+    after = _high_water_kb()
+    assert result is not None
+    print(after - before)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--child", nargs=2, metavar=("KIND", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        sys.exit(0)
+
+    pages = load_pages()
+    rows = []
+    for kind, html in pages.items():
+        results = {name: run_once(kind, name, html) for name in BACKENDS}
+        same = all(r == results["bs4"] for r in results.values())
+        for name in BACKENDS:
+            rows.append({"page": kind, "backend": name, "bytes": len(html), "same_as_bs4": same,
+                         "seconds": best_time(kind, name, html, args.repeat),
+                         "peak_rss_kb": peak_rss_kb(kind, name)})
+
+    print(f"{'page':<8} {'backend':<8} {'ms':>8} {'peak RSS MB':>12} {'same':>5}")
+    for row in rows:
+        print(f"{row['page']:<8} {row['backend']:<8} {row['seconds'] * 1000:>8.2f} "
+              f"{row['peak_rss_kb'] / 1024:>12.1f} {str(row['same_as_bs4']):>5}")
+    for kind in pages:
+        bs4, fast = (next(r for r in rows if r["page"] == kind and r["backend"] == b) for b in ("bs4", "lxml"))
+        print(f"{kind}: lxml is {bs4['seconds'] / fast['seconds']:.1f}x faster")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"repeat": args.repeat, "runs": rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+    if not all(row["same_as_bs4"] for row in rows):
+        sys.exit(1)
@@ -0,0 +1,43 @@
+# benchmarks/bench_flipkart_scrape.py
+"""
+Flipkart scrape wall time, sequential vs concurrent, against the local stub site.
+
+Run from the project root:
+    python -m benchmarks.bench_flipkart_scrape --latency 0.2 --pages 2 --workers 1 4 8
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.stub_site import StubSite
+from utils import scrap
+from utils.http_cache import HttpCache
+
+
+def run(workers, pages, latency):
+    rows = []
+    with StubSite(listing_pages=pages, latency=latency) as site, tempfile.TemporaryDirectory() as tmp:
+        scrap._limiter.min_interval = 0   # the stub is local; measure concurrency, not politeness
+        for n in workers:
+            scrap.DB_FILE = os.path.join(tmp, f"price_tracker_{n}.db")
+            scrap._http_cache = HttpCache(os.path.join(tmp, f"http_cache_{n}.db"))   # cold cache per run
+            start = time.perf_counter()
+            result = scrap.scrape_flipkart(f"{site.base_url}/search?q=mobiles", max_pages=pages, workers=n)
+            rows.append((n, result["count"], time.perf_counter() - start))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub response delay in seconds")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'workers':>8} {'products':>9} {'seconds':>9}")
+    for n, count, seconds in run(args.workers, args.pages, args.latency):
+        print(f"{n:>8} {count:>9} {seconds:>9.2f}")
@@ -0,0 +1,46 @@
+# benchmarks/bench_sarkari_scrape.py
+"""
+Sarkari result crawl wall time, serial vs concurrent, against the local stub site.
+
+Run from the project root:
+    python -m benchmarks.bench_sarkari_scrape --latency 0.2 --posts 40 --workers 1 4 8
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.stub_site import StubSite
+from utils import sarkariresult
+from utils.http_cache import HttpCache
+
+
+def run(workers, posts, latency):
+    rows = []
+    with StubSite(latency=latency, sarkari_posts=posts) as site, tempfile.TemporaryDirectory() as tmp:
+        sarkariresult._limiter.min_interval = 0   # the stub is local; measure concurrency, not politeness
+        for n in workers:
+            sarkariresult.DB_FILE = os.path.join(tmp, f"sarkariresult_{n}.db")
+            sarkariresult._http_cache = HttpCache(os.path.join(tmp, f"http_cache_{n}.db"))   # cold cache per run
+            start = time.perf_counter()
+            result = sarkariresult.scrape_sarkariresult(f"{site.base_url}/latest-jobs/", workers=n)
+            rows.append((n, result["count"], time.perf_counter() - start))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--posts", type=int, default=40, help="Postings on the stub listing page")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub response delay in seconds")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rows = run(args.workers, args.posts, args.latency)
+    serial = next((seconds for n, _, seconds in rows if n == 1), None)
+    print(f"{'workers':>8} {'postings':>9} {'seconds':>9} {'speedup':>8}")
+    for n, count, seconds in rows:
+        speedup = f"{serial / seconds:.1f}x" if serial else "-"
+        print(f"{n:>8} {count:>9} {seconds:>9.2f} {speedup:>8}")
@@ -0,0 +1,195 @@
+# benchmarks/bench_templates.py
+"""
+Template rendering benchmark and regression check.
+
+Builds synthetic .docx / .txt / .j2 templates of increasing size (paragraphs,
+table cells, sections with their own header/footer, placeholders), then times
+schema extraction (cold and warm cache), rendering, preview and text generation
+and records peak memory with tracemalloc. Runs fully offline.
+
+Run from the project root:
+    python -m benchmarks.bench_templates --output bench_templates.json
+    python -m benchmarks.bench_templates --sizes small medium --compare bench_templates.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from docx import Document
+
+from benchmarks.contexts import next_run, unique_context
+from utils.doc_generator import (
+    clear_template_cache,
+    extract_placeholders,
+    generate_hld_doc,
+    generate_text_doc,
+    render_preview,
+)
+
+# paragraphs, table rows (2 cells each), sections (one header + footer each), placeholders
+SIZES = {
+    "small": {"paragraphs": 50, "table_rows": 10, "sections": 1, "placeholders": 20},
+    "medium": {"paragraphs": 500, "table_rows": 100, "sections": 3, "placeholders": 200},
+    "large": {"paragraphs": 3000, "table_rows": 600, "sections": 6, "placeholders": 800},
+}
+
+# ---------------------------
+# Synthetic templates
+# ---------------------------
+def _field(i, n_placeholders):
+    return f"field_{i % n_placeholders}"
+
+
+def build_docx(path, paragraphs, table_rows, sections, placeholders):
+    doc = Document()
+    per_section = max(1, paragraphs // sections)
+    i = 0
+    for s in range(sections):
+        section = doc.sections[0] if s == 0 else doc.add_section()
+        section.header.is_linked_to_previous = False
+        section.footer.is_linked_to_previous = False
+        section.header.paragraphs[0].text = f"Header {s} {{{{{{{_field(s, placeholders)}}}}}}}"
+        section.footer.paragraphs[0].text = f"Footer {s} page"
+        for _ in range(per_section):
+            doc.add_paragraph(f"Paragraph {i} text {{{{{{{_field(i, placeholders)}}}}}}} trailing words")
+            i += 1
+    table = doc.add_table(rows=table_rows, cols=2)
+    for r, row in enumerate(table.rows):
+        row.cells[0].text = f"Label {r}"
+        row.cells[1].text = f"{{{{{{{_field(r, placeholders)}}}}}}}"
+    doc.save(path)
+
+
+def build_txt(path, paragraphs, placeholders):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(paragraphs):
+            f.write(f"line {i} value {{{{{_field(i, placeholders)}}}}} end\n")
+
+
+def build_j2(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("hostname {{ hostname }}\n"
+                "{% for i in interfaces %}interface {{ i.name }}\n"
+                " ip address {{ i.ip }}\n"
+                "{% if i.shutdown %} shutdown\n{% endif %}{% endfor %}")
+
+
+# ---------------------------
+# Measurement
+# ---------------------------
+def measure(fn, repeat):
+    """Best wall time over `repeat` runs and peak traced memory of one run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def bench_size(name, spec, repeat, tmp):
+    docx_path = os.path.join(tmp, f"{name}.docx")
+    txt_path = os.path.join(tmp, f"{name}.txt")
+    j2_path = os.path.join(tmp, f"{name}.j2")
+    out_dir = os.path.join(tmp, "out")
+    build_docx(docx_path, spec["paragraphs"], spec["table_rows"], spec["sections"], spec["placeholders"])
+    build_txt(txt_path, spec["paragraphs"], spec["placeholders"])
+    build_j2(j2_path)
+    n = spec["placeholders"]
+    interfaces = [{"name": f"Gi0/{i}", "ip": f"10.0.{i // 250}.{i % 250}/30", "shutdown": i % 7 == 0}
+                  for i in range(spec["paragraphs"])]
+
+    def schema_cold():
+        clear_template_cache()
+        extract_placeholders(docx_path)
+
+    results = {
+        "schema_cold": measure(schema_cold, repeat),
+        "schema_warm": measure(lambda: extract_placeholders(docx_path), repeat),
+        "render_docx": measure(lambda: generate_hld_doc(docx_path, unique_context(n), out_dir), repeat),
+        "preview_docx": measure(lambda: render_preview(docx_path, unique_context(n)), repeat),
+        "preview_docx_html": measure(lambda: render_preview(docx_path, unique_context(n), html=True), repeat),
+        "generate_txt": measure(lambda: generate_text_doc(txt_path, unique_context(n), out_dir), repeat),
+        "generate_j2": measure(lambda: generate_text_doc(
+            j2_path, {"hostname": f"edge-{next_run()}", "interfaces": interfaces}, out_dir), repeat),
+    }
+    return {"size": name, "spec": spec,
+            "template_bytes": os.path.getsize(docx_path), "results": results}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Return a list of (size, metric, old, new) where time grew by more than `threshold`x."""
+    old = {row["size"]: row["results"] for row in baseline["runs"]}
+    regressions = []
+    for row in current["runs"]:
+        for metric, value in row["results"].items():
+            before = old.get(row["size"], {}).get(metric)
+            if before and value["seconds"] > before["seconds"] * threshold:
+                regressions.append((row["size"], metric, before["seconds"], value["seconds"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Flag metrics slower than baseline by this factor (default 1.25)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": datetime.now().isoformat(),
+                "repeat": args.repeat,
+            },
+            "runs": [bench_size(name, SIZES[name], args.repeat, tmp) for name in args.sizes],
+        }
+
+    print(f"{'size':<8} {'metric':<18} {'seconds':>10} {'peak MB':>9}")
+    for row in report["runs"]:
+        for metric, value in row["results"].items():
+            print(f"{row['size']:<8} {metric:<18} {value['seconds']:>10.4f} {value['peak_bytes'] / 1e6:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if baseline:
+        regressions = compare(report, baseline, args.threshold)
+        for size, metric, before, after in regressions:
+            print(f"REGRESSION {size}/{metric}: {before:.4f}s -> {after:.4f}s")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (commit {baseline['meta'].get('commit')})")
@@ -0,0 +1,16 @@
+# benchmarks/contexts.py
+"""Field values shared by the template benchmarks."""
+import itertools
+
+_counter = itertools.count()
+
+
+def next_run():
+    """A number no earlier call in this process returned."""
+    return next(_counter)
+
+
+def unique_context(n_fields):
+    """Fresh values every call, so the content-addressed output store never serves a render from an earlier one."""
+    run = next_run()
+    return {f"field_{i}": f"value-{i}-{run}" for i in range(n_fields)}
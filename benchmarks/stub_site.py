@@ -0,0 +1,175 @@
+# benchmarks/stub_site.py
+"""
+Local stub of the scraped sites, for offline benchmarks and manual testing.
+
+- /search?...&page=N      Flipkart listing (the saved debug_flipkart.html) for
+                          the first `listing_pages` pages, an empty page after.
+- /<slug>/p/<itm>?pid=..  Synthetic Flipkart product page using the same
+                          selectors as utils.scrap.scrape_product_details.
+- /latest-jobs/           Sarkari listing linking `sarkari_posts` postings.
+- /job/<n>/               Sarkari posting in the container div that
+                          utils.sarkariresult.scrape_job_details reads.
+
+Every response waits `latency` seconds first, to mimic a remote server.
+Product and posting pages carry an ETag and answer If-None-Match with 304.
+
+    python -m benchmarks.stub_site --port 8765 --latency 0.2
+    then scrape http://127.0.0.1:8765/search?q=mobiles
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LISTING_HTML = os.path.join(BASE_DIR, "debug_flipkart.html")
+
+PRODUCT_TEMPLATE = """<!doctype html><html><head><title>{title}</title></head><body>
+<h1><span class="VU-ZEz">{title}</span></h1>
+<div class="Nx9bqj CxhGGd">&#8377;{price:,}</div>
+<div class="yRaY8j A6+E6v">&#8377;{mrp:,}</div>
+<div class="UkUFwK WW8yVX"><span>{discount}% off</span></div>
+<div class="XQDdHH">4.{rating}</div>
+<img class="DByuf4" src="https://img.example/{pid}.jpg"/>
+<table>
+<tr class="WJdYP6 row"><td>Model Number</td><td>{pid}</td></tr>
+<tr class="WJdYP6 row"><td>Color</td><td>Blue</td></tr>
+<tr class="WJdYP6 row"><td>Warranty</td><td>1 Year</td></tr>
+</table></body></html>"""
+
+SARKARI_LISTING_TEMPLATE = """<!doctype html><html><head><title>Latest Jobs</title></head><body>
+<nav><a href="/home/">Home</a> <a href="/contact-us/">Contact Us</a> <a href="/privacy-policy/">Privacy</a></nav>
+<ul>
+{items}
+</ul></body></html>"""
+
+SARKARI_POST_TEMPLATE = """<!doctype html><html><head><title>{title}</title></head><body>
+<div class="gb-grid-wrapper gb-grid-wrapper-303102a8">
+<p>Post Name : {title}</p>
+<p>Total Post : {vacancies} Posts</p>
+<ul>
+<li>Online Apply Start Date : 01-0{month}-2025</li>
+<li>Last Date for Apply Online : 2{day}-0{month}-2025</li>
+<li>Exam Date : As per Schedule</li>
+<li>Application Fee : Rs. {fee}/-</li>
+</ul>
+</div></body></html>"""
+
+
+class StubSite:
+    def __init__(self, listing_pages=1, latency=0.0, port=0, sarkari_posts=40):
+        self.listing_pages = listing_pages
+        self.latency = latency
+        self.price_version = 0   # bump to make product prices change
+        self.sarkari_posts = sarkari_posts
+        self.post_versions = {}  # n -> bump to change that posting
+        with open(LISTING_HTML, "rb") as f:
+            self.listing = f.read()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------------------------
+    # Pages
+    # ---------------------------
+    def product_page(self, pid):
+        seed = int(hashlib.md5(pid.encode()).hexdigest()[:8], 16)
+        price = 5000 + seed % 40000 + self.price_version * 100
+        return PRODUCT_TEMPLATE.format(title=f"Stub Phone {pid}", price=price, mrp=price + 2000,
+                                       discount=seed % 30, rating=seed % 10, pid=pid)
+
+    def sarkari_listing(self):
+        items = "\n".join(f'<li><a href="/job/{n}/">Stub Recruitment {n} Online Form</a></li>'
+                          for n in range(1, self.sarkari_posts + 1))
+        return SARKARI_LISTING_TEMPLATE.format(items=items)
+
+    def sarkari_post(self, n):
+        version = self.post_versions.get(n, 0)
+        return SARKARI_POST_TEMPLATE.format(title=f"Stub Recruitment {n}", vacancies=100 + n * 7 + version,
+                                            month=1 + n % 9, day=n % 9, fee=100 + 50 * (n % 4))
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if site.latency:
+                    time.sleep(site.latency)
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+
+                if parts.path == "/search":
+                    page = int(query.get("page", ["1"])[0])
+                    body = site.listing if page <= site.listing_pages else b"<html><body></body></html>"
+                elif "/p/" in parts.path:
+                    body = site.product_page(query.get("pid", [parts.path])[0]).encode("utf-8")
+                elif parts.path == "/latest-jobs/":
+                    body = site.sarkari_listing().encode("utf-8")
+                elif parts.path.startswith("/job/") and parts.path[5:].strip("/").isdigit():
+                    n = int(parts.path[5:].strip("/"))
+                    if n > site.sarkari_posts:
+                        self.send_error(404)
+                        return
+                    body = site.sarkari_post(n).encode("utf-8")
+                else:
+                    self.send_error(404)
+                    return
+
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                cacheable = "/p/" in parts.path or parts.path.startswith("/job/")
+                if cacheable and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--listing-pages", type=int, default=1)
+    parser.add_argument("--sarkari-posts", type=int, default=40)
+    args = parser.parse_args()
+
+    site = StubSite(args.listing_pages, args.latency, args.port, args.sarkari_posts)
+    print(f"Serving stub site on {site.base_url} (Ctrl+C to stop)")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        site.stop()
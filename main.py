@@ -1,472 +1,561 @@
-import datetime
-import sqlite3
-from utils.sarkariresult import DB_FILE
-from utils import sarkariresult  # not sarkariresult_db
-
-
-import re
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import pandas as pd
-import uuid
-from collections import Counter
-import time
-import yt_dlp
-from fastapi import BackgroundTasks, Body
-from io import BytesIO
-
-from fastapi.middleware.cors import CORSMiddleware
-# from utils.sarkariresult import scrape_dynamic, ScrapRequest  # get_sarkari_results
-from utils.scrap import get_all_products
-from utils.YTD import DOWNLOAD_DIR, get_available_formats, sanitize_url
-from utils import pdf2wordRouterApi
-from bs4 import BeautifulSoup
-from fastapi import FastAPI, HTTPException, Query, Request, Form
-from fastapi.responses import FileResponse, JSONResponse,HTMLResponse
-from pydantic import BaseModel, Field
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from typing import Dict
-import os
-import logging
-from io import BytesIO
-from fastapi.responses import JSONResponse
-from docx import Document
-from utils.doc_generator import extract_placeholders, generate_hld_doc, _replace_placeholders_in_paragraph
-from utils.upload_temp import router as templates_router
-from utils.accesstovm import ssh_connect,test_connection
-from utils.config import TEMPLATE_DIR, OUTPUT_DIR
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-import mysql.connector
-from utils.DB import DB_ACTIONS as DA
-
-
-
-
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-app = FastAPI(title="Dynamic HLD Generator")
-app.include_router(templates_router)
-app.mount("/static", StaticFiles(directory="static"), name="static")
-# Setup Jinja2 templates
-templates = Jinja2Templates(directory="templates")
-app.include_router(DA)
-p2w=pdf2wordRouterApi.pdf2word_app
-app.include_router(p2w)
-
-timestamp_format=datetime.datetime.now().strftime("%Y%m%d_%I-%M-%S%p")
-
-
-
-
-@app.get("/", response_class=HTMLResponse)
-def home_page(request: Request):
-    templates_list = [t for t in os.listdir(TEMPLATE_DIR) if t.endswith((".docx", ".txt"))]
-    files_list = [f for f in os.listdir(OUTPUT_DIR) if f.endswith((".docx", ".txt"))]
-
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "templates": templates_list,
-        "files": files_list
-    })
-# Request model
-class GenerateRequest(BaseModel):
-    template: str = Field(..., example="hldaa_template.docx")
-    fields: Dict[str, str] = Field(
-        ...,
-        example={
-            "project_name": "MyApp",
-            "author_name": "Pramod",
-            "date": "2025-09-23"
-        }
-    )
-
-
-@app.get("/template-schema", summary="Get template placeholders in ready-to-fill format")
-def get_template_schema(template: str = Query(..., example="hld_template.docx")):
-    """
-    Return template placeholders as a dictionary ready for filling values.
-    Example output:
-    {
-        "template": "hld_template.docx",
-        "fields": {
-            "system_type": "",
-            "author_name": "",
-            "date": "",
-            "project_name": ""
-        }
-    }
-    """
-    template_path = os.path.join(TEMPLATE_DIR, template)
-    if not os.path.exists(template_path):
-        raise HTTPException(status_code=404, detail=f"Template '{template}' not found")
-
-    try:
-        fields = extract_placeholders(template_path)
-        field_dict = {field: "" for field in fields}  # keys with empty values
-        return {"template": template, "fields": field_dict}
-    except Exception as e:
-        logging.exception(f"Error extracting schema from template '{template}'")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-
-@app.post("/generate", summary="Generate HLD document")
-def generate_document(payload: GenerateRequest):
-    """
-    Accept dynamic field values and generate the final HLD document.
-    """
-    template_path = os.path.join(TEMPLATE_DIR, payload.template)
-    if not os.path.exists(template_path):
-        raise HTTPException(status_code=404, detail=f"Template '{payload.template}' not found")
-
-    try:
-        expected_fields = extract_placeholders(template_path)
-        missing_fields = [f for f in expected_fields if f not in payload.fields]
-
-        if missing_fields:
-            raise HTTPException(status_code=400, detail=f"Missing fields: {missing_fields}")
-
-        filename = generate_hld_doc(template_path, payload.fields, output_dir=OUTPUT_DIR)
-        download_url = f"/download/{filename}"
-        return {"message": "Document generated successfully", "download_url": download_url}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logging.exception(f"Error generating document from template '{payload.template}'")
-        raise HTTPException(status_code=500, detail=str(e))
-################################################################################
-
-################################################################################
-
-@app.post("/preview", summary="Preview HLD document content without saving")
-def preview_document(payload: GenerateRequest):
-    """
-    Fill the template with given fields and return the text content for preview.
-    """
-    template_path = os.path.join(TEMPLATE_DIR, payload.template)
-    if not os.path.exists(template_path):
-        raise HTTPException(status_code=404, detail=f"Template '{payload.template}' not found")
-
-    try:
-        expected_fields = extract_placeholders(template_path)
-        missing_fields = [f for f in expected_fields if f not in payload.fields]
-
-        if missing_fields:
-            raise HTTPException(status_code=400, detail=f"Missing fields: {missing_fields}")
-
-        doc = Document(template_path)
-
-        # Replace placeholders in doc in memory
-        for para in doc.paragraphs:
-            _replace_placeholders_in_paragraph(para, payload.fields)
-
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    _replace_placeholders_in_paragraph(cell, payload.fields)
-
-        # Combine all text for preview
-        full_text = "\n".join([p.text for p in doc.paragraphs])
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    full_text += "\n" + cell.text
-
-        return JSONResponse({"preview_text": full_text})
-
-    except Exception as e:
-        logging.exception(f"Error generating preview for template '{payload.template}'")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-
-@app.get("/download_doc/{filename}")
-def download_document(filename: str):
-    print("Downloading file:", filename)
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    print("Full file path:", file_path)
-    print("Files in OUTPUT_DIR:", os.listdir(OUTPUT_DIR))
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Document not found")
-    return FileResponse(file_path, filename=filename)
-
-
-@app.get("/list-generated-files")
-def list_generated_files():
-    return {"output_dir": str(OUTPUT_DIR), "files": os.listdir(OUTPUT_DIR)}
-
-
-
-#
-@app.post("/router-config", summary="Send router configuration")
-def router_config(payload: dict):
-    commands = payload.get("commands")
-    if not commands:
-        raise HTTPException(status_code=400, detail="No commands provided")
-
-    # Here you can intepip grate logic to send commands to router via SSH, Netmiko, etc.
-    # For example, we'll just echo back the commands for now
-    result = f"Commands received:\n{commands}"
-    return {"result": result}
-
-@app.get("/txt-schema")
-def txt_schema(template: str):
-    template_path = os.path.join(TEMPLATE_DIR, template)
-    if not os.path.exists(template_path):
-        raise HTTPException(404, f"Template '{template}' not found")
-
-    # For TXT, we detect placeholders as {{key}}
-    fields = {}
-    with open(template_path, "r", encoding="utf-8") as f:
-        content = f.read()
-        import re
-        matches = re.findall(r"\{\{(\w+)\}\}", content)
-        for m in matches:
-            fields[m] = ""
-    return {"template": template, "fields": fields}
-
-
-@app.post("/generate-txt")
-def generate_txt(payload: GenerateRequest):
-    template_path = os.path.join(TEMPLATE_DIR, payload.template)
-    output_file = os.path.join(OUTPUT_DIR, f"{timestamp_format}_{payload.template}")
-
-    with open(template_path, "r", encoding="utf-8") as f:
-        content = f.read()
-        for key, val in payload.fields.items():
-            content = content.replace(f"{{{{{key}}}}}", val)
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(content)
-
-    download_url = f"/download/{os.path.basename(output_file)}"
-    return {"message": "TXT document generated", "download_url": download_url}
-
-
-@app.post("/preview-txt")
-def preview_txt(payload: GenerateRequest):
-    template_path = os.path.join(TEMPLATE_DIR, payload.template)
-    with open(template_path, "r", encoding="utf-8") as f:
-        content = f.read()
-        for key, val in payload.fields.items():
-            content = content.replace(f"{{{{{key}}}}}", val)
-    return {"preview_text": content}
-######################
-#########################
-###############
-# ------------------------------
-# Fetch products from DB
-# ------------------------------
-@app.get("/scrap/flipkart")
-def flipkart_scrap(url: str):
-    try:
-        from utils.scrap import scrape_flipkart
-        result = scrape_flipkart(url, max_pages=1)
-        return {"count": result['count'], "data": get_all_products()}
-    except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
-
-
-# ------------------------------
-# Download CSV from outputs
-# ------------------------------
-@app.get("/scrap/download")
-def download_flipkart():
-    path = "outputs/flipkart_all_pages.csv"
-    if os.path.exists(path):
-        return FileResponse(path, media_type="text/csv", filename="flipkart_results.csv")
-    return JSONResponse({"error": "File not found"}, status_code=404)
-    ##############YTD
-progress = {"download": 0, "convert": 0, "file": ""}
-
-@app.get("/")
-def index(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
-
-@app.get("/youtube/formats")
-def get_formats(url: str = Query(...)):
-    try:
-        print("Scrapping Links for Format")
-        clean_url = sanitize_url(url)
-        formats = get_available_formats(clean_url)
-        if not formats:
-            return {"error": "No downloadable formats found for this video."}
-        return {"formats": formats}
-    except Exception as e:
-        return {"error": f"Failed to fetch formats: {str(e)}"}
-
-@app.post("/youtube/start")
-async def start_youtube(request: Request, background_tasks: BackgroundTasks):
-    data = await request.json()
-    url = sanitize_url(data.get("url"))
-    format_id = data.get("format_id")
-
-    def hook(d):
-        if d['status'] == 'downloading':
-            downloaded = d.get("downloaded_bytes") or 0
-            total = d.get("total_bytes") or d.get("total_bytes_estimate") or 1
-            progress["download"] = min(downloaded / total * 100, 100)
-        elif d['status'] == 'finished':
-            progress["download"] = 100
-
-    def process():
-        try:
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                info = ydl.extract_info(url, download=False)
-                available_ids = [f["format_id"] for f in info.get("formats", [])]
-
-            selected_format = format_id if format_id in available_ids else "bestvideo+bestaudio/best"
-
-            ydl_opts = {
-                'format': selected_format,
-                'outtmpl': os.path.join(DOWNLOAD_DIR, '%(title)s.%(ext)s'),
-                'noplaylist': True,
-                'progress_hooks': [hook],
-                # 'ffmpeg_location': FFMPEG_EXE_PATH,
-                'merge_output_format': 'mp4',   # ensure merge
-                  # 🧠 Throttling to prevent 429
-                'sleep_interval': 2,          # Wait 2 seconds between requests
-                'max_sleep_interval': 5,      # Random sleep up to 5s
-                'ratelimit': 500000,          # Max 500KB/s download speed
-                'throttled_rate': 300000,     # Gradually reduce speed if needed
-            }
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                downloaded_path = ydl.prepare_filename(info)
-                progress["file"] = downloaded_path
-                progress["convert"] = 100
-        except Exception as e:
-            progress["convert"] = -1
-            print("Download error:", e)
-
-    progress.update({"download": 0, "convert": 0, "file": ""})
-    background_tasks.add_task(process)
-    return {"status": "started"}
-
-
-@app.get("/youtube/progress")
-def get_youtube_progress():
-    return progress
-
-@app.get("/youtube/files")
-def list_downloaded_files():
-    if not os.path.exists(DOWNLOAD_DIR):
-        return {"files": []}
-    files = [f for f in os.listdir(DOWNLOAD_DIR) if f.endswith((".mp3", ".mp4", ".webm"))]
-    return {"files": files}
-
-@app.get("/youtube/download")
-def download_youtube_file(filename: str):
-    file_path = os.path.join(DOWNLOAD_DIR, filename)
-    if not os.path.exists(file_path):
-        return {"error": "File not found"}
-    return FileResponse(file_path, media_type="application/octet-stream", filename=filename)
-##############################################################################
-from routers.whiteboard import router as whiteboard_router
-# Include whiteboard router
-app.include_router(whiteboard_router)
-
-
-@app.get("/", response_class=HTMLResponse)
-async def home_page(request: Request):
-    # Your existing code to render index.html
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "templates": [],  # your templates_list
-        "files": []       # your files_list
-    })
-
-# Add these pages
-@app.get("/about", response_class=HTMLResponse)
-async def about_page(request: Request):
-    return templates.TemplateResponse("about.html", {"request": request})
-
-@app.get("/contact", response_class=HTMLResponse)
-async def contact_page(request: Request):
-    return templates.TemplateResponse("contact.html", {"request": request})
-
-@app.get("/privacy", response_class=HTMLResponse)
-async def privacy_page(request: Request):
-    return templates.TemplateResponse("privacy.html", {"request": request})
-
-@app.get("/terms", response_class=HTMLResponse)
-async def terms_page(request: Request):
-    return templates.TemplateResponse("terms.html", {"request": request})
-
-
-
-
-
-# CORS for frontend JS
-##########################################
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.get("/api/sarkariresult")
-async def scrape_sarkariresult(save_csv: bool = False):
-    result = sarkariresult.scrape_sarkariresult(save_csv=save_csv)
-    # Instead of just count/csv, return the actual results from DB
-    all_results = sarkariresult.get_all_results()
-    return JSONResponse({"count": len(all_results), "results": all_results})
-
-
-@app.get("/results", response_class=HTMLResponse)
-def show_results():
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM results ORDER BY last_checked DESC", conn)
-    conn.close()
-    return df.to_html(index=False, escape=False)
-
-
-
-
-
-
-def get_all_results():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM results ORDER BY last_checked DESC")
-    rows = c.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
-
-@app.route("/api/results")
-def api_results():
-    try:
-        data = get_all_results()
-        return JSONResponse({"status": "success", "count": len(data), "data": data})
-    except Exception as e:
-        return JSONResponse({"status": "error", "message": str(e)})
-
-
-
-# -------------------------
-# API route to fetch all saved results
-# -------------------------
-DB_FILE = os.path.join("outputs", "sarkariresult.db")
-
-@app.get("/api/sarkariresult/all")
-def get_all_saved_results():
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row  # Allows dict-like access
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM results ORDER BY last_checked DESC")
-        rows = cur.fetchall()
-        results = [dict(row) for row in rows]
-        conn.close()
-        return JSONResponse(content={"results": results, "count": len(results)})
-    except Exception as e:
-        print("Failed to fetch saved Sarkari results:", e)
-        return JSONResponse(content={"results": [], "count": 0})
+import datetime
+from utils import sarkariresult  # not sarkariresult_db
+
+
+import re
+import json
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+import uuid
+from collections import Counter
+import time
+import yt_dlp
+from contextlib import asynccontextmanager
+from fastapi import BackgroundTasks, Body
+from fastapi.concurrency import run_in_threadpool
+from io import BytesIO
+
+from fastapi.middleware.cors import CORSMiddleware
+# from utils.sarkariresult import scrape_dynamic, ScrapRequest  # get_sarkari_results
+from utils.YTD import DOWNLOAD_DIR, get_available_formats, sanitize_url
+from utils import pdf2wordRouterApi
+from bs4 import BeautifulSoup
+from fastapi import FastAPI, HTTPException, Query, Request, Form
+from fastapi.responses import FileResponse, JSONResponse,HTMLResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from typing import Any, Dict, List, Optional
+import os
+import logging
+from io import BytesIO
+from fastapi.responses import JSONResponse
+from utils.doc_generator import extract_placeholders, generate_hld_doc, generate_text_doc, render_preview, render_text_template
+from utils.upload_temp import router as templates_router, template_index, template_registry
+from utils.batch_generator import router as batch_router
+from utils.scrap_api import router as scrap_router
+from utils.sarkari_api import (router as sarkari_router, results_table as sarkari_results_table,
+                              first_page as sarkari_first_page, stream_all as sarkari_stream_all)
+from utils.schedule_api import router as schedule_router
+from utils.scheduler import lifespan as scrape_schedule, scheduler
+from utils.accesstovm import ssh_connect,test_connection
+from utils.config import TEMPLATE_DIR, OUTPUT_DIR
+from utils.zipstream import iter_zip
+from utils.text_templates import is_jinja_template, render_jinja
+from jinja2 import TemplateError
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+import mysql.connector
+from utils.DB import DB_ACTIONS as DA
+
+
+
+
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Schemas are created/migrated once here, not on every read
+    await run_in_threadpool(sarkariresult.init_db)
+    async with scrape_schedule(app):
+        yield
+
+
+app = FastAPI(title="Dynamic HLD Generator", lifespan=lifespan)
+app.include_router(templates_router)
+app.include_router(batch_router)
+app.include_router(scrap_router)
+app.include_router(sarkari_router)
+app.include_router(schedule_router)
+app.mount("/static", StaticFiles(directory="static"), name="static")
+# Setup Jinja2 templates
+templates = Jinja2Templates(directory="templates")
+app.include_router(DA)
+p2w=pdf2wordRouterApi.pdf2word_app
+app.include_router(p2w)
+
+timestamp_format=datetime.datetime.now().strftime("%Y%m%d_%I-%M-%S%p")
+
+
+
+
+@app.get("/", response_class=HTMLResponse)
+def home_page(request: Request):
+    templates_list = [t for t in template_index.names() if t.endswith((".docx", ".txt"))]
+    files_list = [f for f in os.listdir(OUTPUT_DIR) if f.endswith((".docx", ".txt"))]
+
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        "templates": templates_list,
+        "files": files_list
+    })
+# Request model
+class GenerateRequest(BaseModel):
+    template: str = Field(..., example="hldaa_template.docx")
+    fields: Dict[str, str] = Field(
+        ...,
+        example={
+            "project_name": "MyApp",
+            "author_name": "Pramod",
+            "date": "2025-09-23"
+        }
+    )
+
+class TextGenerateRequest(BaseModel):
+    template: str = Field(..., example="router_config.j2")
+    # Jinja templates (.j2, .yaml, .cfg, ...) accept lists/dicts for loops
+    fields: Dict[str, Any] = Field(
+        ...,
+        example={
+            "hostname": "edge-01",
+            "interfaces": [{"name": "Gi0/1", "ip": "10.0.0.1/30"}]
+        }
+    )
+
+# Preview only the beginning of very large text outputs
+TXT_PREVIEW_MAX_CHARS = 200_000
+
+
+@app.get("/template-schema", summary="Get template placeholders in ready-to-fill format")
+def get_template_schema(template: str = Query(..., example="hld_template.docx")):
+    """
+    Return template placeholders as a dictionary ready for filling values.
+    Example output:
+    {
+        "template": "hld_template.docx",
+        "fields": {
+            "system_type": "",
+            "author_name": "",
+            "date": "",
+            "project_name": ""
+        }
+    }
+    """
+    try:
+        record = template_registry.get(os.path.basename(template))
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Template '{template}' not found")
+        if record["placeholder_error"]:
+            raise HTTPException(status_code=422, detail=f"Could not read placeholders: {record['placeholder_error']}")
+        field_dict = {field: "" for field in record["placeholders"]}  # keys with empty values
+        return {"template": template, "fields": field_dict}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception(f"Error extracting schema from template '{template}'")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@app.post("/generate", summary="Generate HLD document")
+def generate_document(payload: GenerateRequest):
+    """
+    Accept dynamic field values and generate the final HLD document.
+    """
+    template_path = os.path.join(TEMPLATE_DIR, payload.template)
+    if not os.path.exists(template_path):
+        raise HTTPException(status_code=404, detail=f"Template '{payload.template}' not found")
+
+    try:
+        expected_fields = extract_placeholders(template_path)
+        missing_fields = [f for f in expected_fields if f not in payload.fields]
+
+        if missing_fields:
+            raise HTTPException(status_code=400, detail=f"Missing fields: {missing_fields}")
+
+        filename = generate_hld_doc(template_path, payload.fields, output_dir=OUTPUT_DIR)
+        download_url = f"/download/{filename}"
+        return {"message": "Document generated successfully", "download_url": download_url}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception(f"Error generating document from template '{payload.template}'")
+        raise HTTPException(status_code=500, detail=str(e))
+################################################################################
+
+################################################################################
+
+@app.post("/preview", summary="Preview HLD document content without saving")
+def preview_document(
+    payload: GenerateRequest,
+    max_paragraphs: Optional[int] = Query(None, ge=1, description="Stop after N paragraphs/table rows"),
+    max_pages: Optional[int] = Query(None, ge=1, description="Stop after N pages (explicit page breaks)"),
+    html: bool = Query(False, description="Also return an HTML rendering"),
+):
+    """
+    Fill the template with given fields and return the text content for preview.
+    """
+    template_path = os.path.join(TEMPLATE_DIR, payload.template)
+    if not os.path.exists(template_path):
+        raise HTTPException(status_code=404, detail=f"Template '{payload.template}' not found")
+
+    try:
+        expected_fields = extract_placeholders(template_path)
+        missing_fields = [f for f in expected_fields if f not in payload.fields]
+
+        if missing_fields:
+            raise HTTPException(status_code=400, detail=f"Missing fields: {missing_fields}")
+
+        preview = render_preview(template_path, payload.fields, max_paragraphs=max_paragraphs,
+                                 max_pages=max_pages, html=html)
+
+        result = {"preview_text": preview["text"], "truncated": preview["truncated"]}
+        if html:
+            result["preview_html"] = preview["html"]
+        return JSONResponse(result)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception(f"Error generating preview for template '{payload.template}'")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@app.get("/download_doc/{filename}")
+def download_document(filename: str):
+    print("Downloading file:", filename)
+    file_path = os.path.join(OUTPUT_DIR, filename)
+    print("Full file path:", file_path)
+    print("Files in OUTPUT_DIR:", os.listdir(OUTPUT_DIR))
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return FileResponse(file_path, filename=filename)
+
+
+@app.get("/list-generated-files")
+def list_generated_files():
+    return {"output_dir": str(OUTPUT_DIR), "files": os.listdir(OUTPUT_DIR)}
+
+
+@app.get("/download-zip", summary="Download a set of generated files as one ZIP")
+def download_generated_zip(
+    names: Optional[List[str]] = Query(None, description="Exact file names (repeat the parameter)"),
+    prefix: Optional[str] = Query(None, example="hld_template_"),
+    since: Optional[datetime.datetime] = Query(None, description="Modified at or after (ISO 8601)"),
+    until: Optional[datetime.datetime] = Query(None, description="Modified before (ISO 8601)"),
+):
+    """
+    Stream a ZIP of files from the output folder selected by name list,
+    prefix and/or modification time range. The archive is built while it
+    is sent, so nothing is held in memory or written to disk.
+    """
+    wanted = {os.path.basename(n) for n in names} if names else None
+    since_ts = since.timestamp() if since else None
+    until_ts = until.timestamp() if until else None
+
+    selected = []
+    with os.scandir(OUTPUT_DIR) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            if wanted is not None and entry.name not in wanted:
+                continue
+            if prefix and not entry.name.startswith(prefix):
+                continue
+            if since_ts is not None or until_ts is not None:
+                mtime = entry.stat().st_mtime
+                if since_ts is not None and mtime < since_ts:
+                    continue
+                if until_ts is not None and mtime >= until_ts:
+                    continue
+            selected.append((entry.name, entry.path))
+
+    if not selected:
+        raise HTTPException(status_code=404, detail="No generated files match the selection")
+
+    selected.sort()
+    zip_name = f"generated_{datetime.datetime.now().strftime('%Y%m%d_%I-%M-%S%p')}.zip"
+    return StreamingResponse(
+        iter_zip(selected),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{zip_name}"'},
+    )
+
+
+
+#
+@app.post("/router-config", summary="Send router configuration")
+def router_config(payload: dict):
+    commands = payload.get("commands")
+    if not commands:
+        raise HTTPException(status_code=400, detail="No commands provided")
+
+    # Here you can intepip grate logic to send commands to router via SSH, Netmiko, etc.
+    # For example, we'll just echo back the commands for now
+    result = f"Commands received:\n{commands}"
+    return {"result": result}
+
+@app.get("/txt-schema")
+def txt_schema(template: str):
+    # For TXT, placeholders are {{key}}; the registry extracted them at upload time
+    record = template_registry.get(os.path.basename(template))
+    if record is None:
+        raise HTTPException(404, f"Template '{template}' not found")
+    if record["placeholder_error"]:
+        raise HTTPException(422, f"Could not read placeholders: {record['placeholder_error']}")
+    fields = {m: "" for m in record["placeholders"]}
+    return {"template": template, "fields": fields}
+
+
+def _check_jinja_fields(payload: TextGenerateRequest):
+    """Jinja templates: every top-level variable must be supplied (loop variables excluded)."""
+    if not is_jinja_template(payload.template):
+        return
+    record = template_registry.get(os.path.basename(payload.template))
+    if record and record["placeholder_error"]:
+        raise HTTPException(status_code=422, detail=f"Could not read placeholders: {record['placeholder_error']}")
+    missing_fields = [f for f in (record["placeholders"] if record else []) if f not in payload.fields]
+    if missing_fields:
+        raise HTTPException(status_code=400, detail=f"Missing fields: {missing_fields}")
+
+
+@app.post("/generate-txt")
+def generate_txt(payload: TextGenerateRequest):
+    template_path = os.path.join(TEMPLATE_DIR, payload.template)
+    if not os.path.exists(template_path):
+        raise HTTPException(status_code=404, detail=f"Template '{payload.template}' not found")
+    _check_jinja_fields(payload)
+
+    try:
+        filename = generate_text_doc(template_path, payload.fields, output_dir=OUTPUT_DIR)
+    except TemplateError as e:
+        raise HTTPException(status_code=400, detail=f"Template error: {e}")
+
+    download_url = f"/download/{filename}"
+    return {"message": "TXT document generated", "download_url": download_url}
+
+
+@app.post("/preview-txt")
+def preview_txt(payload: TextGenerateRequest):
+    template_path = os.path.join(TEMPLATE_DIR, payload.template)
+    if not os.path.exists(template_path):
+        raise HTTPException(status_code=404, detail=f"Template '{payload.template}' not found")
+
+    if is_jinja_template(template_path):
+        _check_jinja_fields(payload)
+        try:
+            content, truncated = render_jinja(template_path, payload.fields, max_chars=TXT_PREVIEW_MAX_CHARS)
+        except TemplateError as e:
+            raise HTTPException(status_code=400, detail=f"Template error: {e}")
+        return {"preview_text": content, "truncated": truncated}
+
+    with open(template_path, "r", encoding="utf-8") as f:
+        content = render_text_template(f.read(), payload.fields)
+    return {"preview_text": content}
+######################
+#########################
+###############
+# ------------------------------
+# Scrape, then return the first page of products
+# (the rest via /scrap/products?cursor=...)
+# ------------------------------
+@app.get("/scrap/flipkart")
+def flipkart_scrap(url: str, limit: int = Query(100, ge=1, le=1000)):
+    try:
+        from utils.scrap import iter_products, encode_cursor
+        from utils import scrap_jobs
+        # Runs as a crawl job: joins a crawl of the same URL started here,
+        # through /scrap/jobs or by the schedule, instead of starting another
+        job = scrap_jobs.crawl(url, 1)
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+        rows = list(iter_products(limit=limit + 1))
+        next_cursor = encode_cursor(*rows[limit - 1][0]) if len(rows) > limit else None
+        return {"count": job['products'], "data": [item for _, item in rows[:limit]], "next_cursor": next_cursor}
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# ------------------------------
+# Download CSV from outputs
+# ------------------------------
+@app.get("/scrap/download")
+def download_flipkart():
+    path = "outputs/flipkart_all_pages.csv"
+    if os.path.exists(path):
+        return FileResponse(path, media_type="text/csv", filename="flipkart_results.csv")
+    return JSONResponse({"error": "File not found"}, status_code=404)
+
+
+# ------------------------------
+# Products table page (rows are loaded from /scrap/products)
+# ------------------------------
+SCRAP_TABLE_COLUMNS = [("Image", "Image"), ("Title", "Title"), ("Price", "Price"), ("Old Price", "Old Price"),
+                       ("Discount", "Discount"), ("Rating", "Rating"), ("Link", "Link"),
+                       ("Remark", "Remark"), ("ScrapeTime", "Scraped At")]
+
+@app.get("/scrap/table", response_class=HTMLResponse)
+def scrap_table(request: Request):
+    return templates.TemplateResponse(request, "scrap_table.html", {
+        "fields": [field for field, _ in SCRAP_TABLE_COLUMNS],
+        "headers": [label for _, label in SCRAP_TABLE_COLUMNS],
+        "page_size": 200,
+    })
+    ##############YTD
+progress = {"download": 0, "convert": 0, "file": ""}
+
+@app.get("/")
+def index(request: Request):
+    return templates.TemplateResponse("index.html", {"request": request})
+
+@app.get("/youtube/formats")
+def get_formats(url: str = Query(...)):
+    try:
+        print("Scrapping Links for Format")
+        clean_url = sanitize_url(url)
+        formats = get_available_formats(clean_url)
+        if not formats:
+            return {"error": "No downloadable formats found for this video."}
+        return {"formats": formats}
+    except Exception as e:
+        return {"error": f"Failed to fetch formats: {str(e)}"}
+
+@app.post("/youtube/start")
+async def start_youtube(request: Request, background_tasks: BackgroundTasks):
+    data = await request.json()
+    url = sanitize_url(data.get("url"))
+    format_id = data.get("format_id")
+
+    def hook(d):
+        if d['status'] == 'downloading':
+            downloaded = d.get("downloaded_bytes") or 0
+            total = d.get("total_bytes") or d.get("total_bytes_estimate") or 1
+            progress["download"] = min(downloaded / total * 100, 100)
+        elif d['status'] == 'finished':
+            progress["download"] = 100
+
+    def process():
+        try:
+            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+                info = ydl.extract_info(url, download=False)
+                available_ids = [f["format_id"] for f in info.get("formats", [])]
+
+            selected_format = format_id if format_id in available_ids else "bestvideo+bestaudio/best"
+
+            ydl_opts = {
+                'format': selected_format,
+                'outtmpl': os.path.join(DOWNLOAD_DIR, '%(title)s.%(ext)s'),
+                'noplaylist': True,
+                'progress_hooks': [hook],
+                # 'ffmpeg_location': FFMPEG_EXE_PATH,
+                'merge_output_format': 'mp4',   # ensure merge
+                  # 🧠 Throttling to prevent 429
+                'sleep_interval': 2,          # Wait 2 seconds between requests
+                'max_sleep_interval': 5,      # Random sleep up to 5s
+                'ratelimit': 500000,          # Max 500KB/s download speed
+                'throttled_rate': 300000,     # Gradually reduce speed if needed
+            }
+
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=True)
+                downloaded_path = ydl.prepare_filename(info)
+                progress["file"] = downloaded_path
+                progress["convert"] = 100
+        except Exception as e:
+            progress["convert"] = -1
+            print("Download error:", e)
+
+    progress.update({"download": 0, "convert": 0, "file": ""})
+    background_tasks.add_task(process)
+    return {"status": "started"}
+
+
+@app.get("/youtube/progress")
+def get_youtube_progress():
+    return progress
+
+@app.get("/youtube/files")
+def list_downloaded_files():
+    if not os.path.exists(DOWNLOAD_DIR):
+        return {"files": []}
+    files = [f for f in os.listdir(DOWNLOAD_DIR) if f.endswith((".mp3", ".mp4", ".webm"))]
+    return {"files": files}
+
+@app.get("/youtube/download")
+def download_youtube_file(filename: str):
+    file_path = os.path.join(DOWNLOAD_DIR, filename)
+    if not os.path.exists(file_path):
+        return {"error": "File not found"}
+    return FileResponse(file_path, media_type="application/octet-stream", filename=filename)
+##############################################################################
+from routers.whiteboard import router as whiteboard_router
+# Include whiteboard router
+app.include_router(whiteboard_router)
+
+
+@app.get("/", response_class=HTMLResponse)
+async def home_page(request: Request):
+    # Your existing code to render index.html
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        "templates": [],  # your templates_list
+        "files": []       # your files_list
+    })
+
+# Add these pages
+@app.get("/about", response_class=HTMLResponse)
+async def about_page(request: Request):
+    return templates.TemplateResponse("about.html", {"request": request})
+
+@app.get("/contact", response_class=HTMLResponse)
+async def contact_page(request: Request):
+    return templates.TemplateResponse("contact.html", {"request": request})
+
+@app.get("/privacy", response_class=HTMLResponse)
+async def privacy_page(request: Request):
+    return templates.TemplateResponse("privacy.html", {"request": request})
+
+@app.get("/terms", response_class=HTMLResponse)
+async def terms_page(request: Request):
+    return templates.TemplateResponse("terms.html", {"request": request})
+
+
+
+
+
+# CORS for frontend JS
+##########################################
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.get("/api/sarkariresult")
+def scrape_sarkariresult(save_csv: bool = False, full: bool = False, wait: bool = False):
+    # Starts a crawl (or joins the one in flight) and answers with the newest
+    # stored results straight away; wait=true returns after the crawl instead.
+    # full=true re-fetches every posting (after the incremental crawl in
+    # flight, if any). save_csv=true waits too, then writes every stored
+    # posting to a CSV. Only the first (cached) page is returned: follow
+    # next_cursor on /api/sarkariresult/results for the rest.
+    run, started = scheduler.trigger("sarkari", full=full)
+    if wait or save_csv:
+        run.wait(600)
+    csv_path = sarkariresult.save_results_csv(sarkariresult.get_all_results()) if save_csv else None
+    page = json.loads(sarkari_first_page())
+    return JSONResponse({"count": page["count"], "results": page["items"],
+                         "next_cursor": page["next_cursor"], "more": "/api/sarkariresult/results",
+                         "csv": csv_path, "run": run.as_dict(), "coalesced": not started})
+
+
+# Sarkari results are read through utils/sarkari_api.py (/api/sarkariresult/results,
+# /all, /table); these older paths are kept as thin aliases of it
+@app.get("/results", response_class=HTMLResponse)
+async def show_results():
+    return await sarkari_results_table(fields=None, q=None, include_removed=True)
+
+
+@app.get("/api/results")
+async def api_results():
+    try:
+        return await sarkari_stream_all(key="data", status="success")
+    except Exception as e:
+        return JSONResponse({"status": "error", "message": str(e)})
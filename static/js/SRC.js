@@ -38,37 +38,74 @@ document.addEventListener("DOMContentLoaded", () => {
         return new Date(0);
     }
 
+    // Postings are read a page at a time from /results; "Load more" follows next_cursor
+    const PAGE_SIZE = 500;
+    let loaded = [];        // postings fetched so far
+    let nextCursor = null;  // null once every posting is loaded
+
+    async function fetchResultsPage(cursor) {
+        const params = new URLSearchParams({ limit: PAGE_SIZE, include_removed: true });
+        if (cursor) params.set("cursor", cursor);
+        const res = await fetch(`/api/sarkariresult/results?${params}`);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const page = await res.json();
+        nextCursor = page.next_cursor;
+        return page.items;
+    }
+
+    function showLoaded() {
+        // Default sort by Online_Apply_Start_Date descending
+        const results = loaded.slice().sort((a, b) =>
+            parseCustomDate(b["Online_Apply_Start_Date"]) - parseCustomDate(a["Online_Apply_Start_Date"])
+        );
+        renderTable({ results });
+    }
+
     async function fetchSavedResults() {
         try {
-            const res = await fetch("/api/sarkariresult/all");
-            if (!res.ok) throw new Error(`HTTP ${res.status}`);
-            const data = await res.json();
-
-            // Default sort by Online_Apply_Start_Date descending
-            data.results.sort((a, b) =>
-                parseCustomDate(b["Online_Apply_Start_Date"]) - parseCustomDate(a["Online_Apply_Start_Date"])
-            );
+            loaded = await fetchResultsPage(null);
+            showLoaded();
+        } catch (err) {
+            resultsDiv.innerHTML = `<p style="color:red; text-align:center;">Error: ${err.message}</p>`;
+        }
+    }
 
-            renderTable(data);
+    async function loadMoreResults() {
+        if (!nextCursor) return;
+        try {
+            loaded = loaded.concat(await fetchResultsPage(nextCursor));
+            showLoaded();
         } catch (err) {
             resultsDiv.innerHTML = `<p style="color:red; text-align:center;">Error: ${err.message}</p>`;
         }
     }
 
+    // Crawls run on the server's schedule; this only asks for one now
+    // (joining it if one is already running) and reloads once it is done
     async function scrapeNewResults() {
         try {
-            await fetch("/api/sarkariresult?save_csv=true");
+            const res = await fetch("/api/schedule/sarkari/run?wait=true", { method: "POST" });
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            await fetchSavedResults();
         } catch (err) {
             console.error("Scrape error:", err.message);
         }
     }
 
-
-    async function scrapeNewResults() {
+    // Reload the table when a scheduled crawl has finished since the last look
+    let lastRunFinished = null;
+    async function checkForNewRun() {
         try {
-            await fetch("/api/sarkariresult?save_csv=true");
+            const res = await fetch("/api/schedule/sarkari");
+            if (!res.ok) return;
+            const status = await res.json();
+            const finished = status.last_run && status.last_run.finished_at;
+            if (finished && lastRunFinished && finished !== lastRunFinished) {
+                await fetchSavedResults();
+            }
+            lastRunFinished = finished || lastRunFinished;
         } catch (err) {
-            console.error("Scrape error:", err.message);
+            console.error("Schedule check error:", err.message);
         }
     }
 
@@ -216,6 +253,17 @@ document.addEventListener("DOMContentLoaded", () => {
             link.click();
             document.body.removeChild(link);
         };
+
+        // More postings on the server than loaded so far
+        if (nextCursor) {
+            const moreBtn = document.createElement("button");
+            moreBtn.textContent = "Load more";
+            moreBtn.style.margin = "10px";
+            moreBtn.style.padding = "5px 10px";
+            moreBtn.style.cursor = "pointer";
+            moreBtn.onclick = loadMoreResults;
+            resultsDiv.appendChild(moreBtn);
+        }
     }
 
     // ---------- Left table population ----------
@@ -234,23 +282,17 @@ document.addEventListener("DOMContentLoaded", () => {
 
     fetchBtn.addEventListener("click", fetchSavedResults);
 
-    filterTitle.addEventListener("change", async () => {
+    filterTitle.addEventListener("change", () => {
         const title = filterTitle.value;
-        resultsDiv.innerHTML = "<p>Filtering results... ⏳</p>";
-        try {
-            const res = await fetch("/api/sarkariresult/all");
-            const data = await res.json();
-            let filtered = data.results;
-            if (title) filtered = filtered.filter(r => r["title"] === title);
-            renderTable({ results: filtered });
-        } catch (err) {
-            resultsDiv.innerHTML = `<p style="color:red; text-align:center;">Error: ${err.message}</p>`;
-        }
+        // Filters the postings already loaded; "Load more" brings in the rest
+        if (!title) return showLoaded();
+        renderTable({ results: loaded.filter(r => r["title"] === title) });
     });
 
    // ------------------- Load once on startup -------------------
     fetchSavedResults();
 
-    // ✅ optional: scrape once per hour in background (not every few seconds)
-    setInterval(scrapeNewResults, 60 * 60 * 1000);
+    // The server scrapes on its own schedule; tabs just pick up new results
+    checkForNewRun();
+    setInterval(checkForNewRun, 5 * 60 * 1000);
 });
@@ -63,6 +63,8 @@ async function generateDoc() {
 }
 
 // ===================== Preview Document =====================
+const PREVIEW_MAX_PARAGRAPHS = 400;
+
 async function previewDoc() {
     const template = document.getElementById("template").value;
     if (!template) return alert("Please select a template");
@@ -71,7 +73,8 @@ async function previewDoc() {
     const fields = {};
     inputs.forEach(inp => fields[inp.id] = inp.value);
 
-    const endpoint = template.endsWith(".txt") ? "/preview-txt" : "/preview";
+    // Large Word templates: only the first pages are needed for a preview
+    const endpoint = template.endsWith(".txt") ? "/preview-txt" : "/preview?max_paragraphs=" + PREVIEW_MAX_PARAGRAPHS;
 
     try {
         const res = await fetch(endpoint, {
@@ -81,7 +84,9 @@ async function previewDoc() {
         });
 
         const data = await res.json();
-        document.getElementById("previewOutput").textContent = data.preview_text || "No preview available";
+        let text = data.preview_text || "No preview available";
+        if (data.truncated) text += "\n\n... (preview truncated, generate the document to see all of it)";
+        document.getElementById("previewOutput").textContent = text;
     } catch (err) {
         document.getElementById("previewOutput").textContent = "Error: " + err;
     }
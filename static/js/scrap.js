@@ -1,10 +1,14 @@
 // --------------------------
-// Start Flipkart Scraping
+// Start Flipkart Scraping (background crawl job)
 // --------------------------
+let crawlJobId = null;
+let crawlEvents = null;
+
 async function startFlipkartScrap() {
     const tableDiv = document.getElementById("flipkartResults");
     const downloadBtn = document.getElementById("downloadFlipkart");
     const url = document.getElementById("flipkartUrl").value;
+    const pages = parseInt(document.getElementById("flipkartPages").value, 10) || 1;
 
     if (!url) {
         alert("Please enter Flipkart URL!");
@@ -15,51 +19,128 @@ async function startFlipkartScrap() {
     downloadBtn.style.display = "none";
 
     try {
-        const response = await fetch(`/scrap/flipkart?url=${encodeURIComponent(url)}`);
-        const data = await response.json();
-
-        if (data.error) {
-            tableDiv.innerHTML = `<p style='color:red'>Error: ${data.error}</p>`;
-            return;
-        }
-
-        displayProductsTable(data.data || [], tableDiv, downloadBtn);
-
+        const response = await fetch("/scrap/jobs", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ url, pages })
+        });
+        const job = await response.json();
+        if (!response.ok) throw new Error(JSON.stringify(job.detail || job));
+        watchCrawlJob(job);
     } catch (err) {
         tableDiv.innerHTML = `<p style='color:red'>Error: ${err.message}</p>`;
     }
 }
 
+function watchCrawlJob(job) {
+    const tableDiv = document.getElementById("flipkartResults");
+    const cancelBtn = document.getElementById("cancelFlipkart");
+
+    crawlJobId = job.id;
+    if (crawlEvents) crawlEvents.close();
+    cancelBtn.style.display = "inline-block";
+
+    crawlEvents = new EventSource(job.events_url);
+    crawlEvents.addEventListener("progress", e => {
+        const j = JSON.parse(e.data);
+        tableDiv.innerHTML = `<p>Crawl ${j.status}: page ${j.last_page}/${j.max_pages}, ` +
+            `${j.products} products, ${j.changes} price changes ⏳</p>`;
+
+        if (!["queued", "running", "cancelling"].includes(j.status)) {
+            crawlEvents.close();
+            cancelBtn.style.display = "none";
+            if (j.status === "failed") {
+                tableDiv.innerHTML = `<p style='color:red'>Error: ${j.error}</p>`;
+            } else {
+                loadFlipkartFromDB();
+            }
+        }
+    });
+    crawlEvents.onerror = () => {
+        // The server closes the stream when the job ends; anything else is a lost connection
+        if (crawlEvents.readyState === EventSource.CLOSED) cancelBtn.style.display = "none";
+    };
+}
+
+async function cancelFlipkartScrap() {
+    if (!crawlJobId) return;
+    await fetch(`/scrap/jobs/${crawlJobId}/cancel`, { method: "POST" });
+}
+
 // --------------------------
-// Load data from DB
+// Load data from DB (paginated)
 // --------------------------
-async function loadFlipkartFromDB() {
+const PRODUCTS_PAGE_SIZE = 100;
+let productsQuery = "";   // filters of the listing currently shown
+
+async function fetchProductsPage(cursor) {
+    const params = new URLSearchParams(productsQuery);
+    params.set("limit", PRODUCTS_PAGE_SIZE);
+    if (cursor) params.set("cursor", cursor);
+    const response = await fetch(`/scrap/products?${params}`);
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.detail || response.statusText);
+    return data;
+}
+
+async function loadFlipkartFromDB(filters = {}) {
     const tableDiv = document.getElementById("flipkartResults");
     const downloadBtn = document.getElementById("downloadFlipkart");
 
     tableDiv.innerHTML = "<p>Loading data from DB... ⏳</p>";
     downloadBtn.style.display = "none";
+    productsQuery = new URLSearchParams(
+        Object.entries(filters).filter(([, v]) => v !== "" && v != null)
+    ).toString();
 
     try {
-        const response = await fetch("/scrap/flipkart/db");
-        const data = await response.json();
-
-        if (data.error) {
-            tableDiv.innerHTML = `<p style='color:red'>${data.error}</p>`;
-            return;
-        }
-
-        displayProductsTable(data.data || [], tableDiv, downloadBtn);
-
+        const data = await fetchProductsPage(null);
+        displayProductsTable(data.items, data.next_cursor, tableDiv, downloadBtn);
     } catch (err) {
         tableDiv.innerHTML = `<p style='color:red'>Error: ${err.message}</p>`;
     }
 }
 
+async function loadMoreProducts(button) {
+    button.disabled = true;
+    button.textContent = "Loading... ⏳";
+    try {
+        const data = await fetchProductsPage(button.dataset.cursor);
+        const tbody = document.querySelector("#flipkartResults tbody");
+        tbody.insertAdjacentHTML("beforeend", data.items.map(productRow).join(""));
+        updateLoadMore(button, data.next_cursor);
+    } catch (err) {
+        button.disabled = false;
+        button.textContent = `Retry (${err.message})`;
+    }
+}
+
+function updateLoadMore(button, nextCursor) {
+    button.dataset.cursor = nextCursor || "";
+    button.disabled = false;
+    button.textContent = "Load more";
+    button.style.display = nextCursor ? "inline-block" : "none";
+}
+
 // --------------------------
 // Display products in table
 // --------------------------
-function displayProductsTable(products, tableDiv, downloadBtn) {
+function productRow(p) {
+    return `<tr>
+            <td>${p.Image ? `<img src="${p.Image}" style="height:80px;">` : 'NA'}</td>
+            <td>${p.Title || 'NA'}</td>
+            <td>${p.Price || 'NA'}</td>
+            <td>${p["Old Price"] || 'NA'}</td>
+            <td>${p.Discount || 'NA'}</td>
+            <td>${p.Rating || 'NA'}</td>
+            <td>${p.Features || 'NA'}</td>
+            <td>${p.Link ? `<a href="${p.Link}" target="_blank">View</a>` : 'NA'}</td>
+            <td>${p.Remark || 'NA'}</td>
+            <td>${p.ScrapeTime || 'NA'}</td>
+        </tr>`;
+}
+
+function displayProductsTable(products, nextCursor, tableDiv, downloadBtn) {
     if (!products.length) {
         tableDiv.innerHTML = "<p>No products found.</p>";
         return;
@@ -73,24 +154,10 @@ function displayProductsTable(products, tableDiv, downloadBtn) {
                 <th>Link</th><th>Remark</th><th>Scraped At</th>
             </tr>
         </thead>
-        <tbody>`;
-
-    products.forEach(p => {
-        table += `<tr>
-            <td>${p.Image ? `<img src="${p.Image}" style="height:80px;">` : 'NA'}</td>
-            <td>${p.Title || 'NA'}</td>
-            <td>${p.Price || 'NA'}</td>
-            <td>${p["Old Price"] || 'NA'}</td>
-            <td>${p.Discount || 'NA'}</td>
-            <td>${p.Rating || 'NA'}</td>
-            <td>${p.Features || 'NA'}</td>
-            <td>${p.Link ? `<a href="${p.Link}" target="_blank">View</a>` : 'NA'}</td>
-            <td>${p.Remark || 'NA'}</td>
-            <td>${p.ScrapeTime || 'NA'}</td>
-        </tr>`;
-    });
+        <tbody>${products.map(productRow).join("")}</tbody></table>
+        <button id="loadMoreProducts" onclick="loadMoreProducts(this)" style="margin-top:10px;">Load more</button>`;
 
-    table += "</tbody></table>";
     tableDiv.innerHTML = table;
+    updateLoadMore(document.getElementById("loadMoreProducts"), nextCursor);
     downloadBtn.style.display = products.length ? "inline-block" : "none";
 }
@@ -0,0 +1,112 @@
+import zipfile
+from io import BytesIO
+
+from docx import Document
+
+from utils.doc_generator import extract_placeholders, render_docx_bytes, render_text_template
+
+
+def _template(tmp_path, build, name="t.docx"):
+    doc = Document()
+    build(doc)
+    path = tmp_path / name
+    doc.save(str(path))
+    return str(path)
+
+
+def _render(path, context):
+    return Document(BytesIO(render_docx_bytes(path, context)))
+
+
+def _runs(paragraph):
+    return [(r.text, bool(r.bold), bool(r.italic)) for r in paragraph.runs]
+
+
+def test_placeholder_split_across_runs_keeps_formatting(tmp_path):
+    def build(doc):
+        p = doc.add_paragraph()
+        p.add_run("Hello {{{na").bold = True
+        p.add_run("me}}}")
+        p.add_run(", welcome").italic = True
+
+    path = _template(tmp_path, build)
+    assert extract_placeholders(path) == ["name"]
+    p = _render(path, {"name": "Asha"}).paragraphs[0]
+    assert p.text == "Hello Asha, welcome"
+    # The value lands in the run where the placeholder starts; the others keep their formatting
+    assert _runs(p) == [("Hello Asha", True, False), ("", False, False), (", welcome", False, True)]
+
+
+def test_placeholder_spanning_three_runs(tmp_path):
+    def build(doc):
+        p = doc.add_paragraph()
+        p.add_run("[{{")
+        p.add_run("{host")
+        p.add_run("}}}]")
+
+    p = _render(_template(tmp_path, build), {"host": "db01"}).paragraphs[0]
+    assert p.text == "[db01]"
+
+
+def test_several_placeholders_in_one_run(tmp_path):
+    def build(doc):
+        doc.add_paragraph("{{{a}}}-{{{b}}}-{{{a}}}")
+
+    p = _render(_template(tmp_path, build), {"a": 1, "b": "two"}).paragraphs[0]
+    assert p.text == "1-two-1"
+
+
+def test_unknown_keys_are_left_in_place(tmp_path):
+    def build(doc):
+        p = doc.add_paragraph()
+        p.add_run("{{{known}}} and {{{unk")
+        p.add_run("nown}}}")
+
+    p = _render(_template(tmp_path, build), {"known": "yes"}).paragraphs[0]
+    assert p.text == "yes and {{{unknown}}}"
+
+
+def test_surrounding_spaces_are_preserved(tmp_path):
+    def build(doc):
+        p = doc.add_paragraph()
+        p.add_run("{{{lead}}}")
+        p.add_run("tail")
+
+    rendered = render_docx_bytes(_template(tmp_path, build), {"lead": "  padded  "})
+    with zipfile.ZipFile(BytesIO(rendered)) as zf:
+        xml = zf.read("word/document.xml").decode("utf-8")
+    assert '<w:t xml:space="preserve">  padded  </w:t>' in xml
+    assert Document(BytesIO(rendered)).paragraphs[0].text == "  padded  tail"
+
+
+def test_tables_and_headers_are_filled(tmp_path):
+    def build(doc):
+        doc.sections[0].header.paragraphs[0].text = "Project {{{project}}}"
+        doc.sections[0].footer.paragraphs[0].text = "Owner {{{owner}}}"
+        table = doc.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "{{{project}}}"
+        table.cell(0, 1).paragraphs[0].add_run("{{{own").bold = True
+        table.cell(0, 1).paragraphs[0].add_run("er}}}")
+
+    path = _template(tmp_path, build)
+    assert sorted(extract_placeholders(path)) == ["owner", "project"]
+    doc = _render(path, {"project": "Apollo", "owner": "Ravi"})
+    assert doc.sections[0].header.paragraphs[0].text == "Project Apollo"
+    assert doc.sections[0].footer.paragraphs[0].text == "Owner Ravi"
+    row = doc.tables[0].rows[0]
+    assert [c.text for c in row.cells] == ["Apollo", "Ravi"]
+    assert row.cells[1].paragraphs[0].runs[0].bold
+
+
+def test_rendering_leaves_the_cached_template_untouched(tmp_path):
+    def build(doc):
+        doc.add_paragraph("Hi {{{name}}}")
+
+    path = _template(tmp_path, build)
+    assert _render(path, {"name": "one"}).paragraphs[0].text == "Hi one"
+    assert _render(path, {"name": "two"}).paragraphs[0].text == "Hi two"
+
+
+def test_text_template_substitution():
+    content = "host={{host}} port={{ port }} {{missing}}"
+    assert render_text_template(content, {"host": "h", "port": 1}) == "host=h port={{ port }} {{missing}}"
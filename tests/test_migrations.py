@@ -0,0 +1,162 @@
+import json
+import sqlite3
+
+import pytest
+
+from utils import sarkariresult, scrap
+
+# price_history as the tracker created it before schema versioning (keyed by link)
+PRICE_HISTORY_V1 = """
+    CREATE TABLE price_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        link TEXT UNIQUE,
+        old_price TEXT,
+        old_price_num REAL,
+        current_price TEXT,
+        current_price_num REAL,
+        remark TEXT,
+        last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        discount TEXT,
+        rating TEXT,
+        image TEXT,
+        features TEXT
+    )
+"""
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+@pytest.fixture
+def tracker_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrap, "DB_FILE", str(tmp_path / "price_tracker.db"))
+    conn = sqlite3.connect(scrap.DB_FILE)
+    conn.execute(PRICE_HISTORY_V1)
+    link = "https://www.flipkart.com/phone/p/itm1?pid=PHN1&lid=L{}&srno=s_{}"
+    conn.executemany(
+        "INSERT INTO price_history (title, link, current_price, current_price_num, last_checked) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            ("Phone (old)", link.format(1, 1), "₹12,000", 12000.0, "2024-01-01 10:00:00"),
+            ("Phone", link.format(2, 7), "₹11,500", 11500.0, "2024-02-01 10:00:00"),
+            ("Cable", "https://www.flipkart.com/cable/p/itm2?pid=CBL1", "NA", None, "2024-01-15 10:00:00"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return scrap.DB_FILE
+
+
+def test_tracker_v1_migrates_to_current(tracker_db):
+    scrap.init_db()
+    conn = scrap.connect_db()
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == scrap.SCHEMA_VERSION
+        assert {"pid", "min_price_num"} <= _columns(conn, "price_history")
+        assert {"product_id", "ts", "price_num"} == _columns(conn, "price_observations")
+        assert {"kind", "delta", "pct", "all_time_low"} <= _columns(conn, "price_events")
+
+        # One row per pid, holding the most recently checked state
+        rows = conn.execute("SELECT pid, title, current_price_num, min_price_num FROM price_history "
+                            "ORDER BY pid").fetchall()
+        assert rows == [("CBL1", "Cable", None, None), ("PHN1", "Phone", 11500.0, 11500.0)]
+
+        # Observations are seeded with each priced product's current price
+        seeded = conn.execute("SELECT h.pid, o.price_num FROM price_observations o "
+                              "JOIN price_history h ON h.id = o.product_id").fetchall()
+        assert seeded == [("PHN1", 11500.0)]
+        assert conn.execute("SELECT COUNT(*) FROM price_events").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_tracker_migration_is_idempotent(tracker_db):
+    scrap.init_db()
+    scrap.init_db()
+    remarks = scrap.upsert_products([{"Link": "https://www.flipkart.com/phone/p/itm1?pid=PHN1&lid=L9",
+                                      "Title": "Phone", "PriceText": "₹10,999"}])
+    assert remarks[0].startswith("Price Decreased")
+    conn = scrap.connect_db()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0] == 2
+        assert conn.execute("SELECT min_price_num FROM price_history WHERE pid = 'PHN1'").fetchone()[0] == 10999.0
+        assert conn.execute("SELECT kind, old_price_num FROM price_events").fetchall() == [("decrease", 11500.0)]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def results_db(tmp_path, monkeypatch):
+    # The unversioned layout: one TEXT column per label, added as labels were seen
+    monkeypatch.setattr(sarkariresult, "DB_FILE", str(tmp_path / "sarkariresult.db"))
+    conn = sqlite3.connect(sarkariresult.DB_FILE)
+    conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+    for column in ("title", "link", "last_checked", "Post_Name", "Last_Date_For_Apply_Online", "Total_Post"):
+        conn.execute(f"ALTER TABLE results ADD COLUMN '{column}' TEXT")
+    conn.executemany(
+        "INSERT INTO results (title, link, last_checked, Post_Name, Last_Date_For_Apply_Online, Total_Post) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("SSC CGL 2024 (draft)", "https://s/cgl", "2024-01-01", "Clerk", None, None),
+            ("SSC CGL 2024", "https://s/cgl", "2024-02-01", "Combined Graduate Level", "15-03-2024", "17,727 Posts"),
+            ("Railway Group D", "https://s/rrb", None, "Group D", "5 April 2024", None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return sarkariresult.DB_FILE
+
+
+def test_results_v0_migrates_to_current(results_db):
+    sarkariresult.init_db()
+    conn = sarkariresult.connect_db()
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == sarkariresult.SCHEMA_VERSION
+        assert {*sarkariresult.CORE_COLUMNS, "details", "content_hash", "source", "removed_at"} \
+            == _columns(conn, "results")
+        tables = {name for name, in conn.execute("SELECT name FROM sqlite_master")}
+        assert {"scrape_runs", "scrape_run_changes", "results_fts",
+                "results_fts_insert", "results_fts_delete", "results_fts_update"} <= tables
+
+        # Re-keyed by link (latest row wins), labels folded into details and promoted
+        rows = conn.execute("SELECT link, title, post_name, last_date, vacancies, details, last_checked "
+                            "FROM results ORDER BY link").fetchall()
+        assert len(rows) == 2
+        cgl, rrb = rows
+        assert cgl[:5] == ("https://s/cgl", "SSC CGL 2024", "Combined Graduate Level", "2024-03-15", 17727)
+        assert json.loads(cgl[5])["Total_Post"] == "17,727 Posts"
+        assert rrb[2:5] == ("Group D", "2024-04-05", None)
+        # NULL last_checked becomes '' so keyset paging still reaches the row
+        assert rrb[6] == ""
+    finally:
+        conn.close()
+
+
+def _search(q):
+    return [item["link"] for _, item in sarkariresult.iter_results(q=q, include_removed=True)]
+
+
+def test_results_fts_is_rebuilt_and_kept_in_sync(results_db):
+    sarkariresult.init_db()
+    # Rows that existed before the migration are searchable
+    assert _search("graduate") == ["https://s/cgl"]
+    assert _search("railway") == ["https://s/rrb"]
+
+    # The triggers follow inserts, updates and deletes
+    sarkariresult.upsert_results([
+        {"Title": "Railway Group D Result", "Link": "https://s/rrb", "Details": {"Post_Name": "Track Maintainer"}},
+        {"Title": "UPSC Prelims", "Link": "https://s/upsc", "Details": {"Post_Name": "Civil Services"}},
+    ])
+    assert _search("maintainer") == ["https://s/rrb"]
+    assert _search("group d") == ["https://s/rrb"]
+    assert _search("civil services") == ["https://s/upsc"]
+
+    conn = sarkariresult.connect_db()
+    try:
+        with conn:
+            conn.execute("DELETE FROM results WHERE link = 'https://s/upsc'")
+    finally:
+        conn.close()
+    assert _search("civil") == []
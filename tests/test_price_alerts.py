@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from utils import price_alerts, scrap, scrap_api
+from utils.price_alerts import AlertRule, PriceEventBus
+
+ALL_KINDS = AlertRule(kinds=("new", "decrease", "increase"))
+
+
+def _event(event_id, kind="decrease", pid="P1"):
+    return {"id": event_id, "kind": kind, "pid": pid, "delta": -10.0, "pct": -1.0, "all_time_low": False}
+
+
+def _products(prices):
+    return [{"Link": f"https://www.flipkart.com/x/p/itm?pid=P{i}", "Title": f"Product {i}", "PriceText": price}
+            for i, price in enumerate(prices)]
+
+
+def test_full_subscription_drops_the_oldest_and_counts_them():
+    async def scenario():
+        bus = PriceEventBus()
+        sub = bus.subscribe(AlertRule(kinds=("decrease",)), maxsize=3)
+        bus.publish([_event(i) for i in range(1, 6)] + [_event(6, kind="increase")])
+        await asyncio.sleep(0)   # let the queued deliveries run on this loop
+        received = [sub.queue.get_nowait()["id"] for _ in range(sub.queue.qsize())]
+        bus.unsubscribe(sub)
+        return sub.dropped, received, bus.subscriber_count()
+
+    dropped, received, subscribers = asyncio.run(scenario())
+    assert dropped == 2
+    assert received == [3, 4, 5]   # the increase never matched the rule
+    assert subscribers == 0
+
+
+@pytest.fixture
+def tracker(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrap, "DB_FILE", str(tmp_path / "price_tracker.db"))
+    scrap.init_db()
+    # Tiny queues and replay pages, so a handful of events overflow and span pages
+    subscribe = price_alerts.bus.subscribe
+    monkeypatch.setattr(price_alerts.bus, "subscribe", lambda rule, loop=None: subscribe(rule, loop, maxsize=2))
+    monkeypatch.setattr(scrap_api, "REPLAY_PAGE", 2)
+
+
+async def _take(feed, n):
+    return [await asyncio.wait_for(feed.__anext__(), 5) for _ in range(n)]
+
+
+def test_alert_feed_replays_stored_events_after_after_id(tracker):
+    scrap.upsert_products(_products(["₹100", "₹200", "₹300", "₹400", "₹500"]))
+
+    async def scenario():
+        feed = scrap_api._alert_feed(ALL_KINDS, 2)
+        try:
+            return await _take(feed, 3)
+        finally:
+            await feed.aclose()
+
+    items = asyncio.run(scenario())
+    assert [(kind, event["id"]) for kind, event in items] == [("price", 3), ("price", 4), ("price", 5)]
+
+
+def test_alert_feed_announces_drops_and_refills_from_the_table(tracker):
+    async def scenario():
+        feed = scrap_api._alert_feed(ALL_KINDS, None)
+        waiting = asyncio.ensure_future(feed.__anext__())
+        await asyncio.sleep(0.1)   # subscribed, caught up, waiting for live events
+        # Committed and published from this thread: all five deliveries run
+        # before the feed wakes up, so three of them overflow its queue
+        scrap.upsert_products(_products(["₹100", "₹200", "₹300", "₹400", "₹500"]))
+        items = [await asyncio.wait_for(waiting, 5), *await _take(feed, 5)]
+
+        # Live again afterwards, with nothing sent twice
+        scrap.upsert_products(_products(["₹90"]))
+        items += await _take(feed, 1)
+        await feed.aclose()
+        return items
+
+    items = asyncio.run(scenario())
+    assert items[0] == ("dropped", {"dropped": 3, "after_id": 0})
+    prices = [event for kind, event in items[1:] if kind == "price"]
+    assert [event["id"] for event in prices] == [1, 2, 3, 4, 5, 6]
+    assert [event["kind"] for event in prices] == ["new"] * 5 + ["decrease"]
+    assert price_alerts.bus.subscriber_count() == 0
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.scheduler import Scheduler, SingleFlight
+
+
+class BlockingTarget:
+    """Records each call's options and blocks until release()."""
+
+    def __init__(self):
+        self.calls = []
+        self.entered = threading.Semaphore(0)
+        self._gate = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, **options):
+        with self._lock:
+            self.calls.append(options)
+        self.entered.release()
+        self._gate.wait(10)
+        return len(self.calls)
+
+    def release(self):
+        self._gate.set()
+
+
+def _trigger_concurrently(flight, target, n, **options):
+    barrier = threading.Barrier(n)
+
+    def trigger(_):
+        barrier.wait()
+        return flight.trigger("sarkari", target, **options)
+
+    with ThreadPoolExecutor(n) as pool:
+        return list(pool.map(trigger, range(n)))
+
+
+def test_concurrent_triggers_share_one_run():
+    flight, target = SingleFlight(), BlockingTarget()
+    results = _trigger_concurrently(flight, target, 20)
+    assert target.entered.acquire(timeout=5)
+
+    runs = {id(run) for run, _ in results}
+    assert len(runs) == 1
+    assert sum(started for _, started in results) == 1
+
+    target.release()
+    run = results[0][0]
+    assert run.wait(5)
+    assert run.status() == "finished" and run.result == 1
+    assert target.calls == [{}]
+    assert flight.in_flight("sarkari") is None
+
+
+def test_trigger_with_new_options_queues_exactly_one_follow_up():
+    flight, target = SingleFlight(), BlockingTarget()
+    first, started = flight.trigger("sarkari", target)
+    assert started and target.entered.acquire(timeout=5)
+
+    # The incremental run in flight does not cover full=True: one queued run for all of them
+    results = _trigger_concurrently(flight, target, 10, full=True)
+    follow_up = results[0][0]
+    assert {id(run) for run, _ in results} == {id(follow_up)}
+    assert sum(started for _, started in results) == 1
+    assert follow_up is not first and follow_up.status() == "queued"
+    assert flight.queued("sarkari") is follow_up
+
+    # A plain trigger is covered by the run in flight and joins it
+    assert flight.trigger("sarkari", target) == (first, False)
+
+    target.release()
+    assert first.wait(5) and follow_up.wait(5)
+    assert target.calls == [{}, {"full": True}]
+    assert flight.queued("sarkari") is None and flight.in_flight("sarkari") is None
+
+
+def test_failed_run_records_the_error_and_frees_the_key():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("listing unreachable")
+
+    run, _ = flight.trigger("sarkari", boom)
+    assert run.wait(5)
+    assert run.status() == "failed" and run.error == "listing unreachable"
+
+    again, started = flight.trigger("sarkari", lambda: "ok")
+    assert started and again.wait(5) and again.result == "ok"
+
+
+def test_scheduler_rejects_options_a_target_does_not_take():
+    scheduler = Scheduler()
+    scheduler.add("flipkart", lambda: None)
+    with pytest.raises(ValueError):
+        scheduler.trigger("flipkart", full=True)
+    with pytest.raises(KeyError):
+        scheduler.trigger("missing")
@@ -0,0 +1,35 @@
+import pytest
+from jinja2.exceptions import SecurityError
+
+from utils.text_templates import render_jinja, stream_jinja_to_file
+
+PAYLOAD = "{{ cycler.__init__.__globals__.os.popen('echo PWNED-$(id -u)').read() }}"
+
+
+def _template(tmp_path, body, name="t.j2"):
+    path = tmp_path / name
+    path.write_text(body, encoding="utf-8")
+    return str(path)
+
+
+def test_render_jinja_still_renders_loops(tmp_path):
+    path = _template(tmp_path, "{% for h in hosts %}{{ h | upper }};{% endfor %}")
+    assert render_jinja(path, {"hosts": ["a", "b"]}) == ("A;B;", False)
+
+
+def test_render_jinja_blocks_code_execution(tmp_path):
+    path = _template(tmp_path, PAYLOAD)
+    with pytest.raises(SecurityError):
+        render_jinja(path, {})
+
+
+def test_stream_jinja_to_file_blocks_code_execution(tmp_path):
+    path = _template(tmp_path, PAYLOAD)
+    with pytest.raises(SecurityError):
+        stream_jinja_to_file(path, {}, str(tmp_path / "out.txt"))
+
+
+def test_sandbox_blocks_context_mutation(tmp_path):
+    path = _template(tmp_path, "{{ items.append(1) }}")
+    with pytest.raises(SecurityError):
+        render_jinja(path, {"items": []})
@@ -0,0 +1,266 @@
+# utils/batch_generator.py
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, List
+
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from .config import TEMPLATE_DIR, OUTPUT_DIR
+from .doc_generator import _store_artifact, _write_bytes, extract_placeholders, render_docx_bytes
+from .upload_temp import MAX_FILE_SIZE
+from .zipstream import iter_zip
+
+router = APIRouter(prefix="/generate", tags=["Batch generation"])
+
+# ---------------------------
+# Configuration / constants
+# ---------------------------
+BATCH_WORKERS = os.cpu_count() or 1
+MAX_BATCH_ITEMS = 2000
+BATCH_JOB_TTL = 3600      # seconds a finished job stays pollable
+MAX_BATCH_JOBS = 200      # finished jobs kept at most
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# job_id -> {"status", "template", "total", "done", "items": [...]}
+batch_jobs = {}
+_finished_jobs = OrderedDict()   # job_id -> time.monotonic() at finish, oldest first
+_jobs_lock = threading.Lock()
+
+
+class BatchGenerateRequest(BaseModel):
+    template: str = Field(..., example="hld_template.docx")
+    items: List[Dict[str, str]] = Field(
+        ...,
+        example=[
+            {"project_name": "Site-A", "author_name": "Pramod", "date": "2025-09-23"},
+            {"project_name": "Site-B", "author_name": "Pramod", "date": "2025-09-23"},
+        ]
+    )
+
+
+# ---------------------------
+# Helper utilities
+# ---------------------------
+def get_pool() -> ProcessPoolExecutor:
+    """Shared worker pool, created on first use. Each worker keeps its own template cache."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=BATCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _resolve_template(template: str) -> str:
+    if not template.lower().endswith(".docx"):
+        raise HTTPException(status_code=400, detail="Batch generation supports .docx templates only")
+    template_path = os.path.join(TEMPLATE_DIR, template)
+    if not os.path.exists(template_path):
+        raise HTTPException(status_code=404, detail=f"Template '{template}' not found")
+    return template_path
+
+
+def _check_items(items: List[Dict[str, str]]):
+    if not items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+
+
+def iter_rendered(template_path: str, items: List[Dict[str, str]]):
+    """
+    Render every item across the worker pool and yield
+    (index, data or None, error or None) in input order.
+    Only a small window of renders is in flight at a time, so memory
+    stays bounded however large the batch is.
+    """
+    expected = extract_placeholders(template_path)
+    pool = get_pool()
+    window = deque()
+    max_in_flight = BATCH_WORKERS * 2
+
+    def collect(entry):
+        idx, future, error = entry
+        if error:
+            return idx, None, error
+        try:
+            return idx, future.result(), None
+        except BrokenProcessPool as e:
+            # A worker died; drop the pool so the next batch starts a fresh one
+            shutdown_pool()
+            return idx, None, str(e)
+        except Exception as e:
+            logging.exception(f"Batch item {idx} failed for template '{template_path}'")
+            return idx, None, str(e)
+
+    for idx, fields in enumerate(items):
+        missing = [f for f in expected if f not in fields]
+        if missing:
+            window.append((idx, None, f"Missing fields: {missing}"))
+        else:
+            try:
+                window.append((idx, pool.submit(render_docx_bytes, template_path, fields), None))
+            except BrokenProcessPool as e:
+                window.append((idx, None, str(e)))
+
+        if len(window) >= max_in_flight:
+            yield collect(window.popleft())
+
+    while window:
+        yield collect(window.popleft())
+
+
+def _item_filename(template_path: str, stamp: str, batch_id: str, idx: int) -> str:
+    # The batch id keeps two batches started in the same second apart
+    template_name = os.path.splitext(os.path.basename(template_path))[0]
+    return f"{template_name}_{stamp}_{batch_id[:8]}_{idx + 1:04d}.docx"
+
+
+def _prune_jobs():
+    """Forget finished jobs past BATCH_JOB_TTL, then the oldest beyond MAX_BATCH_JOBS. Call with _jobs_lock held."""
+    cutoff = time.monotonic() - BATCH_JOB_TTL
+    while _finished_jobs:
+        job_id, finished = next(iter(_finished_jobs.items()))
+        if finished > cutoff and len(_finished_jobs) <= MAX_BATCH_JOBS:
+            break
+        del _finished_jobs[job_id]
+        batch_jobs.pop(job_id, None)
+
+
+def _zip_entries(template_path: str, items: List[Dict[str, str]], stamp: str, batch_id: str):
+    results = []
+    for idx, data, error in iter_rendered(template_path, items):
+        if error:
+            results.append({"index": idx, "status": "error", "error": error})
+            continue
+        filename = _item_filename(template_path, stamp, batch_id, idx)
+        results.append({"index": idx, "status": "ok", "filename": filename})
+        yield filename, data
+    yield "results.json", json.dumps(results, indent=2).encode("utf-8")
+
+
+def _run_batch_job(job_id: str, template_path: str, items: List[Dict[str, str]], stamp: str):
+    job = batch_jobs[job_id]
+    job["status"] = "running"
+    try:
+        for idx, data, error in iter_rendered(template_path, items):
+            if error:
+                item = {"index": idx, "status": "error", "error": error}
+            else:
+                filename = _item_filename(template_path, stamp, job_id, idx)
+                # Temp file + rename: a download never sees a half-written document
+                _store_artifact(os.path.join(OUTPUT_DIR, filename), lambda path: _write_bytes(path, data))
+                item = {"index": idx, "status": "ok", "filename": filename,
+                        "download_url": f"/download_doc/{filename}"}
+            with _jobs_lock:
+                job["items"].append(item)
+                job["done"] += 1
+        job["status"] = "finished"
+    except Exception as e:
+        logging.exception(f"Batch job {job_id} failed")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        with _jobs_lock:
+            _finished_jobs[job_id] = time.monotonic()
+
+
+def _start(template: str, items: List[Dict[str, str]], as_job: bool, background_tasks: BackgroundTasks):
+    template_path = _resolve_template(template)
+    _check_items(items)
+    stamp = datetime.now().strftime("%Y%m%d_%I-%M-%S%p")
+    job_id = uuid.uuid4().hex
+
+    if as_job:
+        with _jobs_lock:
+            _prune_jobs()
+            batch_jobs[job_id] = {"status": "queued", "template": template,
+                                  "total": len(items), "done": 0, "items": []}
+        background_tasks.add_task(_run_batch_job, job_id, template_path, items, stamp)
+        return {"job_id": job_id, "status_url": f"/generate/batch/{job_id}"}
+
+    template_name = os.path.splitext(template)[0]
+    return StreamingResponse(
+        iter_zip(_zip_entries(template_path, items, stamp, job_id)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{template_name}_{stamp}.zip"'},
+    )
+
+
+# ---------------------------
+# Endpoints (attached to router!)
+# ---------------------------
+@router.post("/batch", summary="Generate many HLD documents from one template")
+def generate_batch(payload: BatchGenerateRequest, background_tasks: BackgroundTasks,
+                   as_job: bool = Query(False, description="Return a job ID instead of streaming a ZIP")):
+    """
+    Render one document per item in parallel.
+    Streams back a ZIP (with a results.json manifest) or, with as_job=true,
+    writes the files to the output folder and returns a job ID to poll.
+    """
+    return _start(payload.template, payload.items, as_job, background_tasks)
+
+
+@router.post("/batch/csv", summary="Generate many HLD documents from a CSV of field values")
+async def generate_batch_csv(background_tasks: BackgroundTasks,
+                             template: str = Form(...),
+                             file: UploadFile = File(...),
+                             as_job: bool = Form(False)):
+    """One document per CSV row; the header row holds the placeholder names."""
+    # Same cap as template uploads, checked while reading
+    chunks = []
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(1024 * 1024)  # 1 MB
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail="File too large")
+            chunks.append(chunk)
+    finally:
+        await file.close()
+    raw = b"".join(chunks)
+
+    try:
+        reader = csv.DictReader(io.StringIO(raw.decode("utf-8-sig")))
+        items = [{k: (v or "") for k, v in row.items() if k} for row in reader]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+
+    return _start(template, items, as_job, background_tasks)
+
+
+@router.get("/batch/{job_id}", summary="Batch job status and per-item results")
+def batch_status(job_id: str):
+    job = batch_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    with _jobs_lock:
+        return {"job_id": job_id, **job, "items": list(job["items"])}
@@ -1,95 +1,453 @@
 import re
 import os
 import uuid
-from docx import Document
-from docx.table import _Cell
+import copy
+import json
+import hashlib
+import zipfile
+import threading
+from html import escape
+from io import BytesIO
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.opc.oxml import serialize_part_xml
 from typing import List, Dict
-from datetime import datetime
+from .text_templates import is_jinja_template, stream_jinja_to_file, template_digest
 
 PLACEHOLDER_PATTERN = r"\{\{\{(.*?)\}\}\}"
+# Plain-text templates use double braces: {{label}}
+TXT_PLACEHOLDER_PATTERN = r"\{\{([^{}]*)\}\}"
 
-def extract_placeholders(template_path: str) -> List[str]:
+_PLACEHOLDER_RE = re.compile(PLACEHOLDER_PATTERN)
+_TXT_PLACEHOLDER_RE = re.compile(TXT_PLACEHOLDER_PATTERN)
+
+# Parts of the .docx package that can hold placeholders
+_STORY_PART_PATTERN = re.compile(r"^word/(document|header\d*|footer\d*)\.xml$")
+
+# Upper bound for the compiled template cache (approximate, in bytes)
+TEMPLATE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+# ---------------------------
+# Compiled template cache
+# ---------------------------
+class CompiledTemplate:
     """
-    Extract all triple-brace placeholders like {{{label}}} from a .docx file.
-    Includes paragraphs, table cells, headers, and footers.
+    A .docx template parsed once and kept in memory.
+
+    Holds the raw zip entries, the parsed XML of the story parts
+    (body, headers, footers) and, per part, the indexes of the
+    paragraphs that contain placeholders, so rendering only has to
+    touch those nodes.
+    """
+
+    def __init__(self, path: str, mtime_ns: int, size: int):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.entries = OrderedDict()   # zip entry name -> raw bytes
+        self.parts = {}                # story part name -> parsed XML root (read-only)
+        self.locations = {}            # story part name -> [paragraph index, ...]
+        self.placeholders = []
+        self.nbytes = 0
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        self.digest = hashlib.sha256(raw).hexdigest()
+
+        with zipfile.ZipFile(BytesIO(raw)) as zf:
+            for name in zf.namelist():
+                self.entries[name] = zf.read(name)
+
+        found = {}
+        for name, data in self.entries.items():
+            if not _STORY_PART_PATTERN.match(name):
+                continue
+            root = parse_xml(data)
+            indexes = []
+            for idx, p in enumerate(root.iter(qn("w:p"))):
+                matches = _PLACEHOLDER_RE.findall(_paragraph_text(p))
+                if matches:
+                    indexes.append(idx)
+                    for m in matches:
+                        found.setdefault(m, None)
+            self.parts[name] = root
+            if indexes:
+                self.locations[name] = indexes
+
+        self.placeholders = list(found)
+        # Raw entries plus a rough allowance for the parsed trees
+        self.nbytes = sum(len(b) for b in self.entries.values()) + sum(
+            4 * len(self.entries[name]) for name in self.parts
+        )
+
+    def render_parts(self, context: Dict[str, str]) -> dict:
+        """
+        Story part name -> filled XML root. Only parts with placeholders are
+        copied; the others are the cached trees and must not be modified.
+        """
+        rendered = {}
+        for name, root in self.parts.items():
+            indexes = self.locations.get(name)
+            if indexes:
+                root = copy.deepcopy(root)
+                paragraphs = list(root.iter(qn("w:p")))
+                for idx in indexes:
+                    _replace_placeholders_in_paragraph(paragraphs[idx], context)
+            rendered[name] = root
+        return rendered
+
+    def render(self, context: Dict[str, str]) -> bytes:
+        """Return the filled .docx as bytes, leaving the cached trees untouched."""
+        rendered = {
+            name: serialize_part_xml(root)
+            for name, root in self.render_parts(context).items()
+            if name in self.locations
+        }
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in self.entries.items():
+                zf.writestr(name, rendered.get(name, data))
+        return buffer.getvalue()
+
+
+_template_cache = OrderedDict()   # abs path -> CompiledTemplate
+_template_cache_bytes = 0
+_template_cache_lock = threading.Lock()
+
+
+def get_compiled_template(template_path: str) -> CompiledTemplate:
     """
+    Return the compiled form of a .docx template, parsing it only when
+    it is not cached yet or the file changed (mtime/size) since.
+    """
+    global _template_cache_bytes
+
     if not os.path.exists(template_path):
         raise FileNotFoundError(f"Template not found: {template_path}")
 
-    doc = Document(template_path)
-    found = set()
+    key = os.path.abspath(template_path)
+    stat = os.stat(key)
+
+    with _template_cache_lock:
+        compiled = _template_cache.get(key)
+        if compiled and compiled.mtime_ns == stat.st_mtime_ns and compiled.size == stat.st_size:
+            _template_cache.move_to_end(key)
+            return compiled
 
-    # Check paragraphs
-    for para in doc.paragraphs:
-        matches = re.findall(PLACEHOLDER_PATTERN, para.text)
-        found.update(matches)
+    compiled = CompiledTemplate(key, stat.st_mtime_ns, stat.st_size)
 
-    # Check tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                matches = re.findall(PLACEHOLDER_PATTERN, cell.text)
-                found.update(matches)
+    with _template_cache_lock:
+        old = _template_cache.pop(key, None)
+        if old:
+            _template_cache_bytes -= old.nbytes
+        if compiled.nbytes <= TEMPLATE_CACHE_MAX_BYTES:
+            _template_cache[key] = compiled
+            _template_cache_bytes += compiled.nbytes
+            while _template_cache_bytes > TEMPLATE_CACHE_MAX_BYTES:
+                _, evicted = _template_cache.popitem(last=False)
+                _template_cache_bytes -= evicted.nbytes
 
-    # Check headers and footers
-    for section in doc.sections:
-        header = section.header
-        footer = section.footer
-        for para in header.paragraphs + footer.paragraphs:
-            matches = re.findall(PLACEHOLDER_PATTERN, para.text)
-            found.update(matches)
+    return compiled
 
-    return list(found)
 
+def clear_template_cache():
+    """Drop every compiled template (e.g. after templates are replaced in bulk)."""
+    global _template_cache_bytes
+    with _template_cache_lock:
+        _template_cache.clear()
+        _template_cache_bytes = 0
+
+
+def extract_placeholders(template_path: str) -> List[str]:
+    """
+    Extract all triple-brace placeholders like {{{label}}} from a .docx file.
+    Includes paragraphs, table cells, headers, and footers.
+    """
+    return list(get_compiled_template(template_path).placeholders)
+
+
+# ---------------------------
+# Placeholder substitution
+# ---------------------------
+def _text_nodes(p) -> list:
+    """The <w:t> elements of a paragraph, in reading order (runs and hyperlinks)."""
+    return p.xpath("./w:r/w:t | ./w:hyperlink/w:r/w:t")
+
+
+def _paragraph_text(p) -> str:
+    return "".join(t.text or "" for t in _text_nodes(p))
 
-def _replace_placeholders_in_paragraph(para, context: Dict[str, str]):
-    for key, value in context.items():
-        placeholder = f"{{{{{{{key}}}}}}}"
-        if placeholder in para.text:
-            para.text = para.text.replace(placeholder, value)
 
 def _replace_placeholders_in_paragraph(para, context: dict):
-    for key, value in context.items():
-        placeholder = f"{{{{{{{key}}}}}}}"
-        if placeholder in para.text:
-            para.text = para.text.replace(placeholder, value)
+    """
+    Fill every {{{key}}} of a paragraph in a single regex pass.
 
+    Works on the <w:t> nodes directly so run formatting is kept: the value
+    lands in the run where the placeholder starts and the rest of the
+    placeholder is cut out of the following runs. Unknown keys are left as-is.
+    Accepts a python-docx Paragraph or a raw <w:p> element.
+    """
+    p = getattr(para, "_p", para)
+    nodes = _text_nodes(p)
+    if not nodes:
+        return
 
+    texts = [t.text or "" for t in nodes]
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
 
-def generate_hld_doc(template_path: str, context: dict, output_dir: str = "output") -> str:
+    matches = [m for m in _PLACEHOLDER_RE.finditer("".join(texts)) if m.group(1) in context]
+    if not matches:
+        return
+
+    changed = set()
+    # Right to left, so earlier offsets stay valid
+    for m in reversed(matches):
+        value = str(context[m.group(1)])
+        s, e = m.span()
+        i = bisect_right(starts, s) - 1
+        j = bisect_right(starts, e - 1) - 1
+        if i == j:
+            texts[i] = texts[i][:s - starts[i]] + value + texts[i][e - starts[i]:]
+        else:
+            texts[i] = texts[i][:s - starts[i]] + value
+            for k in range(i + 1, j):
+                texts[k] = ""
+            texts[j] = texts[j][e - starts[j]:]
+        changed.update(range(i, j + 1))
+
+    for k in changed:
+        nodes[k].text = texts[k]
+        if texts[k] != texts[k].strip():
+            nodes[k].set(qn("xml:space"), "preserve")
+
+
+def extract_text_placeholders(template_path: str) -> List[str]:
+    """Placeholder names of a {{key}} text template, in order of first use."""
+    with open(template_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    return list(dict.fromkeys(re.findall(r"\{\{(\w+)\}\}", content)))
+
+
+def render_text_template(content: str, context: Dict[str, str]) -> str:
+    """Fill every {{key}} of a plain-text template in a single regex pass."""
+    return _TXT_PLACEHOLDER_RE.sub(
+        lambda m: str(context[m.group(1)]) if m.group(1) in context else m.group(0),
+        content,
+    )
+
+
+
+# ---------------------------
+# Content-addressed output store
+# ---------------------------
+_inflight = {}   # output path -> Future of the render in progress
+_inflight_lock = threading.Lock()
+
+
+def content_key(template_digest: str, context: dict) -> str:
+    """Hash of the template content plus the field values (order-independent)."""
+    payload = json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{template_digest}\n{payload}".encode("utf-8")).hexdigest()
+
+
+def _write_bytes(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _store_artifact(output_path: str, write_to) -> None:
     """
-    Replace placeholders in .docx template with values from context.
-    Filename format: <template_name>_YYYYMMDD_HHMMSS.docx
-    Returns the generated filename.
+    Create output_path with write_to(path) unless it already exists.
+    Concurrent calls for the same path share a single render (single-flight);
+    the file is written to a temp name and renamed so readers never see it half-written.
     """
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Template not found: {template_path}")
+    if os.path.exists(output_path):
+        return
 
-    doc = Document(template_path)
+    with _inflight_lock:
+        future = _inflight.get(output_path)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[output_path] = future
 
-    # Replace in paragraphs
-    for para in doc.paragraphs:
-        _replace_placeholders_in_paragraph(para, context)
+    if not leader:
+        future.result()
+        return
 
-    # Replace in tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                _replace_placeholders_in_paragraph(cell, context)
+    try:
+        if not os.path.exists(output_path):
+            tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                write_to(tmp_path)
+                os.replace(tmp_path, output_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        future.set_result(None)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(output_path, None)
 
-    # Replace in headers and footers
-    for section in doc.sections:
-        for para in section.header.paragraphs + section.footer.paragraphs:
-            _replace_placeholders_in_paragraph(para, context)
+
+def generate_hld_doc(template_path: str, context: dict, output_dir: str = "output") -> str:
+    """
+    Replace placeholders in .docx template with values from context.
+    Filename format: <template_name>_<content hash>.docx
+    The same template and field values always map to the same file, which is
+    only rendered the first time. Returns the generated filename.
+    """
+    compiled = get_compiled_template(template_path)
 
     os.makedirs(output_dir, exist_ok=True)
 
     # Generate filename
     template_name = os.path.splitext(os.path.basename(template_path))[0]
-    timestamp = datetime.now().strftime("%Y%m%d_%I-%M-%S%p")
-    filename = f"{template_name}_{timestamp}.docx"
+    filename = f"{template_name}_{content_key(compiled.digest, context)[:20]}.docx"
+
+    output_path = os.path.join(output_dir, filename)
+    _store_artifact(output_path, lambda path: _write_bytes(path, compiled.render(context)))
+    return filename
+
+
+def generate_text_doc(template_path: str, context: dict, output_dir: str = "output") -> str:
+    """
+    Fill a text template and store it like generate_hld_doc.
+    .txt uses {{key}} substitution; Jinja formats (.j2, .yaml, .cfg, ...) are
+    streamed to disk through the compiled Jinja template.
+    Filename format: <template_name>_<content hash><template extension>
+    """
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template not found: {template_path}")
 
+    os.makedirs(output_dir, exist_ok=True)
+
+    template_name, ext = os.path.splitext(os.path.basename(template_path))
+    filename = f"{template_name}_{content_key(template_digest(template_path), context)[:20]}{ext}"
     output_path = os.path.join(output_dir, filename)
-    doc.save(output_path)
+
+    if is_jinja_template(template_path):
+        _store_artifact(output_path, lambda path: stream_jinja_to_file(template_path, context, path))
+    else:
+        def write_txt(path):
+            with open(template_path, "r", encoding="utf-8") as f:
+                content = render_text_template(f.read(), context)
+            _write_bytes(path, content.encode("utf-8"))
+        _store_artifact(output_path, write_txt)
     return filename
 
+
+def render_docx_bytes(template_path: str, context: dict) -> bytes:
+    """
+    Render a .docx template to bytes without touching the output folder.
+    Top-level so it can run in worker processes (each keeps its own cache).
+    """
+    return get_compiled_template(template_path).render(context)
+
+
+# ---------------------------
+# Preview rendering
+# ---------------------------
+def _iter_blocks(parent):
+    """Paragraphs and tables of a body/header/footer in document order (content controls unwrapped)."""
+    for child in parent.iterchildren():
+        if child.tag in (qn("w:p"), qn("w:tbl")):
+            yield child
+        elif child.tag == qn("w:sdt"):
+            content = child.find(qn("w:sdtContent"))
+            if content is not None:
+                yield from _iter_blocks(content)
+
+
+def _starts_new_page(p) -> bool:
+    return bool(p.xpath("./w:pPr/w:pageBreakBefore | ./w:r/w:br[@w:type='page']"))
+
+
+def _story_lines(root):
+    """Plain-text lines of a header/footer part."""
+    return [text for text in (_paragraph_text(p) for p in root.iter(qn("w:p"))) if text.strip()]
+
+
+def render_preview(template_path: str, context: dict, max_paragraphs: int = None,
+                   max_pages: int = None, html: bool = False) -> dict:
+    """
+    Fill the template through the compiled cache and return its content for preview,
+    without writing anything to disk.
+    Headers come first, then the body in document order (tables one row per line,
+    cells separated by ' | '), then footers. max_paragraphs counts body paragraphs
+    and table rows; max_pages counts explicit page breaks.
+    Returns {"text", "truncated"} plus "html" when html=True.
+    """
+    compiled = get_compiled_template(template_path)
+    parts = compiled.render_parts(context)
+
+    header_lines, footer_lines = [], []
+    for name in sorted(parts):
+        if name.startswith("word/header"):
+            header_lines.extend(line for line in _story_lines(parts[name]) if line not in header_lines)
+        elif name.startswith("word/footer"):
+            footer_lines.extend(line for line in _story_lines(parts[name]) if line not in footer_lines)
+
+    lines = list(header_lines)
+    html_parts = [f'<div class="docx-header">{escape(line)}</div>' for line in header_lines] if html else []
+
+    truncated = False
+    count = 0
+    page = 1
+    body = parts["word/document.xml"].find(qn("w:body"))
+    for block in _iter_blocks(body):
+        if max_paragraphs is not None and count >= max_paragraphs:
+            truncated = True
+            break
+
+        if block.tag == qn("w:p"):
+            if _starts_new_page(block) and count:
+                page += 1
+                if max_pages is not None and page > max_pages:
+                    truncated = True
+                    break
+            text = _paragraph_text(block)
+            lines.append(text)
+            if html:
+                html_parts.append(f"<p>{escape(text)}</p>")
+            count += 1
+            continue
+
+        # Table: one line per row
+        if html:
+            html_parts.append("<table>")
+        for tr in block.iterchildren(qn("w:tr")):
+            if max_paragraphs is not None and count >= max_paragraphs:
+                truncated = True
+                break
+            cells = ["\n".join(_paragraph_text(p) for p in tc.iter(qn("w:p")))
+                     for tc in tr.iterchildren(qn("w:tc"))]
+            lines.append(" | ".join(cells))
+            if html:
+                html_parts.append("<tr>" + "".join(f"<td>{escape(c)}</td>" for c in cells) + "</tr>")
+            count += 1
+        if html:
+            html_parts.append("</table>")
+        if truncated:
+            break
+
+    lines.extend(footer_lines)
+    if html:
+        html_parts.extend(f'<div class="docx-footer">{escape(line)}</div>' for line in footer_lines)
+
+    preview = {"text": "\n".join(lines), "truncated": truncated}
+    if html:
+        preview["html"] = "".join(html_parts)
+    return preview
@@ -0,0 +1,354 @@
+# utils/extract.py
+"""
+HTML extraction backends for the Flipkart scraper.
+
+Selectors come from declarative profiles (flipkart_selectors.json, or the
+file named by SCRAP_SELECTORS_FILE). Each field lists CSS selectors; they
+are tried in priority order (higher-priority profile first, then file order)
+and the first one that matches wins. The file is compiled once and reloaded
+when it changes, so rotated class names can be fixed without a restart.
+
+- "lxml" (default): lxml.html tree + the selectors compiled to XPath.
+  Listing pages whose link selectors are all plain tag.class selectors
+  skip the tree: the parser streams start tags to a collector instead.
+- "bs4": BeautifulSoup + the same selectors precompiled with soupsieve,
+  kept as the reference implementation.
+
+Both return the same product dict / link list. Pick one per call or with
+the SCRAP_EXTRACT_BACKEND environment variable. Pass a SelectorStats to
+count which selector hit for every field.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import urljoin
+
+import lxml.html
+import soupsieve
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+EXTRACT_BACKEND = os.getenv("SCRAP_EXTRACT_BACKEND", "lxml")
+SELECTORS_FILE = os.getenv("SCRAP_SELECTORS_FILE",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "flipkart_selectors.json"))
+RELOAD_CHECK_INTERVAL = 2.0   # seconds between mtime checks of the selectors file
+
+PRODUCT_FIELDS = ("title", "price", "old_price", "discount", "rating", "image", "feature_rows")
+LINK_FIELD = "links"
+
+# Value when no selector of a field matches (as the scraper always returned)
+DEFAULTS = {"title": "N/A", "price": "NA", "old_price": "NA", "discount": "", "rating": "N/A", "image": ""}
+
+
+# tag.class[.class...], the only selector shape the streaming link parser handles
+_SIMPLE_SELECTOR_RE = re.compile(r"^([A-Za-z][\w-]*)((?:\.[\w-]+)+)$")
+
+
+def _simple_selector(css):
+    """[(tag, classes), ...] for a group of tag.class selectors, else None."""
+    parts = []
+    for part in css.split(","):
+        match = _SIMPLE_SELECTOR_RE.match(part.strip())
+        if not match:
+            return None
+        parts.append((match.group(1).lower(), frozenset(match.group(2)[1:].split("."))))
+    return parts
+
+
+# ---------------------------
+# Selector profiles
+# ---------------------------
+class SelectorSet:
+    """One field's selectors in priority order, precompiled for both backends."""
+
+    def __init__(self, field, selectors):
+        self.field = field
+        self.css = list(selectors)
+        self.soup = [soupsieve.compile(css) for css in self.css]
+        self.xpath = [etree.XPath(CSSSelector(css, translator="html").path) for css in self.css]
+        self.simple = [_simple_selector(css) for css in self.css]
+        self.streamable = all(parts is not None for parts in self.simple)
+
+
+def compile_profiles(data):
+    """{field: SelectorSet} from the parsed selectors file; raises ValueError if it is unusable."""
+    profiles = sorted(data.get("profiles", []), key=lambda p: -p.get("priority", 0))
+    merged = {}
+    for profile in profiles:
+        for field, selectors in profile.get("fields", {}).items():
+            if isinstance(selectors, str):
+                selectors = [selectors]
+            bucket = merged.setdefault(field, [])
+            bucket.extend(css for css in selectors if css not in bucket)
+
+    missing = [f for f in PRODUCT_FIELDS + (LINK_FIELD,) if not merged.get(f)]
+    if missing:
+        raise ValueError(f"No selectors for: {', '.join(missing)}")
+    try:
+        return {field: SelectorSet(field, selectors) for field, selectors in merged.items()}
+    except Exception as e:
+        raise ValueError(f"Invalid selector: {e}")
+
+
+class SelectorProfiles:
+    """
+    Compiled selectors from a JSON file, reloaded when its mtime changes
+    (checked at most every RELOAD_CHECK_INTERVAL seconds). A broken edit is
+    logged and the last good version stays in use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fields = None
+        self._mtime_ns = None
+        self._checked = 0.0
+
+    def _reload(self, mtime_ns):
+        with open(self.path, encoding="utf-8") as f:
+            fields = compile_profiles(json.load(f))
+        self._fields = fields
+        self._mtime_ns = mtime_ns
+        logging.info(f"Loaded selector profiles from {self.path}")
+
+    def get(self):
+        now = time.monotonic()
+        if self._fields is not None and now - self._checked < RELOAD_CHECK_INTERVAL:
+            return self._fields
+        with self._lock:
+            self._checked = now
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+                if mtime_ns != self._mtime_ns:
+                    self._reload(mtime_ns)
+            except (OSError, ValueError) as e:
+                if self._fields is None:
+                    raise
+                logging.error(f"Keeping previous selector profiles, reload of {self.path} failed: {e}")
+            return self._fields
+
+
+profiles = SelectorProfiles(SELECTORS_FILE)
+
+
+class SelectorStats:
+    """
+    Per-field hit counters (and which selector hit) for one crawl; thread-safe.
+    Besides the totals, the last `window` outcomes per field are kept, so a
+    collapse late in a long crawl shows up straight away.
+    """
+
+    def __init__(self, window=50):
+        self._lock = threading.Lock()
+        self.window = window
+        self.attempts = {}
+        self.hits = {}
+        self.by_selector = {}
+        self.recent = {}
+
+    def record(self, field, css):
+        with self._lock:
+            self.attempts[field] = self.attempts.get(field, 0) + 1
+            self.recent.setdefault(field, deque(maxlen=self.window)).append(css is not None)
+            if css is not None:
+                self.hits[field] = self.hits.get(field, 0) + 1
+                key = (field, css)
+                self.by_selector[key] = self.by_selector.get(key, 0) + 1
+
+    def recent_hit_rate(self, field):
+        """(hit rate over the last `window` attempts or None, how many attempts that covers)."""
+        with self._lock:
+            recent = self.recent.get(field)
+            if not recent:
+                return None, 0
+            return sum(recent) / len(recent), len(recent)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                field: {
+                    "attempts": attempts,
+                    "hits": self.hits.get(field, 0),
+                    "hit_rate": round(self.hits.get(field, 0) / attempts, 3),
+                    "selectors": {css: n for (f, css), n in self.by_selector.items() if f == field},
+                }
+                for field, attempts in self.attempts.items()
+            }
+
+
+def _record(stats, field, css):
+    if stats is not None:
+        stats.record(field, css)
+
+
+def _product_dict(values, features, link):
+    return {
+        "Title": values["title"],
+        "PriceText": values["price"],
+        "OldPriceText": values["old_price"],
+        "Price": values["price"],         # for compatibility
+        "Old Price": values["old_price"], # compatibility
+        "Discount": values["discount"],
+        "Rating": values["rating"],
+        "Image": values["image"],
+        "Features": " | ".join(features) if features else "NA",
+        "Link": link
+    }
+
+
+# ---------------------------
+# BeautifulSoup (reference)
+# ---------------------------
+class SoupBackend:
+    name = "bs4"
+
+    @staticmethod
+    def _all(root, selectors):
+        """(elements of the highest-priority selector that matches anything, its css)."""
+        for css, compiled in zip(selectors.css, selectors.soup):
+            found = compiled.select(root)
+            if found:
+                return found, css
+        return [], None
+
+    def product(self, html, link, stats=None):
+        fields = profiles.get()
+        soup = BeautifulSoup(html, "lxml")
+
+        values = {}
+        for field in ("title", "price", "old_price", "discount", "rating"):
+            found, css = self._all(soup, fields[field])
+            _record(stats, field, css)
+            values[field] = found[0].get_text(strip=True) if found else DEFAULTS[field]
+
+        found, css = self._all(soup, fields["image"])
+        _record(stats, "image", css)
+        values["image"] = found[0]["src"] if found and found[0].has_attr("src") else ""
+
+        rows, css = self._all(soup, fields["feature_rows"])
+        _record(stats, "feature_rows", css)
+        features = []
+        for row in rows:
+            tds = row.find_all("td")
+            if len(tds) == 2:
+                features.append(f"{tds[0].get_text(strip=True)}: {tds[1].get_text(strip=True)}")
+
+        return _product_dict(values, features, link)
+
+    def links(self, html, base_url, stats=None):
+        soup = BeautifulSoup(html, "lxml")
+        found, css = self._all(soup, profiles.get()[LINK_FIELD])
+        _record(stats, LINK_FIELD, css)
+        return [urljoin(base_url, tag["href"]) for tag in found if tag.get("href")]
+
+
+# ---------------------------
+# lxml + compiled XPath (fast path)
+# ---------------------------
+class _LinkCollector:
+    """lxml parser target: the hrefs of start tags matching each tag.class selector."""
+
+    def __init__(self, selectors):
+        self.simple = selectors.simple
+        self.tags = {tag for parts in selectors.simple for tag, _ in parts}
+        self.matches = [[] for _ in selectors.css]
+
+    def start(self, tag, attrib):
+        if tag not in self.tags or "class" not in attrib:
+            return
+        classes = set(attrib["class"].split())
+        for found, parts in zip(self.matches, self.simple):
+            if any(tag == name and wanted <= classes for name, wanted in parts):
+                found.append(attrib.get("href"))
+
+    def close(self):
+        return self.matches
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    @staticmethod
+    def _text(el):
+        # Same as BeautifulSoup's get_text(strip=True): stripped text nodes, joined
+        return "".join(s.strip() for s in el.itertext(tag=etree.Element))
+
+    @staticmethod
+    def _all(root, selectors):
+        """(elements of the highest-priority selector that matches anything, its css)."""
+        for css, xpath in zip(selectors.css, selectors.xpath):
+            found = xpath(root)
+            if found:
+                return found, css
+        return [], None
+
+    def product(self, html, link, stats=None):
+        fields = profiles.get()
+        root = lxml.html.fromstring(html)
+
+        values = {}
+        for field in ("title", "price", "old_price", "discount", "rating"):
+            found, css = self._all(root, fields[field])
+            _record(stats, field, css)
+            values[field] = self._text(found[0]) if found else DEFAULTS[field]
+
+        found, css = self._all(root, fields["image"])
+        _record(stats, "image", css)
+        values["image"] = found[0].get("src", "") if found else ""
+
+        rows, css = self._all(root, fields["feature_rows"])
+        _record(stats, "feature_rows", css)
+        features = []
+        for row in rows:
+            tds = row.findall(".//td")
+            if len(tds) == 2:
+                features.append(f"{self._text(tds[0])}: {self._text(tds[1])}")
+
+        return _product_dict(values, features, link)
+
+    @staticmethod
+    def _stream_hrefs(html, selectors):
+        """_all() over hrefs for tag.class selectors, without building a tree (memory stays flat)."""
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        matches = etree.fromstring(html, etree.HTMLParser(target=_LinkCollector(selectors)))
+        for css, found in zip(selectors.css, matches):
+            if found:
+                return found, css
+        return [], None
+
+    def links(self, html, base_url, stats=None):
+        selectors = profiles.get()[LINK_FIELD]
+        if selectors.streamable:
+            hrefs, css = self._stream_hrefs(html, selectors)
+        else:
+            found, css = self._all(lxml.html.fromstring(html), selectors)
+            hrefs = [el.get("href") for el in found]
+        _record(stats, LINK_FIELD, css)
+        return [urljoin(base_url, href) for href in hrefs if href]
+
+
+BACKENDS = {backend.name: backend for backend in (LxmlBackend(), SoupBackend())}
+
+
+def get_backend(name=None):
+    name = name or EXTRACT_BACKEND
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown extraction backend {name!r}; choose from {', '.join(BACKENDS)}")
+
+
+def extract_product(html, link, backend=None, stats=None):
+    """Product dict from a product page (bytes or str)."""
+    return get_backend(backend).product(html, link, stats)
+
+
+def extract_links(html, base_url, backend=None, stats=None):
+    """Absolute product links of a listing page, in document order (duplicates kept)."""
+    return get_backend(backend).links(html, base_url, stats)
@@ -0,0 +1,186 @@
+# utils/http_cache.py
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from .http_fetch import get_with_retry
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024   # compressed bodies kept on disk
+EVICT_TO = 0.9                          # evict down to this fraction of max_bytes
+
+# Markup that changes on every request without the page content changing
+_VOLATILE_RE = re.compile(
+    rb"<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->|\snonce=\"[^\"]*\"",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# content: the page bytes (from the cache on a 304)
+# unchanged: same fingerprint as the last fetch, so parsing can be skipped
+# not_modified: the server answered 304
+# pending: (etag, last_modified, fingerprint) not stored yet, see cached_get(defer=True)
+CachedResponse = namedtuple("CachedResponse", "url content unchanged not_modified pending", defaults=(None,))
+
+
+def fingerprint(content: bytes, region=None) -> str:
+    """
+    SHA-256 of the part of a page that matters: region(content) if given
+    (a cheap bytes -> bytes cut, no HTML parsing), else the page without
+    scripts, styles, comments and nonces.
+    """
+    data = region(content) if region else _VOLATILE_RE.sub(b"", content)
+    return hashlib.sha256(data).hexdigest()
+
+
+class HttpCache:
+    """
+    On-disk store of the last response per URL: validators (ETag,
+    Last-Modified), the content fingerprint and the zlib-compressed body.
+    Least recently used entries are evicted once bodies exceed max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._written = 0   # bytes stored since the last eviction check
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fingerprint TEXT,
+                    body BLOB,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_accessed ON http_cache(accessed_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, url: str):
+        """(etag, last_modified, fingerprint) for url, or None."""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT etag, last_modified, fingerprint FROM http_cache WHERE url = ?",
+                                (url,)).fetchone()
+        finally:
+            conn.close()
+
+    def body(self, url: str):
+        """Cached body of url (marking it recently used), or None."""
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT body FROM http_cache WHERE url = ?", (url,)).fetchone()
+                if row:
+                    conn.execute("UPDATE http_cache SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        finally:
+            conn.close()
+        return zlib.decompress(row[0]) if row and row[0] is not None else None
+
+    def put(self, url: str, etag, last_modified, fp: str, content: bytes):
+        body = zlib.compress(content, 6)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, fingerprint, body, size, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, fp, body, len(body), time.time()),
+                )
+        finally:
+            conn.close()
+        with self._lock:
+            self._written += len(body)
+            due = self._written > self.max_bytes * (1 - EVICT_TO)
+            if due:
+                self._written = 0
+        if due:
+            self.evict()
+
+    def remember(self, response: CachedResponse):
+        """Store the validators and fingerprint of a response fetched with cached_get(defer=True)."""
+        if response.pending is not None:
+            self.put(response.url, *response.pending, response.content)
+
+    def evict(self):
+        """Drop least recently used entries until bodies fit in EVICT_TO * max_bytes."""
+        conn = self._connect()
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - int(self.max_bytes * EVICT_TO)
+            victims = []
+            for url, size in conn.execute("SELECT url, size FROM http_cache ORDER BY accessed_at"):
+                victims.append((url,))
+                excess -= size
+                if excess <= 0:
+                    break
+            with conn:
+                conn.executemany("DELETE FROM http_cache WHERE url = ?", victims)
+            logging.info(f"HTTP cache: evicted {len(victims)} entries")
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM http_cache")
+        finally:
+            conn.close()
+
+
+def cached_get(session, url, cache, headers=None, region=None, defer=False, **kwargs) -> CachedResponse:
+    """
+    get_with_retry() made conditional: sends If-None-Match / If-Modified-Since
+    from the last response, serves the cached body on 304, and reports whether
+    the page's fingerprint is the same as last time. kwargs go to get_with_retry.
+
+    With defer=True the new fingerprint is not stored: the caller passes the
+    response to cache.remember() once whatever it parsed from the page is
+    saved, so a crawl that fails or is cancelled before its write commits
+    does not leave the page looking "unchanged" to the next one.
+    """
+    entry = cache.get(url)
+    headers = dict(headers or {})
+    if entry:
+        etag, last_modified, _ = entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    resp = get_with_retry(session, url, headers=headers, **kwargs)
+    if resp.status_code == 304 and entry:
+        content = cache.body(url)
+        if content is not None:
+            return CachedResponse(url, content, True, True)
+        # Body was evicted: fetch it again unconditionally
+        resp = get_with_retry(session, url, headers={k: v for k, v in headers.items()
+                                                     if not k.startswith("If-")}, **kwargs)
+
+    content = resp.content
+    fp = fingerprint(content, region)
+    unchanged = entry is not None and entry[2] == fp
+    validators = (resp.headers.get("ETag"), resp.headers.get("Last-Modified"), fp)
+    if defer:
+        return CachedResponse(url, content, unchanged, False, validators)
+    cache.put(url, *validators, content)
+    return CachedResponse(url, content, unchanged, False)
@@ -0,0 +1,82 @@
+# utils/http_fetch.py
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+# Status codes worth another attempt
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRY_DELAY = 30.0   # seconds; caps backoff and a server's Retry-After alike
+
+
+class HostRateLimiter:
+    """Keeps requests to the same host at least `min_interval` seconds apart, across threads."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _retry_delay(resp, attempt: int, backoff: float) -> float:
+    retry_after = resp.headers.get("Retry-After") if resp is not None else None
+    if retry_after and retry_after.isdigit():
+        # A worker sleeping through a long Retry-After would stall its share of the crawl
+        return min(float(retry_after), MAX_RETRY_DELAY)
+    # Exponential backoff with a little jitter so workers don't retry in lockstep
+    return min(backoff * (2 ** attempt) * (1 + random.random() * 0.25), MAX_RETRY_DELAY)
+
+
+def get_with_retry(session, url, headers=None, timeout=20, retries=3, backoff=1.0, limiter=None):
+    """
+    session.get() with per-host rate limiting and retries on connection
+    errors, timeouts and 429/5xx responses. Raises like raise_for_status()
+    once the retries are used up.
+    """
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.wait(url)
+        try:
+            resp = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries:
+                raise
+            delay = _retry_delay(None, attempt, backoff)
+            logging.warning(f"{e.__class__.__name__} for {url}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        if resp.status_code in RETRY_STATUS and attempt < retries:
+            delay = _retry_delay(resp, attempt, backoff)
+            logging.warning(f"HTTP {resp.status_code} for {url}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        resp.raise_for_status()
+        return resp
+
+
+_local = threading.local()
+
+
+def thread_session() -> requests.Session:
+    """One requests.Session per worker thread (a Session is not safe to share)."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
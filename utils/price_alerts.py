@@ -0,0 +1,118 @@
+# utils/price_alerts.py
+"""
+In-process pub/sub for price change events.
+
+scrap.upsert_products() writes one price_events row per price change and,
+once its transaction has committed, publishes the same events here. Each
+subscriber has an AlertRule; the thresholds are checked once per event as
+it is published, so a subscriber only ever sees its matches and nothing
+rescans the table or parses remark strings.
+"""
+import asyncio
+import logging
+import threading
+
+EVENT_KINDS = ("new", "decrease", "increase")
+DEFAULT_QUEUE_SIZE = 1000   # events buffered per subscriber before the oldest are dropped
+
+
+class AlertRule:
+    """
+    Which events a subscriber wants. Every given threshold must hold:
+      - min_drop: price moved by at least this many rupees
+      - min_pct: price moved by at least this percentage
+      - all_time_low: the new price is below every earlier observation
+    """
+
+    def __init__(self, kinds=("decrease",), min_drop=None, min_pct=None, all_time_low=False, pid=None):
+        unknown = set(kinds) - set(EVENT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown event kind(s): {', '.join(sorted(unknown))}; "
+                             f"choose from {', '.join(EVENT_KINDS)}")
+        self.kinds = frozenset(kinds)
+        self.min_drop = min_drop
+        self.min_pct = min_pct
+        self.all_time_low = all_time_low
+        self.pid = pid
+
+    def matches(self, event):
+        if event["kind"] not in self.kinds:
+            return False
+        if self.pid is not None and event["pid"] != self.pid:
+            return False
+        if self.all_time_low and not event["all_time_low"]:
+            return False
+        if self.min_drop is not None and (event["delta"] is None or abs(event["delta"]) < self.min_drop):
+            return False
+        if self.min_pct is not None and (event["pct"] is None or abs(event["pct"]) < self.min_pct):
+            return False
+        return True
+
+
+class Subscription:
+    """An asyncio queue of matching events, fed from any thread."""
+
+    def __init__(self, rule, loop, maxsize=DEFAULT_QUEUE_SIZE):
+        self.rule = rule
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _offer(self, event):
+        # Runs on the subscriber's loop; a slow consumer loses its oldest events,
+        # counted in `dropped` so the reader can catch up from price_events
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            pass   # loop closed; the subscriber is going away
+
+    async def get(self, timeout=None):
+        """Next event, or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class PriceEventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self, rule, loop=None, maxsize=DEFAULT_QUEUE_SIZE):
+        """New Subscription delivering to `loop` (default: the running loop)."""
+        sub = Subscription(rule, loop or asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, events):
+        """Hand committed events to every subscriber whose rule matches."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        for event in events:
+            for sub in subscribers:
+                try:
+                    if sub.rule.matches(event):
+                        sub.deliver(event)
+                except Exception:
+                    logging.exception("Price alert delivery failed")
+
+
+bus = PriceEventBus()
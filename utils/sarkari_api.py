@@ -0,0 +1,278 @@
+# utils/sarkari_api.py
+import html
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+
+from . import sarkariresult
+from .scrap import encode_cursor
+
+router = APIRouter(prefix="/api/sarkariresult", tags=["Sarkari results"])
+
+
+# ---------------------------
+# Response cache
+# ---------------------------
+CACHE_SIZE = 256    # response bodies kept
+CACHE_TTL = 60.0    # seconds; bounds staleness from crawls run by another process
+
+
+class ResponseCache:
+    """
+    LRU of serialized responses. Emptied whenever sarkariresult.data_version()
+    moves, i.e. as soon as a crawl in this process has written anything.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (stored_at, body)
+        self._version = None
+
+    def _check_version(self):
+        version = sarkariresult.data_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key):
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, body):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (time.monotonic(), body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = ResponseCache()
+
+
+def _cached_body(key, build):
+    """(body, hit): the body from the cache, or from build() and cached."""
+    body = cache.get(key)
+    hit = body is not None
+    if not hit:
+        body = build()
+        cache.put(key, body)
+    return body, hit
+
+
+def _cached_json(key, build):
+    """Response with the body from the cache, or from build() and cached."""
+    body, hit = _cached_body(key, build)
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT" if hit else "MISS"})
+
+
+# ---------------------------
+# Results
+# ---------------------------
+MAX_PAGE_SIZE = 1000
+
+
+def _page_body(rows, limit):
+    """{"items": [...], "count": n, "next_cursor": ...} for one page (rows holds one extra row if there is more)."""
+    items = []
+    last_key = None
+    has_more = False
+    try:
+        for key, item in rows:
+            if len(items) == limit:
+                has_more = True
+                break
+            items.append(item)
+            last_key = key
+    finally:
+        rows.close()
+    next_cursor = encode_cursor(*last_key) if has_more else None
+    return json.dumps({"items": items, "count": len(items), "next_cursor": next_cursor}, ensure_ascii=False)
+
+
+def _results_key(fields=None, cursor=None, limit=100, q=None, post_name=None, min_vacancies=None,
+                 last_date_from=None, last_date_to=None, include_removed=False):
+    return ("results", tuple(fields or ()), cursor, limit, q, post_name, min_vacancies,
+            last_date_from, last_date_to, include_removed)
+
+
+def first_page(limit=100):
+    """
+    Body of the unfiltered /results page (newest first), sharing its cache
+    entry. Blocking: call from a worker thread.
+    """
+    body, _ = _cached_body(_results_key(limit=limit),
+                           lambda: _page_body(sarkariresult.iter_results(limit=limit + 1), limit))
+    return body
+
+
+def _split_fields(fields):
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+
+@router.get("/results", summary="Stored postings, newest first, with keyset pagination and search")
+async def list_results(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated columns and/or detail labels, "
+                                                    "e.g. title,link,last_date,Application_Fee"),
+    q: Optional[str] = Query(None, description="Full-text search over title and details"),
+    post_name: Optional[str] = Query(None, description="Text to find in the post name"),
+    min_vacancies: Optional[int] = Query(None, ge=0),
+    last_date_from: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="YYYY-MM-DD"),
+    last_date_to: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="YYYY-MM-DD"),
+    include_removed: bool = Query(False, description="Also postings no longer on the listing"),
+):
+    wanted = _split_fields(fields)
+    key = _results_key(wanted, cursor, limit, q, post_name, min_vacancies,
+                       last_date_from, last_date_to, include_removed)
+
+    def build():
+        # Runs in the threadpool: the query is built and read there, never on the loop.
+        # One row past the page tells us whether there is a next page.
+        return _page_body(sarkariresult.iter_results(wanted, cursor, limit + 1, q, post_name, min_vacancies,
+                                                     last_date_from, last_date_to, include_removed), limit)
+
+    try:
+        return await run_in_threadpool(_cached_json, key, build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ---------------------------
+# Streamed reads (/all, /table)
+# ---------------------------
+STREAM_CHUNK = 500   # rows read per threadpool call while streaming
+
+
+def _read_chunk(fields, cursor, q, include_removed):
+    """One keyset chunk of (key, posting); opens, drains and closes its own connection."""
+    return list(sarkariresult.iter_results(fields, cursor, STREAM_CHUNK, q, include_removed=include_removed))
+
+
+async def _chunks(first, fields, q, include_removed):
+    """
+    first, then every following chunk. Each chunk is read in a single
+    threadpool call, so no sqlite connection is shared between the threads
+    the stream runs on.
+    """
+    chunk = first
+    while chunk:
+        yield chunk
+        if len(chunk) < STREAM_CHUNK:
+            break
+        cursor = encode_cursor(*chunk[-1][0])
+        chunk = await run_in_threadpool(_read_chunk, fields, cursor, q, include_removed)
+
+
+async def _stream_json(first, include_removed, key, extra):
+    """{**extra, key: [...postings], "count": n}, written chunk by chunk."""
+    head = json.dumps(extra, ensure_ascii=False)[:-1]
+    yield f'{head}{", " if extra else ""}{json.dumps(key)}: ['
+    count = 0
+    async for chunk in _chunks(first, None, None, include_removed):
+        items = ", ".join(json.dumps(item, ensure_ascii=False) for _, item in chunk)
+        yield f", {items}" if count else items
+        count += len(chunk)
+    yield f'], "count": {count}}}'
+
+
+async def stream_all(include_removed=True, key="results", **extra):
+    """Every stored posting, newest first, as a JSON response streamed in chunks."""
+    first = await run_in_threadpool(_read_chunk, None, None, None, include_removed)
+    return StreamingResponse(_stream_json(first, include_removed, key, extra), media_type="application/json")
+
+
+@router.get("/all", summary="Every stored posting, streamed in chunks (prefer /results for paging)")
+async def all_results(include_removed: bool = Query(True)):
+    return await stream_all(include_removed)
+
+
+# ---------------------------
+# HTML table
+# ---------------------------
+TABLE_COLUMNS = ("title", "link", "post_name", "last_date", "vacancies", "last_checked")
+
+
+def _cell(value):
+    if value is None:
+        return "<td></td>"
+    text = html.escape(str(value))
+    if text.startswith(("http://", "https://")):
+        return f'<td><a href="{text}" target="_blank">{text}</a></td>'
+    return f"<td>{text}</td>"
+
+
+def _table_rows(items, columns):
+    out = []
+    for item in items:
+        if columns is None:
+            cells = [_cell(item.get(c)) for c in TABLE_COLUMNS]
+            labels = "<br>".join(f"<b>{html.escape(k)}</b>: {html.escape(str(v))}"
+                                 for k, v in item.items() if k not in sarkariresult.CORE_COLUMNS)
+            cells.append(f"<td>{labels}</td>")
+        else:
+            cells = [_cell(item.get(c)) for c in columns]
+        out.append("<tr>" + "".join(cells) + "</tr>\n")
+    return "".join(out)
+
+
+async def _stream_table(first, fields, q, include_removed):
+    """HTML table written chunk by chunk; without explicit fields the labels go in one details cell."""
+    extra = ["details"] if fields is None else []
+    yield '<!doctype html><html><head><meta charset="utf-8"><title>Sarkari results</title></head><body>'
+    yield "<table border=\"1\"><thead><tr>"
+    yield "".join(f"<th>{html.escape(c)}</th>" for c in [*(fields or TABLE_COLUMNS), *extra])
+    yield "</tr></thead><tbody>"
+    async for chunk in _chunks(first, fields, q, include_removed):
+        yield _table_rows((item for _, item in chunk), fields)
+    yield "</tbody></table></body></html>"
+
+
+@router.get("/table", summary="All matching postings as an HTML table, streamed in chunks")
+async def results_table(
+    fields: Optional[str] = Query(None, description="Comma-separated columns and/or detail labels"),
+    q: Optional[str] = Query(None, description="Full-text search over title and details"),
+    include_removed: bool = Query(True),
+):
+    wanted = _split_fields(fields)
+    try:
+        # Reading the first chunk up front also turns bad arguments into a 400
+        first = await run_in_threadpool(_read_chunk, wanted, None, q, include_removed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(_stream_table(first, wanted, q, include_removed),
+                             media_type="text/html; charset=utf-8")
+
+
+# ---------------------------
+# Crawl runs
+# ---------------------------
+@router.get("/runs", summary="Recent Sarkari crawls with their new/changed/removed counts")
+async def list_runs(limit: int = Query(20, ge=1, le=500)):
+    return {"runs": await run_in_threadpool(sarkariresult.list_runs, limit)}
+
+
+@router.get("/runs/{run_id}", summary="One crawl and the postings it found new, changed or removed")
+async def get_run(run_id: int):
+    run = await run_in_threadpool(sarkariresult.get_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
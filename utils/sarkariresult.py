@@ -1,5 +1,7 @@
 # REST_TEST/utils/sarkariresult_db.py
 import re
+import json
+import hashlib
 from urllib.parse import urljoin
 import requests
 from bs4 import BeautifulSoup
@@ -7,8 +9,13 @@ import pandas as pd
 import os
 import logging
 import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from .http_cache import HttpCache, cached_get
+from .http_fetch import HostRateLimiter, thread_session
+from .scrap import decode_cursor
 
 OUTPUT_DIR = "outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -25,74 +32,359 @@ HEADERS = {
 
 DB_FILE = os.path.join(OUTPUT_DIR, "sarkariresult.db")
 
+# Shared with the Flipkart scraper: ETag/Last-Modified + page fingerprints
+HTTP_CACHE_FILE = os.path.join(OUTPUT_DIR, "http_cache.db")
+_http_cache = HttpCache(HTTP_CACHE_FILE)
+
+# Concurrent crawling
+DEFAULT_WORKERS = 6          # detail pages fetched in parallel
+HOST_MIN_INTERVAL = 0.25     # seconds between two requests to the same host
+FETCH_TIMEOUT = 20           # seconds per request
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 1.0          # seconds, doubled on every retry
+WRITE_BATCH = 50             # postings per DB transaction
+
+# Incremental crawls fetch a known posting again only when its listing title
+# changed or it was last checked this long ago (then usually a cheap 304)
+REVALIDATE_AFTER = 24 * 3600   # seconds
+
+_limiter = HostRateLimiter(HOST_MIN_INTERVAL)
+
+
+def _get(session, url, defer=False):
+    return cached_get(session, url, _http_cache, headers=HEADERS, timeout=FETCH_TIMEOUT, defer=defer,
+                      retries=FETCH_RETRIES, backoff=FETCH_BACKOFF, limiter=_limiter)
+
 
 # =========================================================
 # DATABASE HELPERS
 # =========================================================
+# Schema versions (PRAGMA user_version):
+#   0  one TEXT column per label ever seen, added on the fly, keyed by title
+#   1  fixed core columns + all labels in a JSON `details` column, keyed by link;
+#      the labels people filter on are promoted to indexed columns
+#   2  per-posting content hash, listing source and removal time for
+#      incremental crawls, plus a log of every run and what it changed
+#   3  FTS5 index over title + details, kept in sync by triggers
+SCHEMA_VERSION = 3
+
+RESULTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        link TEXT NOT NULL UNIQUE,
+        title TEXT,
+        post_name TEXT,
+        last_date TEXT,
+        vacancies INTEGER,
+        details TEXT NOT NULL DEFAULT '{}',
+        last_checked TEXT
+    )
+"""
+
+RESULTS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_results_last_checked ON results(last_checked)",
+    "CREATE INDEX IF NOT EXISTS idx_results_last_date ON results(last_date)",
+    "CREATE INDEX IF NOT EXISTS idx_results_vacancies ON results(vacancies)",
+    "CREATE INDEX IF NOT EXISTS idx_results_post_name ON results(post_name)",
+    "CREATE INDEX IF NOT EXISTS idx_results_source ON results(source)",
+)
+
+# One row per crawl; the per-posting changes it found are in scrape_run_changes
+SCRAPE_RUNS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scrape_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        status TEXT NOT NULL,
+        started_at TEXT NOT NULL,
+        finished_at TEXT,
+        listed INTEGER NOT NULL DEFAULT 0,
+        fetched INTEGER NOT NULL DEFAULT 0,
+        new INTEGER NOT NULL DEFAULT 0,
+        changed INTEGER NOT NULL DEFAULT 0,
+        removed INTEGER NOT NULL DEFAULT 0,
+        unchanged INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        error TEXT
+    )
+"""
+
+# change is new | changed | removed
+SCRAPE_RUN_CHANGES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scrape_run_changes (
+        run_id INTEGER NOT NULL,
+        link TEXT NOT NULL,
+        change TEXT NOT NULL,
+        title TEXT,
+        PRIMARY KEY (run_id, link)
+    ) WITHOUT ROWID
+"""
+
+# External-content FTS5 table: it indexes results.title/details without
+# storing a second copy of them; the triggers keep it in step with every write
+RESULTS_FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(
+           title, details, content='results', content_rowid='id', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS results_fts_insert AFTER INSERT ON results BEGIN
+           INSERT INTO results_fts(rowid, title, details) VALUES (new.id, new.title, new.details);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS results_fts_delete AFTER DELETE ON results BEGIN
+           INSERT INTO results_fts(results_fts, rowid, title, details) VALUES ('delete', old.id, old.title, old.details);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS results_fts_update AFTER UPDATE OF title, details ON results BEGIN
+           INSERT INTO results_fts(results_fts, rowid, title, details) VALUES ('delete', old.id, old.title, old.details);
+           INSERT INTO results_fts(rowid, title, details) VALUES (new.id, new.title, new.details);
+       END""",
+)
+
+CORE_COLUMNS = ("id", "title", "link", "post_name", "last_date", "vacancies", "last_checked")
+
+# Labels (as cleaned by scrape_job_details, compared case-insensitively) that
+# feed the promoted columns, in order of preference
+POST_NAME_LABELS = ("post_name", "name_of_post", "name_of_the_post", "post")
+LAST_DATE_LABELS = ("last_date_for_apply_online", "online_apply_last_date", "last_date_to_apply",
+                    "last_date_for_apply", "apply_last_date", "last_date")
+VACANCY_LABELS = ("total_post", "total_posts", "total_vacancy", "total_vacancies", "no_of_posts",
+                  "number_of_posts", "vacancy", "vacancies")
+
+_DATE_PATTERNS = (
+    (re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})\b"), "dmy"),
+    (re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})\b"), "d_month_y"),
+    (re.compile(r"\b([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b"), "month_d_y"),
+)
+
+
+def connect_db():
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _labelled(details, labels):
+    """Value of the first of `labels` present in details (case-insensitive), or None."""
+    lowered = {k.lower(): v for k, v in details.items()}
+    for label in labels:
+        value = lowered.get(label)
+        if value and value != "NA":
+            return value
+    return None
+
+
+def _parse_date(text):
+    """First date in free text ("15-01-2025 (11:59 PM)", "5 January 2025"...) as YYYY-MM-DD, or None."""
+    if not text:
+        return None
+    for pattern, order in _DATE_PATTERNS:
+        for m in pattern.finditer(text):
+            try:
+                if order == "dmy":
+                    date = datetime(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+                else:
+                    day, month = (m.group(1), m.group(2)) if order == "d_month_y" else (m.group(2), m.group(1))
+                    month = datetime.strptime(month[:3].title(), "%b").month
+                    date = datetime(int(m.group(3)), month, int(day))
+            except ValueError:
+                continue
+            return date.strftime("%Y-%m-%d")
+    return None
+
+
+def _parse_count(text):
+    """Leading number of a vacancy label ("1,250 Posts" -> 1250), or None."""
+    m = re.search(r"\d[\d,]*", text or "")
+    return int(m.group(0).replace(",", "")) if m else None
+
+
+def promoted_fields(details):
+    """(post_name, last_date ISO, vacancies) pulled out of a details dict for the indexed columns."""
+    return (
+        _labelled(details, POST_NAME_LABELS),
+        _parse_date(_labelled(details, LAST_DATE_LABELS)),
+        _parse_count(_labelled(details, VACANCY_LABELS)),
+    )
+
+
+def _migrate_to_v1(conn):
+    """
+    Fold the wide table (one column per label) into core columns + JSON
+    details. Rows are re-keyed by link; the most recently checked row wins.
+    """
+    conn.execute("ALTER TABLE results RENAME TO results_wide")
+    conn.execute(RESULTS_SCHEMA)
+    cursor = conn.execute("SELECT * FROM results_wide")
+    columns = [col[0] for col in cursor.description]
+    latest = {}
+    for values in cursor:
+        row = dict(zip(columns, values))
+        title = row.pop("title", None)
+        link = row.pop("link", None) or title
+        last_checked = row.pop("last_checked", None)
+        row.pop("id", None)
+        if not link:
+            continue
+        details = {k: v for k, v in row.items() if v is not None}
+        if link not in latest or (last_checked or "") >= (latest[link][2] or ""):
+            latest[link] = (link, title, last_checked, details)
+    conn.executemany(
+        "INSERT INTO results (link, title, last_checked, post_name, last_date, vacancies, details) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(link, title, checked, *promoted_fields(details), json.dumps(details, ensure_ascii=False))
+         for link, title, checked, details in latest.values()],
+    )
+    conn.execute("DROP TABLE results_wide")
+    logging.info(f"Migrated results to JSON details: {len(columns)} columns -> {len(latest)} rows")
+
+
+def _migrate_to_v2(conn):
+    """Add the incremental-crawl columns and the run log."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+    for column in ("content_hash", "source", "removed_at"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE results ADD COLUMN {column} TEXT")
+    conn.execute(SCRAPE_RUNS_SCHEMA)
+    conn.execute(SCRAPE_RUN_CHANGES_SCHEMA)
+
+
+def _migrate_to_v3(conn):
+    """Full-text index over the existing rows; NULL last_checked becomes '' so keyset paging sees every row."""
+    conn.execute("UPDATE results SET last_checked = '' WHERE last_checked IS NULL")
+    for sql in RESULTS_FTS_SCHEMA:
+        conn.execute(sql)
+    conn.execute("INSERT INTO results_fts(results_fts) VALUES ('rebuild')")
+
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-
-def add_missing_columns(parsed_keys):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("PRAGMA table_info(results)")
-    existing_cols = [col[1].lower() for col in c.fetchall()]
-
-    for key in parsed_keys:
-        if key.lower() not in existing_cols:
-            c.execute(f"ALTER TABLE results ADD COLUMN '{key}' TEXT")
-            logging.info(f"Added missing column: {key}")
-
-    conn.commit()
-    conn.close()
-
-
-def upsert_result(result):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
-    title = result.get("Title", "")
-    link = result.get("Link", "")
-    parsed = result.get("Details", {})
-    parsed["title"] = title
-    parsed["link"] = link
-    parsed["last_checked"] = datetime.now().isoformat()
-
-    # Add missing columns
-    c.execute("PRAGMA table_info(results)")
-    existing_cols = [col[1].lower() for col in c.fetchall()]
-    for key in parsed.keys():
-        if key.lower() not in existing_cols:
-            c.execute(f"ALTER TABLE results ADD COLUMN '{key}' TEXT")
-            logging.info(f"Added column: {key}")
-            existing_cols.append(key.lower())
-
-    # Upsert logic
-    c.execute("SELECT id FROM results WHERE title = ?", (title,))
-    row = c.fetchone()
-    if row:
-        set_clause = ", ".join([f"'{k}' = ?" for k in parsed.keys()])
-        values = list(parsed.values()) + [row[0]]
-        c.execute(f"UPDATE results SET {set_clause} WHERE id = ?", values)
-        remark = "Updated"
-    else:
-        cols = ", ".join([f"'{k}'" for k in parsed.keys()])
-        placeholders = ", ".join(["?"] * len(parsed))
-        c.execute(f"INSERT INTO results ({cols}) VALUES ({placeholders})", list(parsed.values()))
-        remark = "Inserted"
+    """
+    Create or migrate the results schema (see SCHEMA_VERSION). Runs at app
+    startup and before each crawl; the read functions below assume it has.
+    """
+    conn = connect_db()
+    conn.isolation_level = None  # explicit transaction, so DDL is rolled back too
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have just migrated
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            has_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'results'"
+            ).fetchone()
+            if has_table and version < 1:
+                _migrate_to_v1(conn)
+            conn.execute(RESULTS_SCHEMA)
+            if version < 2:
+                _migrate_to_v2(conn)
+            if version < 3:
+                _migrate_to_v3(conn)
+            for sql in RESULTS_INDEXES:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+UPSERT_SQL = """
+    INSERT INTO results (link, title, post_name, last_date, vacancies, details, last_checked,
+                         content_hash, source, removed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+    ON CONFLICT(link) DO UPDATE SET
+        title = excluded.title,
+        post_name = excluded.post_name,
+        last_date = excluded.last_date,
+        vacancies = excluded.vacancies,
+        details = excluded.details,
+        last_checked = excluded.last_checked,
+        content_hash = excluded.content_hash,
+        source = COALESCE(excluded.source, results.source),
+        removed_at = NULL
+"""
+
+
+def details_hash(details):
+    """Stable hash of a posting's parsed labels (key order does not matter)."""
+    return hashlib.sha256(json.dumps(details, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+
+def _bump_data_version():
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+
+def data_version():
+    """Counter bumped whenever this process writes results (response caches key on it)."""
+    with _data_version_lock:
+        return _data_version
+
+
+def upsert_results(results, conn=None):
+    """
+    Insert or update a batch of postings (keyed by link) in one transaction.
+    Returns 'Inserted' or 'Updated' for each, in order.
+    """
+    if not results:
+        return []
 
-    conn.commit()
-    conn.close()
-    return remark
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_db()
+
+    now = datetime.now().isoformat()
+    params = []
+    for result in results:
+        title = result.get("Title", "")
+        details = result.get("Details", {}) or {}
+        params.append((result.get("Link", "") or title, title, *promoted_fields(details),
+                       json.dumps(details, ensure_ascii=False), now,
+                       details_hash(details), result.get("Source")))
+
+    links = list({row[0] for row in params})
+    existing = set()
+    try:
+        with conn:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(links), 500):
+                chunk = links[i:i + 500]
+                existing.update(link for link, in conn.execute(
+                    f"SELECT link FROM results WHERE link IN ({', '.join('?' * len(chunk))})", chunk))
+            conn.executemany(UPSERT_SQL, params)
+    finally:
+        if own_conn:
+            conn.close()
+    _bump_data_version()
+
+    remarks = []
+    for row in params:
+        remarks.append("Updated" if row[0] in existing else "Inserted")
+        existing.add(row[0])   # a repeated link in the batch updates the first
+    return remarks
+
+
+def upsert_result(result, conn=None):
+    """Insert or update one posting (keyed by link); returns 'Inserted' or 'Updated'."""
+    return upsert_results([result], conn)[0]
+
+
+def row_to_result(row):
+    """
+    Flat dict of a results row (sqlite3.Row or dict): the core columns plus
+    every detail label, as the old one-column-per-label table returned it.
+    """
+    flat = dict(row)
+    details = json.loads(flat.pop("details", None) or "{}")
+    for key, value in details.items():
+        flat.setdefault(key, value)
+    return flat
 
 
 # =========================================================
@@ -105,9 +397,8 @@ def safe_text(el):
 def scrape_page_links(session, url):
     """Extract all job/result links from main page"""
     try:
-        resp = session.get(url, headers=HEADERS, timeout=20)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
+        page = _get(session, url)
+        soup = BeautifulSoup(page.content, "lxml")
 
         results = []
         base_url = url
@@ -138,24 +429,40 @@ def scrape_page_links(session, url):
 # =========================================================
 # DETAILED SCRAPER — EXTRACT FIELDS DIRECTLY
 # =========================================================
-def scrape_job_details(session, url, div_class="gb-grid-wrapper gb-grid-wrapper-303102a8"):
+DETAILS_DIV = "gb-grid-wrapper gb-grid-wrapper-303102a8"   # container of a job page's details
+
+
+def scrape_job_details(session, url, div_class=DETAILS_DIV, skip_unchanged=False):
     """
     Dynamically extract all 'Label : Value' pairs from the job page.
     Left side of ':' becomes column name, right side becomes value.
+    With skip_unchanged, returns None (nothing parsed) when the page is
+    the same as on the last fetch.
+    """
+    details, _ = _job_details(session, url, div_class, skip_unchanged)
+    return details
+
+
+def _job_details(session, url, div_class, skip_unchanged, defer=False):
+    """
+    (details, page) for scrape_job_details; page is the CachedResponse, or
+    None if nothing was fetched or the fetch failed. With defer the page's
+    fingerprint is left for the caller to store (_http_cache.remember).
     """
     try:
         if not url or url.startswith("#") or "javascript" in url.lower():
-            return {}
+            return {}, None
 
-        resp = session.get(url, headers=HEADERS, timeout=20)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
+        page = _get(session, url, defer=defer)
+        if skip_unchanged and page.unchanged:
+            return None, page
+        soup = BeautifulSoup(page.content, "lxml")
 
         # Find the container that has all details (update div_class as needed)
         container = soup.find("div", class_=div_class)
         if not container:
             logging.warning(f"No main div found for: {url}")
-            return {}
+            return {}, page
 
         parsed = {}
         all_texts = []
@@ -166,10 +473,6 @@ def scrape_job_details(session, url, div_class="gb-grid-wrapper gb-grid-wrapper-
             if text and len(text) > 3:
                 all_texts.append(text)
 
-        # Debug print (you can comment this out later)
-        for t in all_texts:
-            print("aaaaaaaaaaa", t)
-
         # Now dynamically detect all "Label : Value" patterns
         for text in all_texts:
             if ":" in text:
@@ -188,61 +491,323 @@ def scrape_job_details(session, url, div_class="gb-grid-wrapper gb-grid-wrapper-
         if not parsed:
             parsed["Raw_Text"] = " | ".join(all_texts[:20])
 
-        return parsed
+        return parsed, page
 
     except Exception as e:
         logging.warning(f"Error scraping {url}: {e}")
-        return {"Error": str(e)}
+        return {"Error": str(e)}, None
 
 
 
+# =========================================================
+# RUN LOG
+# =========================================================
+RUN_FIELDS = ("id", "source", "mode", "status", "started_at", "finished_at", "listed", "fetched",
+              "new", "changed", "removed", "unchanged", "failed", "error")
+RUN_COUNTS = ("listed", "fetched", "new", "changed", "removed", "unchanged", "failed")
+
+
+def _start_run(conn, source, mode):
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO scrape_runs (source, mode, status, started_at) VALUES (?, ?, 'running', ?)",
+            (source, mode, datetime.now().isoformat()),
+        )
+    return cursor.lastrowid
+
+
+def _finish_run(conn, run_id, counts, changes, status="finished", error=None):
+    with conn:
+        conn.execute(
+            f"UPDATE scrape_runs SET status = ?, finished_at = ?, error = ?, "
+            f"{', '.join(f'{k} = ?' for k in RUN_COUNTS)} WHERE id = ?",
+            (status, datetime.now().isoformat(), error, *(counts[k] for k in RUN_COUNTS), run_id),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO scrape_run_changes (run_id, link, change, title) VALUES (?, ?, ?, ?)",
+            [(run_id, link, change, title) for link, change, title in changes],
+        )
+    _bump_data_version()
+
+
+def list_runs(limit=50):
+    conn = connect_db()
+    try:
+        rows = conn.execute(f"SELECT {', '.join(RUN_FIELDS)} FROM scrape_runs ORDER BY id DESC LIMIT ?",
+                            (limit,)).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(RUN_FIELDS, row)) for row in rows]
+
+
+def get_run(run_id):
+    """One run with the postings it found new, changed or removed; None if unknown."""
+    conn = connect_db()
+    try:
+        row = conn.execute(f"SELECT {', '.join(RUN_FIELDS)} FROM scrape_runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        changes = conn.execute("SELECT link, change, title FROM scrape_run_changes WHERE run_id = ? "
+                               "ORDER BY change, title", (run_id,)).fetchall()
+    finally:
+        conn.close()
+    run = dict(zip(RUN_FIELDS, row))
+    run["changes"] = [{"link": link, "change": change, "title": title} for link, change, title in changes]
+    return run
+
+
 # =========================================================
 # MAIN SCRAPER
 # =========================================================
-def scrape_sarkariresult(base_url="https://sarkariresult.com.cm/latest-jobs/", save_csv=False):
+def _stored_postings(conn, links):
+    """{link: (title, content_hash, last_checked, removed_at)} for the links already in results."""
+    stored = {}
+    for i in range(0, len(links), 500):
+        chunk = links[i:i + 500]
+        rows = conn.execute(
+            f"SELECT link, title, content_hash, last_checked, removed_at FROM results "
+            f"WHERE link IN ({', '.join('?' * len(chunk))})", chunk
+        )
+        stored.update({link: rest for link, *rest in rows})
+    return stored
+
+
+def _needs_fetch(result, stored, now):
+    """Whether an incremental crawl has to look at this posting's detail page."""
+    if stored is None:
+        return True
+    title, _, last_checked, removed_at = stored
+    if removed_at or title != result["Title"]:
+        return True
+    try:
+        return (now - datetime.fromisoformat(last_checked)).total_seconds() >= REVALIDATE_AFTER
+    except (TypeError, ValueError):
+        return True
+
+
+def _fetch_details(result, skip_unchanged):
+    """
+    (result, details, page) for one listing entry, fetched on a worker thread.
+    The page's fingerprint is stored by the writer once the posting is saved.
+    """
+    details, page = _job_details(thread_session(), result["Link"], DETAILS_DIV, skip_unchanged, defer=True)
+    return result, details, page
+
+
+def save_results_csv(results):
+    """Write postings (as scraped or from get_all_results) to a timestamped CSV in OUTPUT_DIR; returns its path."""
+    csv_path = os.path.join(OUTPUT_DIR, f"sarkariresult_{int(time.time())}.csv")
+    pd.DataFrame(results).to_csv(csv_path, index=False, encoding="utf-8-sig")
+    logging.info(f"CSV saved at {csv_path}")
+    return csv_path
+
+
+def scrape_sarkariresult(base_url="https://sarkariresult.com.cm/latest-jobs/", save_csv=False,
+                         workers=DEFAULT_WORKERS, incremental=True):
+    """
+    Detail pages are fetched by a pool of `workers` threads (per-host rate
+    limit, timeouts, retry with backoff). Only this thread writes to the DB,
+    WRITE_BATCH postings per transaction. workers=1 is fully sequential.
+
+    Incremental (default): a known posting's page is fetched only if its
+    listing title changed or it is due for revalidation, and it is parsed
+    only if the page itself changed (conditional GET + fingerprint). A run
+    where nothing changed is one listing fetch. incremental=False fetches
+    every posting. Either way the run and its new / changed / removed
+    postings are recorded in scrape_runs / scrape_run_changes.
+    """
     init_db()
     session = requests.Session()
     all_results = []
+    counts = dict.fromkeys(RUN_COUNTS, 0)
+    changes = []   # (link, change, title)
+    conn = connect_db()
+    run_id = _start_run(conn, base_url, "incremental" if incremental else "full")
 
-    logging.info(f"Fetching result links from: {base_url}")
-    links = scrape_page_links(session, base_url)
-    if not links:
-        logging.warning("No results found.")
-        return {"count": 0, "db": DB_FILE, "csv": None}
-
-    logging.info(f"Found {len(links)} results.")
+    try:
+        logging.info(f"Fetching result links from: {base_url}")
+        links = scrape_page_links(session, base_url)
+        counts["listed"] = len(links)
+        if not links:
+            # An empty listing is far likelier a fetch failure than every posting withdrawn
+            logging.warning("No results found.")
+            _finish_run(conn, run_id, counts, changes)
+            return {"count": 0, "db": DB_FILE, "csv": None, "run_id": run_id, **counts}
+
+        stored = _stored_postings(conn, [r["Link"] for r in links])
+        now = datetime.now()
+        to_fetch = [r for r in links if not incremental or _needs_fetch(r, stored.get(r["Link"]), now)]
+        counts["unchanged"] = len(links) - len(to_fetch)
+        counts["fetched"] = len(to_fetch)
+        logging.info(f"Found {len(links)} results, {len(to_fetch)} to fetch with {workers} workers...")
+
+        pending = []
+        pending_pages = []   # fingerprints to store once `pending` is committed
+        touched = []   # pages identical to the last fetch: only last_checked moves
+        touched_pages = []
+
+        def flush():
+            upsert_results(pending, conn=conn)
+            for page in pending_pages:
+                _http_cache.remember(page)
+            pending_pages.clear()
+            scraped_at = datetime.now().isoformat()
+            for result in pending:
+                result["ScrapeTime"] = scraped_at
+                all_results.append(result)
+            pending.clear()
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = []
+            for result in to_fetch:
+                prev = stored.get(result["Link"])
+                # Only skip parsing when nothing else about the posting moved
+                skip = incremental and prev is not None and not prev[3] and prev[0] == result["Title"]
+                futures.append(pool.submit(_fetch_details, result, skip))
+            for idx, future in enumerate(as_completed(futures), start=1):
+                result, details, page = future.result()
+                link = result["Link"]
+                if details is None:
+                    counts["unchanged"] += 1
+                    touched.append(link)
+                    touched_pages.append(page)
+                    continue
+                if list(details) == ["Error"]:
+                    counts["failed"] += 1
+                    logging.warning(f"[{idx}/{len(to_fetch)}] Failed: {result['Title']}")
+                    continue
 
-    for idx, result in enumerate(links, start=1):
-        details = scrape_job_details(session, result["Link"])
-        result["Details"] = details
-        remark = upsert_result(result)
-        result["Remark"] = remark
-        result["ScrapeTime"] = datetime.now().isoformat()
-        all_results.append(result)
-        logging.info(f"[{idx}/{len(links)}] {remark}: {result['Title']}")
+                prev = stored.get(link)
+                if prev is None or prev[3]:
+                    result["Remark"] = "new"
+                elif prev[0] != result["Title"] or (prev[1] and prev[1] != details_hash(details)):
+                    result["Remark"] = "changed"
+                else:
+                    result["Remark"] = "unchanged"
+                counts[result["Remark"]] += 1
+                if result["Remark"] != "unchanged":
+                    changes.append((link, result["Remark"], result["Title"]))
+
+                result["Details"] = details
+                result["Source"] = base_url
+                pending.append(result)
+                if page is not None:
+                    pending_pages.append(page)
+                logging.info(f"[{idx}/{len(to_fetch)}] {result['Remark'].title()}: {result['Title']}")
+                if len(pending) >= WRITE_BATCH:
+                    flush()
+        flush()
+
+        listed = {r["Link"] for r in links}
+        with conn:
+            scraped_at = datetime.now().isoformat()
+            conn.executemany(
+                "UPDATE results SET last_checked = ?, source = COALESCE(source, ?) WHERE link = ?",
+                [(scraped_at, base_url, link) for link in touched],
+            )
+            gone = [(link, title) for link, title in conn.execute(
+                "SELECT link, title FROM results WHERE source = ? AND removed_at IS NULL", (base_url,)
+            ) if link not in listed]
+            conn.executemany("UPDATE results SET removed_at = ? WHERE link = ?",
+                             [(scraped_at, link) for link, _ in gone])
+        for page in touched_pages:
+            _http_cache.remember(page)
+        counts["removed"] = len(gone)
+        changes.extend((link, "removed", title) for link, title in gone)
+        _finish_run(conn, run_id, counts, changes)
+    except Exception as e:
+        _finish_run(conn, run_id, counts, changes, status="failed", error=str(e))
+        raise
+    finally:
+        conn.close()
 
-    csv_path = None
-    if save_csv and all_results:
-        df = pd.DataFrame(all_results)
-        csv_path = os.path.join(OUTPUT_DIR, f"sarkariresult_{int(time.time())}.csv")
-        df.to_csv(csv_path, index=False, encoding="utf-8-sig")
-        logging.info(f"CSV saved at {csv_path}")
+    csv_path = save_results_csv(all_results) if save_csv and all_results else None
 
-    logging.info(f"Completed scraping {len(all_results)} results.")
-    return {"count": len(all_results), "db": DB_FILE, "csv": csv_path}
+    logging.info(f"Completed run {run_id}: {counts['new']} new, {counts['changed']} changed, "
+                 f"{counts['removed']} removed, {counts['unchanged']} unchanged, {counts['failed']} failed.")
+    return {"count": len(all_results), "db": DB_FILE, "csv": csv_path, "run_id": run_id, **counts}
 
 
 # =========================================================
 # FETCH ALL RESULTS
 # =========================================================
-def get_all_results():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM results ORDER BY last_checked DESC")
-    rows = c.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+LABEL_RE = re.compile(r"^[A-Za-z0-9_]+$")   # detail labels, as cleaned by scrape_job_details
+
+
+def _fts_query(text):
+    """User text -> FTS5 query: every word must appear (quoted, so no query syntax leaks through)."""
+    words = re.findall(r"\w+", text)
+    return " ".join('"' + w.replace('"', '""') + '"' for w in words)
+
+
+def iter_results(fields=None, cursor=None, limit=100, q=None, post_name=None, min_vacancies=None,
+                 last_date_from=None, last_date_to=None, include_removed=False):
+    """
+    Iterator of ((last_checked, id), posting) for up to `limit` postings,
+    newest first, starting after `cursor` (keyset pagination on the
+    last_checked index). `fields` picks the keys of each posting: core
+    columns (CORE_COLUMNS) and/or detail labels, read straight from the
+    JSON; by default every core column and label, flattened. `q` is a
+    full-text search over title and details. Bad arguments raise ValueError
+    before any row is read.
+    """
+    if fields:
+        fields = list(dict.fromkeys(fields))
+        bad = [f for f in fields if f not in CORE_COLUMNS and not LABEL_RE.match(f)]
+        if bad:
+            raise ValueError(f"Unknown fields: {', '.join(bad)}")
+        columns = [f if f in CORE_COLUMNS else f"json_extract(details, '$.\"{f}\"')" for f in fields]
+    else:
+        columns = [*CORE_COLUMNS, "details"]
+
+    where, params = [], []
+    if cursor:
+        where.append("(last_checked, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+    if q:
+        match = _fts_query(q)
+        if not match:
+            raise ValueError("q has no searchable words")
+        where.append("id IN (SELECT rowid FROM results_fts WHERE results_fts MATCH ?)")
+        params.append(match)
+    if post_name:
+        where.append("instr(lower(post_name), lower(?)) > 0")
+        params.append(post_name)
+    if min_vacancies is not None:
+        where.append("vacancies >= ?")
+        params.append(min_vacancies)
+    for value, op in ((last_date_from, ">="), (last_date_to, "<=")):
+        if value is not None:
+            where.append(f"last_date {op} ?")
+            params.append(value)
+    if not include_removed:
+        where.append("removed_at IS NULL")
+
+    sql = f"SELECT last_checked, id, {', '.join(columns)} FROM results"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY last_checked DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return _iter_rows(sql, params, fields)
+
+
+def _iter_rows(sql, params, fields):
+    conn = connect_db()
+    try:
+        for row in conn.execute(sql, params):
+            if fields:
+                yield (row[0], row[1]), dict(zip(fields, row[2:]))
+            else:
+                yield (row[0], row[1]), row_to_result(dict(zip((*CORE_COLUMNS, "details"), row[2:])))
+    finally:
+        conn.close()
+
+
+def get_all_results(include_removed=True):
+    """Every stored posting, flattened, newest first."""
+    return [item for _, item in iter_results(limit=None, include_removed=include_removed)]
 
 
 # =========================================================
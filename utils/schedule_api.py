@@ -0,0 +1,44 @@
+# utils/schedule_api.py
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from .scheduler import scheduler
+
+router = APIRouter(prefix="/api/schedule", tags=["Scrape schedule"])
+
+MAX_WAIT = 600   # seconds a caller may block on a run
+
+
+@router.get("", summary="Scrape targets with their interval, running and last run")
+def list_schedule():
+    return {"targets": [scheduler.status(name) for name in scheduler.targets()]}
+
+
+@router.get("/{target}", summary="Schedule and runs of one scrape target")
+def target_status(target: str):
+    if target not in scheduler.targets():
+        raise HTTPException(status_code=404, detail="Unknown target")
+    return scheduler.status(target)
+
+
+@router.post("/{target}/run", summary="Run a scrape target now, or join the run in flight")
+async def run_target(
+    target: str,
+    full: bool = Query(False, description="Full re-crawl (sarkari)"),
+    wait: bool = Query(False, description="Block until the run finishes"),
+    timeout: float = Query(120, gt=0, le=MAX_WAIT),
+):
+    """
+    Concurrent calls for the same target share one run (`coalesced` is true
+    for every caller but the one that started it). full=true while an
+    incremental run is in flight queues one full run behind it.
+    """
+    try:
+        run, started = scheduler.trigger(target, full=full)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown target")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if wait:
+        await run_in_threadpool(run.wait, timeout)
+    return {"coalesced": not started, "run": run.as_dict()}
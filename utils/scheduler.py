@@ -0,0 +1,268 @@
+# utils/scheduler.py
+"""
+Server-side scraping schedule with request coalescing.
+
+Each target (a scraper) runs every `interval` seconds on a background
+thread, and can be triggered on demand. Runs are single-flight per target:
+triggering a target that is already running joins that run instead of
+starting a second crawl against the same site and DB file. A trigger with
+options the running one lacks (a full Sarkari crawl while an incremental
+one runs) queues a single follow-up run with them, which later triggers
+join. Readers serve whatever the last completed run stored, without waiting.
+
+Intervals come from the environment (seconds, 0 disables):
+    SCRAP_SARKARI_INTERVAL   default 3600
+    SCRAP_FLIPKART_INTERVAL  default 0; needs SCRAP_FLIPKART_URL (and SCRAP_FLIPKART_PAGES)
+The first scheduled run is one interval after startup, so restarts and
+reloads do not crawl; SCRAP_RUN_ON_START=1 runs every scheduled target at once.
+
+Schedules live in this process: run the app with a single worker, or
+disable the intervals on all but one.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from . import sarkariresult, scrap_jobs
+
+SARKARI_INTERVAL = float(os.getenv("SCRAP_SARKARI_INTERVAL", "3600"))
+FLIPKART_INTERVAL = float(os.getenv("SCRAP_FLIPKART_INTERVAL", "0"))
+FLIPKART_URL = os.getenv("SCRAP_FLIPKART_URL", "")
+FLIPKART_PAGES = int(os.getenv("SCRAP_FLIPKART_PAGES", "1"))
+RUN_ON_START = os.getenv("SCRAP_RUN_ON_START", "0") == "1"
+TICK = 5.0   # seconds between checks for due targets
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class Run:
+    """One execution of a target; callers that joined it can wait() for the result."""
+
+    def __init__(self, key, trigger, options=None):
+        self.key = key
+        self.trigger = trigger
+        self.options = dict(options or {})
+        self.started_at = None   # None while queued behind the run in flight
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """True once the run has finished (within timeout)."""
+        return self._done.wait(timeout)
+
+    def as_dict(self):
+        return {"target": self.key, "trigger": self.trigger, "options": self.options, "status": self.status(),
+                "started_at": self.started_at, "finished_at": self.finished_at,
+                "result": self.result, "error": self.error}
+
+    def status(self):
+        if self.started_at is None:
+            return "queued"
+        if not self.done:
+            return "running"
+        return "failed" if self.error else "finished"
+
+
+def _covers(have, wanted):
+    return all(have.get(k) == v for k, v in wanted.items())
+
+
+class SingleFlight:
+    """At most one run of fn per key at a time; triggers while it runs share that run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._queued = {}   # key -> (run, fn, on_done), started once the run in flight finishes
+
+    def trigger(self, key, fn, trigger="manual", on_done=None, **options):
+        """
+        (run, started): a new run of fn(**options), or one already there with
+        started=False. The run in flight is joined when it has every option
+        asked for; otherwise a follow-up run is queued (or joined, adding the
+        options to it). Options that are false are the defaults and never
+        passed on.
+        """
+        wanted = {k: v for k, v in options.items() if v}
+        with self._lock:
+            current = self._in_flight.get(key)
+            if current is None:
+                run = Run(key, trigger, wanted)
+                self._in_flight[key] = run
+            elif _covers(current.options, wanted):
+                return current, False
+            elif key in self._queued:
+                queued = self._queued[key][0]
+                queued.options.update(wanted)
+                return queued, False
+            else:
+                run = Run(key, trigger, wanted)
+                self._queued[key] = (run, fn, on_done)
+                return run, True
+        self._start(run, fn, on_done)
+        return run, True
+
+    def _start(self, run, fn, on_done):
+        run.started_at = _now()
+
+        def target():
+            queued = None
+            try:
+                run.result = fn(**run.options)
+            except Exception as e:
+                logging.exception(f"Scheduled run of {run.key} failed")
+                run.error = str(e)
+            finally:
+                run.finished_at = _now()
+                with self._lock:
+                    self._in_flight.pop(run.key, None)
+                    queued = self._queued.pop(run.key, None)
+                    if queued:
+                        self._in_flight[run.key] = queued[0]
+                if on_done:
+                    on_done(run)
+                run._done.set()
+                if queued:
+                    self._start(*queued)
+
+        threading.Thread(target=target, name=f"scrape-{run.key}", daemon=True).start()
+
+    def in_flight(self, key):
+        with self._lock:
+            return self._in_flight.get(key)
+
+    def queued(self, key):
+        with self._lock:
+            queued = self._queued.get(key)
+        return queued[0] if queued else None
+
+
+class Scheduler:
+    def __init__(self):
+        self.flight = SingleFlight()
+        self._targets = {}   # name -> {"fn", "interval", "options", "next_due", "last"}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, name, fn, interval=0, options=()):
+        """
+        Register a target; interval 0 means it only runs when triggered.
+        `options` names the keyword arguments fn takes from trigger().
+        """
+        next_due = None
+        if interval > 0:
+            next_due = time.monotonic() + (0 if RUN_ON_START else interval)
+        with self._lock:
+            self._targets[name] = {"fn": fn, "interval": interval, "options": frozenset(options),
+                                   "last": None, "next_due": next_due}
+
+    def targets(self):
+        with self._lock:
+            return list(self._targets)
+
+    def trigger(self, name, trigger="manual", **options):
+        """
+        Start target `name`, or join its run in flight (see SingleFlight.trigger).
+        Returns (run, started); KeyError if unknown, ValueError for an option it does not take.
+        """
+        with self._lock:
+            target = self._targets[name]
+            unknown = sorted(k for k, v in options.items() if v and k not in target["options"])
+            if unknown:
+                raise ValueError(f"{name} does not take {', '.join(unknown)}")
+            if target["interval"] > 0:
+                target["next_due"] = time.monotonic() + target["interval"]
+
+        def on_done(run):
+            with self._lock:
+                target["last"] = run
+
+        return self.flight.trigger(name, target["fn"], trigger, on_done, **options)
+
+    def last_run(self, name):
+        """The last finished run of `name`, or None."""
+        with self._lock:
+            last = self._targets[name]["last"]
+        return last
+
+    def status(self, name):
+        with self._lock:
+            target = self._targets[name]
+            interval, next_due, last = target["interval"], target["next_due"], target["last"]
+        running = self.flight.in_flight(name)
+        queued = self.flight.queued(name)
+        return {
+            "target": name,
+            "interval": interval or None,
+            "next_run_in": round(max(0.0, next_due - time.monotonic()), 1) if next_due is not None else None,
+            "running": running.as_dict() if running else None,
+            "queued": queued.as_dict() if queued else None,
+            "last_run": last.as_dict() if last else None,
+        }
+
+    # ---------------------------
+    # Background loop
+    # ---------------------------
+    def _loop(self):
+        while not self._stop.wait(TICK):
+            now = time.monotonic()
+            with self._lock:
+                due = [name for name, t in self._targets.items()
+                       if t["next_due"] is not None and t["next_due"] <= now]
+            for name in due:
+                run, started = self.trigger(name, trigger="schedule")
+                if started:
+                    logging.info(f"Scheduled scrape of {name} started")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="scrape-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=TICK + 1)
+            self._thread = None
+
+
+# ---------------------------
+# Targets
+# ---------------------------
+def _crawl_sarkari(full=False):
+    return sarkariresult.scrape_sarkariresult(incremental=not full)
+
+
+def _crawl_flipkart():
+    """Scheduled Flipkart crawl, run as a crawl job (or joining one) so it shows up in /scrap/jobs."""
+    return scrap_jobs.crawl(FLIPKART_URL, FLIPKART_PAGES)
+
+
+scheduler = Scheduler()
+scheduler.add("sarkari", _crawl_sarkari, SARKARI_INTERVAL, options=("full",))
+if FLIPKART_URL:
+    scheduler.add("flipkart", _crawl_flipkart, FLIPKART_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """FastAPI lifespan: run the schedule while the app is up."""
+    scheduler.start()
+    try:
+        yield
+    finally:
+        scheduler.stop()
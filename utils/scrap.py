@@ -1,13 +1,20 @@
 # REST_TEST/utils/scrap_fast_db.py
 import re
+import base64
+import json
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
 import logging
 import sqlite3
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+from .extract import SelectorStats, extract_links, extract_product, profiles as selector_profiles
+from .http_cache import HttpCache, cached_get
+from .http_fetch import HostRateLimiter, thread_session
+from .price_alerts import bus as price_event_bus
 
 OUTPUT_DIR = "outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -24,33 +31,205 @@ HEADERS = {
 
 DB_FILE = os.path.join(OUTPUT_DIR, "price_tracker.db")
 
+# Concurrent fetching
+DEFAULT_WORKERS = 8          # product pages fetched in parallel
+HOST_MIN_INTERVAL = 0.25     # seconds between two requests to the same host
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 1.0          # seconds, doubled on every retry
+
+_limiter = HostRateLimiter(HOST_MIN_INTERVAL)
+
+# Selector health: stop a crawl once the selectors stop matching (e.g. Flipkart
+# rotated its class names) instead of crawling pages that yield nothing
+REQUIRED_FIELDS = ("title", "price")
+HIT_RATE_MIN_SAMPLE = 20     # products seen before the rate is judged
+HIT_RATE_FLOOR = 0.2         # abort below this hit rate over the recent window
+
+
+class SelectorHealthError(RuntimeError):
+    """The selectors stopped matching; the crawl was aborted."""
+
+
+# Validators + fingerprints of fetched pages: unchanged product pages skip parsing and DB writes
+HTTP_CACHE_FILE = os.path.join(OUTPUT_DIR, "http_cache.db")
+_http_cache = HttpCache(HTTP_CACHE_FILE)
+
 
 # --------------------------
 # Database helpers
 # --------------------------
-def init_db():
-    """Create tables. Use link as unique key to avoid duplicate products."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS price_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT,
-            link TEXT UNIQUE,
-            old_price TEXT,
-            old_price_num REAL,
-            current_price TEXT,
-            current_price_num REAL,
-            remark TEXT,
-            last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            discount TEXT,
-            rating TEXT,
-            image TEXT,
-            features TEXT
+def connect_db():
+    """
+    Open the tracker DB in WAL mode, so API reads don't block the scraper's
+    writes (and vice versa), with sync/caching PRAGMAs tuned for bulk upserts.
+    """
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-16000")  # ~16 MB
+    return conn
+
+
+# Bump together with a _migrate_to_vN step in init_db
+SCHEMA_VERSION = 4
+
+PRICE_HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS price_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pid TEXT NOT NULL UNIQUE,
+        title TEXT,
+        link TEXT,
+        old_price TEXT,
+        old_price_num REAL,
+        current_price TEXT,
+        current_price_num REAL,
+        remark TEXT,
+        last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        discount TEXT,
+        rating TEXT,
+        image TEXT,
+        features TEXT
+    )
+"""
+
+# Append-only price time series: one row per observed price *change*.
+# WITHOUT ROWID clusters rows by (product_id, ts), so a product's history is
+# one contiguous range of the primary key, and each row is only a few bytes.
+# product_id is price_history.id; price_history itself is the current snapshot,
+# maintained in the same transaction as every append.
+PRICE_OBSERVATIONS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS price_observations (
+        product_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        price_num REAL NOT NULL,
+        PRIMARY KEY (product_id, ts)
+    ) WITHOUT ROWID
+"""
+
+# Structured price changes, written with the observation they describe.
+# kind is new | decrease | increase; delta and pct are new - old (negative
+# for a drop); all_time_low is 1 when the new price is below every earlier
+# observation. The id is the order consumers read (and resume) the stream in.
+PRICE_EVENTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS price_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        old_price_num REAL,
+        new_price_num REAL NOT NULL,
+        delta REAL,
+        pct REAL,
+        all_time_low INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+PRICE_HISTORY_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_price_history_last_checked ON price_history(last_checked)",
+    "CREATE INDEX IF NOT EXISTS idx_price_history_price ON price_history(current_price_num)",
+    "CREATE INDEX IF NOT EXISTS idx_price_events_product ON price_events(product_id, id)",
+)
+
+
+def product_id(link):
+    """
+    Stable product key from a Flipkart URL: the pid= query parameter, which
+    stays the same across the tracking params (lid, srno, iid, ssid...) that
+    change on every search. Falls back to the URL without its query string.
+    """
+    if not link:
+        return ""
+    parts = urlsplit(link)
+    pid = parse_qs(parts.query).get("pid")
+    if pid and pid[0]:
+        return pid[0]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def _migrate_to_v2(conn):
+    """
+    v1 keyed products by the full link (tracking params and all), so the same
+    product could have several rows. Rebuild the table keyed by pid, keeping
+    the most recently checked row per product.
+    """
+    conn.execute("ALTER TABLE price_history RENAME TO price_history_v1")
+    conn.execute(PRICE_HISTORY_SCHEMA)
+    rows = conn.execute("""
+        SELECT title, link, old_price, old_price_num, current_price, current_price_num,
+               remark, last_checked, discount, rating, image, features
+        FROM price_history_v1 ORDER BY last_checked, id
+    """).fetchall()
+    # Later rows win, so each pid ends up with its latest state
+    latest = {product_id(row[1]): row for row in rows}
+    conn.executemany("""
+        INSERT INTO price_history
+        (pid, title, link, old_price, old_price_num, current_price, current_price_num,
+         remark, last_checked, discount, rating, image, features)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(pid,) + tuple(row) for pid, row in latest.items()])
+    conn.execute("DROP TABLE price_history_v1")
+    logging.info(f"Migrated price_history to v2: {len(rows)} rows -> {len(latest)} products")
+
+
+def _migrate_to_v3(conn):
+    """Add price_observations, seeded with each product's current price."""
+    conn.execute(PRICE_OBSERVATIONS_SCHEMA)
+    conn.execute("""
+        INSERT OR IGNORE INTO price_observations (product_id, ts, price_num)
+        SELECT id, COALESCE(CAST(strftime('%s', last_checked) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)),
+               current_price_num
+        FROM price_history WHERE current_price_num IS NOT NULL
+    """)
+
+
+def _migrate_to_v4(conn):
+    """
+    Add price_events, and min_price_num on the snapshot (the lowest price ever
+    observed, kept up to date by every upsert so all-time lows need no scan).
+    """
+    conn.execute(PRICE_EVENTS_SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(price_history)")}
+    if "min_price_num" not in columns:
+        conn.execute("ALTER TABLE price_history ADD COLUMN min_price_num REAL")
+    conn.execute("""
+        UPDATE price_history SET min_price_num = (
+            SELECT MIN(price_num) FROM price_observations o WHERE o.product_id = price_history.id
         )
     """)
-    conn.commit()
-    conn.close()
+
+
+def init_db():
+    """Create or migrate the tracker schema. Products are keyed by their Flipkart pid."""
+    conn = connect_db()
+    conn.isolation_level = None  # explicit transaction, so DDL is rolled back too
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have just migrated
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            has_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_history'"
+            ).fetchone()
+            if has_table and version < 2:
+                _migrate_to_v2(conn)
+            conn.execute(PRICE_HISTORY_SCHEMA)
+            if version < 3:
+                _migrate_to_v3(conn)
+            if version < 4:
+                _migrate_to_v4(conn)
+            for sql in PRICE_HISTORY_INDEXES:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
 
 
 def clean_price_to_number(price_str):
@@ -80,251 +259,385 @@ def format_price_display(price_num):
         return str(price_num)
 
 
-def upsert_product(product):
+def price_remark(db_price_text, db_price_num, cur_price_text, cur_price_num):
+    """Remark for an existing product: increase/decrease with % change, 'Price Same' or 'Price Changed'."""
+    if db_price_num is not None and cur_price_num is not None:
+        if cur_price_num < db_price_num:
+            diff = db_price_num - cur_price_num
+            pct = (diff / db_price_num) * 100 if db_price_num else 0
+            return f"Price Decreased by ₹{int(round(diff))} ({pct:.1f}%)"
+        if cur_price_num > db_price_num:
+            diff = cur_price_num - db_price_num
+            pct = (diff / db_price_num) * 100 if db_price_num else 0
+            return f"Price Increased by ₹{int(round(diff))} ({pct:.1f}%)"
+        return "Price Same"
+    # If numeric compare not possible, fallback to text comparison
+    if str(cur_price_text) != str(db_price_text):
+        return "Price Changed"
+    return "Price Same"
+
+
+UPSERT_SQL = """
+    INSERT INTO price_history
+    (pid, title, link, old_price, old_price_num, current_price, current_price_num,
+     remark, last_checked, discount, rating, features, image, min_price_num)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?)
+    ON CONFLICT(pid) DO UPDATE SET
+        title = excluded.title,
+        link = excluded.link,
+        old_price = excluded.old_price,
+        old_price_num = excluded.old_price_num,
+        current_price = excluded.current_price,
+        current_price_num = excluded.current_price_num,
+        remark = excluded.remark,
+        last_checked = CURRENT_TIMESTAMP,
+        discount = excluded.discount,
+        rating = excluded.rating,
+        features = excluded.features,
+        image = excluded.image,
+        min_price_num = excluded.min_price_num
+"""
+
+
+# Appends an observation for a product looked up by pid (after its snapshot row exists)
+OBSERVATION_SQL = """
+    INSERT OR REPLACE INTO price_observations (product_id, ts, price_num)
+    SELECT id, ?, ? FROM price_history WHERE pid = ?
+"""
+
+EVENT_SQL = """
+    INSERT INTO price_events (product_id, ts, kind, old_price_num, new_price_num, delta, pct, all_time_low)
+    SELECT id, ?, ?, ?, ?, ?, ?, ? FROM price_history WHERE pid = ?
+"""
+
+
+def _price_event(pid, product, now, db_price_num, db_min_num, cur_price_num):
+    """Change event for a price that differs from the stored one (id filled in on insert)."""
+    if db_price_num is None:
+        kind, delta, pct = "new", None, None
+    else:
+        delta = round(cur_price_num - db_price_num, 2)
+        pct = round(delta / db_price_num * 100, 2) if db_price_num else None
+        kind = "decrease" if delta < 0 else "increase"
+    return {
+        "id": None, "pid": pid, "title": product.get("Title") or "", "link": product.get("Link") or "",
+        "ts": now, "kind": kind, "old_price": db_price_num, "new_price": cur_price_num,
+        "delta": delta, "pct": pct,
+        "all_time_low": db_min_num is not None and cur_price_num < db_min_num,
+    }
+
+
+def upsert_products(products, conn=None, on_commit=None):
     """
-    Insert new product or update existing by link.
-    Logic:
+    Insert or update a whole batch of scraped products (keyed by pid) in one
+    transaction. Existing rows are read with a single query, remarks are
+    computed in the same pass, and everything is written with one executemany.
+    Returns the remarks in the order of `products`.
+    Logic per product:
       - If product exists, compare numeric prices (current_price_num).
-      - If changed -> set old_price to previous current_price and update current_price.
+      - old_price becomes the previous current_price; current_price is the scraped one.
       - remark contains increase/decrease/% change or 'Price Same' or 'New Product'.
+      - a price_observations row is appended only when the price is new or changed,
+        together with a price_events row; min_price_num tracks the all-time low.
+    After the commit on_commit() is called, if given, and the events are
+    published to price_alerts.bus. A failed write is rolled back and raised;
+    neither hook runs then.
     """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
-    link = product.get("Link") or ""
-    title = product.get("Title") or ""
-    cur_price_text = product.get("PriceText") or product.get("Price") or "NA"
-    cur_price_num = clean_price_to_number(cur_price_text)
-    old_price_text_from_scrape = product.get("OldPriceText") or product.get("Old Price") or "NA"
-    old_price_num_from_scrape = clean_price_to_number(old_price_text_from_scrape)
-
-    discount = product.get("Discount", "")
-    rating = product.get("Rating", "")
-    image = product.get("Image", "")
-    features = product.get("Features", "")
-
-    remark = "New Product"
-
-    try:
-        c.execute("SELECT id, current_price, current_price_num FROM price_history WHERE title = ?", (title,))
-        row = c.fetchone()
+    if not products:
+        if on_commit:
+            on_commit()
+        return []
 
-        if row:
-            row_id, db_current_price_text, db_current_price_num = row
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_db()
+
+    pids = list({product_id(p.get("Link")) for p in products})
+    existing = {}
+    # Stay under SQLite's bound-parameter limit; each lookup is a probe of the pid index
+    for i in range(0, len(pids), 500):
+        chunk = pids[i:i + 500]
+        rows = conn.execute(
+            f"SELECT pid, current_price, current_price_num, min_price_num FROM price_history "
+            f"WHERE pid IN ({', '.join('?' * len(chunk))})", chunk
+        ).fetchall()
+        existing.update({pid: (text, num, low) for pid, text, num, low in rows})
+
+    remarks = []
+    params = []
+    observations = []
+    events = []
+    now = int(time.time())
+    for product in products:
+        link = product.get("Link") or ""
+        pid = product_id(link)
+        title = product.get("Title") or ""
+        cur_price_text = product.get("PriceText") or product.get("Price") or "NA"
+        cur_price_num = clean_price_to_number(cur_price_text)
+        discount = product.get("Discount", "")
+        rating = product.get("Rating", "")
+        image = product.get("Image", "")
+        features = product.get("Features", "")
+
+        db_price_num = None
+        db_min_num = None
+        if pid in existing:
+            db_current_price_text, db_current_price_num, db_min_num = existing[pid]
             db_price_num = clean_price_to_number(db_current_price_text) if db_current_price_text else db_current_price_num
-
-            # Compare DB numeric price and scraped numeric price
-            if db_price_num is not None and cur_price_num is not None:
-                if cur_price_num < db_price_num:
-                    diff = db_price_num - cur_price_num
-                    pct = (diff / db_price_num) * 100 if db_price_num else 0
-                    remark = f"Price Decreased by ₹{int(round(diff))} ({pct:.1f}%)"
-                elif cur_price_num > db_price_num:
-                    diff = cur_price_num - db_price_num
-                    pct = (diff / db_price_num) * 100 if db_price_num else 0
-                    remark = f"Price Increased by ₹{int(round(diff))} ({pct:.1f}%)"
-                else:
-                    remark = "Price Same"
-            else:
-                # If numeric compare not possible, fallback to text comparison
-                if str(cur_price_text) != str(db_current_price_text):
-                    remark = "Price Changed"
-                else:
-                    remark = "Price Same"
-
-            # If price changed, set old_price to previous DB current_price
-            new_old_price_text = db_current_price_text if db_current_price_text else (format_price_display(db_price_num) if db_price_num is not None else "NA")
-            new_old_price_num = db_price_num
-
-            # Update DB row with new current, and old set to previous current
-            c.execute("""
-                UPDATE price_history
-                SET title = ?, old_price = ?, old_price_num = ?, current_price = ?, current_price_num = ?,
-                    remark = ?, last_checked = CURRENT_TIMESTAMP,
-                    discount = ?, rating = ?, features = ?, image = ?
-                WHERE id = ?
-            """, (
-                title,
-                new_old_price_text,
-                new_old_price_num,
-                format_price_display(cur_price_num),
-                cur_price_num,
-                remark,
-                discount,
-                rating,
-                features,
-                image,
-                row_id
-            ))
+            remark = price_remark(db_current_price_text, db_price_num, cur_price_text, cur_price_num)
+            # old_price becomes the previous DB current_price
+            old_price_text = db_current_price_text if db_current_price_text else (format_price_display(db_price_num) if db_price_num is not None else "NA")
+            old_price_num = db_price_num
         else:
-            # Insert new product record
-            c.execute("""
-                INSERT INTO price_history
-                (title, link, old_price, old_price_num, current_price, current_price_num,
-                 remark, last_checked, discount, rating, features, image)
-                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?)
-            """, (
-                title,
-                link,
-                format_price_display(old_price_num_from_scrape) if old_price_num_from_scrape is not None else "NA",
-                old_price_num_from_scrape,
-                format_price_display(cur_price_num),
-                cur_price_num,
-                "New Product",
-                discount,
-                rating,
-                features,
-                image
-            ))
-
-        conn.commit()
+            remark = "New Product"
+            old_price_num = clean_price_to_number(product.get("OldPriceText") or product.get("Old Price") or "NA")
+            old_price_text = format_price_display(old_price_num) if old_price_num is not None else "NA"
+
+        min_num = db_min_num
+        if cur_price_num is not None and cur_price_num != db_price_num:
+            observations.append((now, cur_price_num, pid))
+            events.append(_price_event(pid, product, now, db_price_num, db_min_num, cur_price_num))
+            min_num = cur_price_num if db_min_num is None else min(db_min_num, cur_price_num)
+
+        # A later duplicate in the same batch compares against this one
+        existing[pid] = (format_price_display(cur_price_num), cur_price_num, min_num)
+        remarks.append(remark)
+        params.append((
+            pid, title, link, old_price_text, old_price_num,
+            format_price_display(cur_price_num), cur_price_num,
+            remark, discount, rating, features, image, min_num
+        ))
+
+    try:
+        with conn:
+            conn.executemany(UPSERT_SQL, params)
+            conn.executemany(OBSERVATION_SQL, observations)
+            for event in events:
+                cursor = conn.execute(EVENT_SQL, (
+                    event["ts"], event["kind"], event["old_price"], event["new_price"],
+                    event["delta"], event["pct"], int(event["all_time_low"]), event["pid"]
+                ))
+                event["id"] = cursor.lastrowid
     except Exception as e:
-        logging.exception(f"DB upsert failed for link {link}: {e}")
+        # Re-raised: the caller must not count this batch as saved
+        logging.error(f"DB batch upsert of {len(params)} products failed: {e}")
+        raise
     finally:
-        conn.close()
+        if own_conn:
+            conn.close()
 
-    return remark
+    if on_commit:
+        try:
+            on_commit()
+        except Exception:
+            logging.exception("on_commit after product upsert failed")
+
+    # Only committed changes reach subscribers
+    if events:
+        price_event_bus.publish(events)
+    return remarks
+
+
+def upsert_product(product, conn=None):
+    """Insert new product or update existing by pid (single-item upsert_products)."""
+    return upsert_products([product], conn=conn)[0]
 
 
 # --------------------------
 # Scraping helpers
 # --------------------------
-def safe_text(el):
-    return el.get_text(strip=True) if el else "NA"
+def parse_product(html, link, stats=None):
+    """Product dict from the HTML of a product page (see utils.extract for backends and selector profiles)."""
+    return extract_product(html, link, stats=stats)
+
+
+def check_selector_health(stats):
+    """Raise SelectorHealthError if a required field's recent hit rate has collapsed."""
+    for field in REQUIRED_FIELDS:
+        rate, seen = stats.recent_hit_rate(field)
+        if seen >= HIT_RATE_MIN_SAMPLE and rate < HIT_RATE_FLOOR:
+            raise SelectorHealthError(
+                f"Selector hit rate for '{field}' fell to {rate:.0%} over the last {seen} product pages; "
+                f"check the selector profiles in {selector_profiles.path}"
+            )
+
+
+def fetch_product_page(session, link, defer=False):
+    """
+    Conditional GET of a product page through the HTTP cache (a CachedResponse).
+    With defer, its fingerprint is only stored by _http_cache.remember().
+    """
+    return cached_get(session, link, _http_cache, headers=HEADERS, timeout=25, defer=defer,
+                      retries=FETCH_RETRIES, backoff=FETCH_BACKOFF, limiter=_limiter)
 
 
 def scrape_product_details(session, link):
-    """Scrape details from a single product link (sequential)."""
+    """Scrape details from a single product link."""
     try:
-        resp = session.get(link, headers=HEADERS, timeout=25)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
-
-        # Title (multiple possible selectors)
-        title_el = soup.select_one("span.VU-ZEz, span.B_NuCI, h1._2rI4yX")
-        title = safe_text(title_el) if title_el else "N/A"
-
-        # Current price: try new and old selectors
-        price_el = soup.select_one("div.Nx9bqj.CxhGGd")
-        price_text = safe_text(price_el) if price_el else "NA"
-
-        # Old price (strikethrough) if present
-        old_price_el = soup.select_one("div.yRaY8j.A6+E6v")
-        old_price_text = safe_text(old_price_el) if old_price_el else "NA"
-
-        # Discount
-        discount_el = soup.select_one("div._3Ay6Sb span, div.UkUFwK.WW8yVX")
-        discount = safe_text(discount_el) if discount_el else ""
-
-        # Rating
-        rating_el = soup.select_one("div.XQDdHH, div.Nwhkb3")
-        rating = safe_text(rating_el) if rating_el else "N/A"
-
-        # Image
-        image_el = soup.select_one("img._396cs4._2amPTt._3qGmMb, img.DByuf4")
-        image = image_el["src"] if image_el and image_el.has_attr("src") else ""
-
-        # Features/specs (robust selection)
-        # Features section - multiple selectors for safety
-        features_text = "NA"
-
-        # Each feature is inside <tr class="WJdYP6 row">
-        feature_rows = soup.select("tr.WJdYP6")
-
-        features = []
-        for row in feature_rows:
-            tds = row.find_all("td")
-            if len(tds) == 2:
-                key_text = tds[0].get_text(strip=True)
-                val_text = tds[1].get_text(strip=True)
-                features.append(f"{key_text}: {val_text}")
-
-        if features:
-            features_text = " | ".join(features)
-
-        product = {
-            "Title": title,
-            "PriceText": price_text,
-            "OldPriceText": old_price_text,
-            "Price": price_text,         # for compatibility
-            "Old Price": old_price_text, # compatibility
-            "Discount": discount,
-            "Rating": rating,
-            "Image": image,
-            "Features": features_text,
-            "Link": link
-        }
-        return product
-
+        return parse_product(fetch_product_page(session, link).content, link)
     except Exception as e:
         logging.exception(f"Failed scraping link {link}: {e}")
         return None
 
 
-def scrape_page_links(session, url):
+def scrape_page_links(session, url, stats=None):
     """Return list of product links for the given page (deduped)."""
     try:
-        resp = session.get(url, headers=HEADERS, timeout=20)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
-
-        # Many Flipkart product anchors: support multiple possible classes
-        hrefs = set()
-        for tag in soup.select("a.CGtC98, a._1fQZEK, a.IRpwTa, a._2rpwqI"):
-            href = tag.get("href")
-            if href:
-                full = "https://www.flipkart.com" + href if href.startswith("/") else href
-                hrefs.add(full)
-
-        return list(hrefs)
+        # A 304 still needs the links, so the cached body is parsed
+        page = cached_get(session, url, _http_cache, headers=HEADERS, timeout=20,
+                          retries=FETCH_RETRIES, backoff=FETCH_BACKOFF, limiter=_limiter)
+
+        # Keyed by pid: the same product can appear with different tracking params
+        hrefs = {}
+        for full in extract_links(page.content, url, stats=stats):
+            hrefs.setdefault(product_id(full), full)
+
+        return list(hrefs.values())
     except Exception as e:
         logging.exception(f"Failed to load page {url}: {e}")
         return []
 
 
 # --------------------------
-# Main flow (sequential per product)
+# Main flow (concurrent fetch, single DB writer)
 # --------------------------
-def scrape_flipkart(base_url, max_pages=1, save_csv=False):
-    init_db()
-    session = requests.Session()
-    all_products = []
-    page_scraped = 0
+def _fetch_product(link, stats=None):
+    """
+    (link, product, page) for one product link. product is None with a page
+    when the page fingerprint is unchanged (parsing deferred), None with no
+    page when the fetch failed. The page's fingerprint is not stored yet:
+    the writer does that once the product is committed.
+    """
+    try:
+        page = fetch_product_page(thread_session(), link, defer=True)
+        if page.unchanged:
+            return link, None, page
+        return link, parse_product(page.content, link, stats), page
+    except Exception as e:
+        logging.exception(f"Failed scraping link {link}: {e}")
+        return link, None, None
 
-    for page in range(1, max_pages + 1):
-        # build page url: if base_url already contains page param, replace; else append &page=
-        if "page=" in base_url:
-            page_url = re.sub(r"page=\d+", f"page={page}", base_url)
-        else:
-            sep = "&" if "?" in base_url else "?"
-            page_url = f"{base_url}{sep}page={page}"
 
-        logging.info(f"Fetching product links from page {page}: {page_url}")
-        links = scrape_page_links(session, page_url)
-        page_scraped = page
+def _remember_pages(pages):
+    for page in pages:
+        _http_cache.remember(page)
+
 
-        if not links:
-            logging.info("No products found on this page. Stopping.")
-            break
+def _known_pids(conn, pids):
+    known = set()
+    for i in range(0, len(pids), 500):
+        chunk = pids[i:i + 500]
+        rows = conn.execute(f"SELECT pid FROM price_history WHERE pid IN ({', '.join('?' * len(chunk))})", chunk)
+        known.update(pid for pid, in rows)
+    return known
 
-        logging.info(f"Found {len(links)} links on page {page}. Processing sequentially...")
 
-        # Sequential processing per link (scrape -> update DB -> next)
-        for idx, link in enumerate(links, start=1):
-            logging.info(f"[Page {page} | {idx}/{len(links)}] Scraping: {link}")
-            product = scrape_product_details(session, link)
-            if not product:
-                logging.warning(f"Skipping link due to scrape failure: {link}")
-                continue
+def scrape_flipkart(base_url, max_pages=1, save_csv=False, workers=DEFAULT_WORKERS,
+                    start_page=1, cancel=None, on_page=None):
+    """
+    Product pages of each listing page are fetched by a pool of `workers`
+    threads (per-host rate limit, retry with backoff); results are persisted
+    by this thread only, one transaction per page. workers=1 is fully sequential.
 
-            remark = upsert_product(product)
-            product["Remark"] = remark
-            product["ScrapeTime"] = datetime.now().isoformat()
-            all_products.append(product)
+    For background jobs: crawling starts at `start_page`, stops early once the
+    `cancel` event is set (a page cut short is not saved, so it can be redone),
+    and on_page(page, products) is called after each page is committed.
 
-            # Logging only when price changed or new
-            if remark and remark != "Price Same":
-                logging.info(f"{remark} -> {product.get('Title','N/A')} | {product.get('PriceText')} | {link}")
+    Raises SelectorHealthError, before saving the page, once the selectors
+    stop matching most product pages.
+    """
+    init_db()
+    session = requests.Session()
+    all_products = []
+    page_scraped = 0
+    last_page = start_page - 1   # last page fully committed
+    cancelled = False
+    unchanged_total = 0
+    stats = SelectorStats()
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    conn = connect_db()
+
+    try:
+        for page in range(start_page, max_pages + 1):
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+
+            # build page url: if base_url already contains page param, replace; else append &page=
+            if "page=" in base_url:
+                page_url = re.sub(r"page=\d+", f"page={page}", base_url)
+            else:
+                sep = "&" if "?" in base_url else "?"
+                page_url = f"{base_url}{sep}page={page}"
+
+            logging.info(f"Fetching product links from page {page}: {page_url}")
+            links = scrape_page_links(session, page_url, stats)
+            page_scraped = page
+
+            if not links:
+                logging.info("No products found on this page. Stopping.")
+                break
+
+            logging.info(f"Found {len(links)} links on page {page}. Fetching with {workers} workers...")
+
+            page_products = []
+            saved_pages = []   # fingerprints to store once this page's write commits
+            unchanged = {}   # link -> cached page, for pages identical to the last fetch
+            futures = [pool.submit(_fetch_product, link, stats) for link in links]
+            for idx, future in enumerate(as_completed(futures), start=1):
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                link, product, fetched = future.result()
+                if product is None and fetched is not None:
+                    unchanged[link] = fetched
+                    continue
+                if not product:
+                    logging.warning(f"Skipping link due to scrape failure: {link}")
+                    continue
+                page_products.append(product)
+                saved_pages.append(fetched)
+                logging.info(f"[Page {page} | {idx}/{len(links)}] Scraped: {link}")
+
+            if cancelled:
+                for f in futures:
+                    f.cancel()
+                break
+
+            if unchanged:
+                # Skip only products the DB already has (it may be newer than the cache)
+                known = _known_pids(conn, [product_id(link) for link in unchanged])
+                for link, fetched in unchanged.items():
+                    if product_id(link) in known:
+                        unchanged_total += 1
+                        saved_pages.append(fetched)
+                        continue
+                    product = parse_product(fetched.content, link, stats)
+                    if product:
+                        page_products.append(product)
+                        saved_pages.append(fetched)
+                logging.info(f"Page {page}: {len(unchanged)} product pages unchanged since last fetch")
+
+            check_selector_health(stats)
+
+            # Single writer: only this thread touches the DB, one transaction per page.
+            # A failed write raises here, so last_page never moves past an unsaved page.
+            remarks = upsert_products(page_products, conn=conn, on_commit=lambda: _remember_pages(saved_pages))
+            for product, remark in zip(page_products, remarks):
+                product["Remark"] = remark
+                product["ScrapeTime"] = datetime.now().isoformat()
+                all_products.append(product)
+
+                # Logging only when price changed or new
+                if remark and remark != "Price Same":
+                    logging.info(f"{remark} -> {product.get('Title','N/A')} | {product.get('PriceText')} | {product.get('Link')}")
+
+            last_page = page
+            if on_page:
+                on_page(page, page_products)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        conn.close()
 
     # Save CSV summary if requested
     if save_csv and all_products:
@@ -336,12 +649,14 @@ def scrape_flipkart(base_url, max_pages=1, save_csv=False):
         csv_path = None
 
     logging.info(f"Completed scraping. Pages scraped: {page_scraped}, products processed: {len(all_products)}")
-    return {"count": len(all_products), "db": DB_FILE, "csv": csv_path, "pages": page_scraped}
+    return {"count": len(all_products), "db": DB_FILE, "csv": csv_path, "pages": page_scraped,
+            "last_page": last_page, "cancelled": cancelled, "unchanged": unchanged_total,
+            "selectors": stats.snapshot()}
 
 
 def get_all_products():
     """Return all products from DB as a list of dicts"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = connect_db()
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     c.execute("SELECT * FROM price_history ORDER BY last_checked DESC")
@@ -365,6 +680,265 @@ def get_all_products():
     return products
 
 
+# --------------------------
+# Paginated product listing
+# --------------------------
+# API field name -> price_history column (same names get_all_products uses)
+PRODUCT_FIELDS = {
+    "pid": "pid",
+    "Title": "title",
+    "Price": "current_price",
+    "Old Price": "old_price",
+    "Discount": "discount",
+    "Rating": "rating",
+    "Features": "features",
+    "Image": "image",
+    "Link": "link",
+    "Remark": "remark",
+    "ScrapeTime": "last_checked",
+}
+
+# remark filter -> LIKE pattern on the stored remark
+REMARK_FILTERS = {
+    "new": "New Product",
+    "decreased": "Price Decreased%",
+    "increased": "Price Increased%",
+    "same": "Price Same",
+    "changed": "Price Changed",
+}
+
+
+def encode_cursor(last_checked, row_id):
+    raw = json.dumps([last_checked, row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_checked, row_id = json.loads(raw)
+        return str(last_checked), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def iter_products(fields=None, cursor=None, limit=100, min_price=None, max_price=None,
+                  remark=None, min_rating=None, q=None):
+    """
+    Iterator of ((last_checked, id), product) for up to `limit` products,
+    newest first, starting after `cursor`. Bad arguments raise ValueError
+    up front, before any row is read. Keyset pagination on (last_checked, id)
+    walks the last_checked index, so every page costs the same however deep
+    it is. `fields` is a subset of PRODUCT_FIELDS (default: all of them).
+    """
+    fields = list(fields or PRODUCT_FIELDS)
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if remark is not None and remark not in REMARK_FILTERS:
+        raise ValueError(f"remark must be one of: {', '.join(REMARK_FILTERS)}")
+
+    where, params = [], []
+    if cursor:
+        where.append("(last_checked, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+    if min_price is not None:
+        where.append("current_price_num >= ?")
+        params.append(min_price)
+    if max_price is not None:
+        where.append("current_price_num <= ?")
+        params.append(max_price)
+    if remark is not None:
+        where.append("remark LIKE ?")
+        params.append(REMARK_FILTERS[remark])
+    if min_rating is not None:
+        where.append("CAST(rating AS REAL) >= ?")
+        params.append(min_rating)
+    if q:
+        where.append("instr(lower(title), lower(?)) > 0")
+        params.append(q)
+
+    columns = ", ".join(PRODUCT_FIELDS[f] for f in fields)
+    sql = f"SELECT last_checked, id, {columns} FROM price_history"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY last_checked DESC, id DESC LIMIT ?"
+    params.append(limit)
+    return _iter_rows(sql, params, fields)
+
+
+def _iter_rows(sql, params, fields):
+    conn = connect_db()
+    try:
+        for row in conn.execute(sql, params):
+            yield (row[0], row[1]), dict(zip(fields, row[2:]))
+    finally:
+        conn.close()
+
+
+# --------------------------
+# Price history queries
+# --------------------------
+BUCKET_SECONDS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+MAX_BUCKETS = 5000
+
+
+def price_series(pid, start=None, end=None, bucket=None, conn=None):
+    """
+    Price history of one product between epoch seconds `start` and `end`.
+    bucket=None returns the raw change points; "hour"/"day"/"week" downsamples
+    to min/max/last per bucket (UTC-aligned), carrying the price forward
+    through buckets without a change. Returns None for an unknown pid.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_db()
+    try:
+        row = conn.execute("SELECT id FROM price_history WHERE pid = ?", (pid,)).fetchone()
+        if row is None:
+            return None
+        product_id = row[0]
+        end = int(end if end is not None else time.time())
+        if start is None:
+            first = conn.execute("SELECT MIN(ts) FROM price_observations WHERE product_id = ?",
+                                 (product_id,)).fetchone()[0]
+            start = first if first is not None else end
+        start = int(start)
+
+        # Price in effect when the range opens
+        before = conn.execute(
+            "SELECT price_num FROM price_observations WHERE product_id = ? AND ts < ? "
+            "ORDER BY ts DESC LIMIT 1", (product_id, start)
+        ).fetchone()
+        carry = before[0] if before else None
+        rows = conn.execute(
+            "SELECT ts, price_num FROM price_observations WHERE product_id = ? AND ts BETWEEN ? AND ? "
+            "ORDER BY ts", (product_id, start, end)
+        ).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    result = {"pid": pid, "start": start, "end": end, "bucket": bucket or "raw", "start_price": carry}
+    if not bucket:
+        result["points"] = [{"ts": ts, "price": price} for ts, price in rows]
+        return result
+
+    size = BUCKET_SECONDS[bucket]
+    first_bucket = start - start % size
+    if (end - first_bucket) // size >= MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_BUCKETS} {bucket} buckets")
+
+    points = []
+    i = 0
+    for b in range(first_bucket, end + 1, size):
+        low = high = last = carry
+        while i < len(rows) and rows[i][0] < b + size:
+            price = rows[i][1]
+            low = price if low is None else min(low, price)
+            high = price if high is None else max(high, price)
+            last = price
+            i += 1
+        if last is None:
+            continue  # no price known yet
+        points.append({"ts": b, "min": low, "max": high, "last": last})
+        carry = last
+    result["points"] = points
+    return result
+
+
+def price_drops(days=30, min_pct=0.0, limit=50, conn=None):
+    """
+    Products whose current price is below the price in effect `days` ago
+    (or their first observed price, if tracked for less), biggest % drop first.
+    One primary-key seek per product, so it never scans the observation log.
+    """
+    since = int(time.time()) - int(days * 86400)
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_db()
+    try:
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        rows = cur.execute("""
+            SELECT pid, title, link, current_price, current_price_num, start_price,
+                   (start_price - current_price_num) * 100.0 / start_price AS drop_pct
+            FROM (
+                SELECT h.pid, h.title, h.link, h.current_price, h.current_price_num,
+                       COALESCE(
+                           (SELECT o.price_num FROM price_observations o
+                            WHERE o.product_id = h.id AND o.ts <= ? ORDER BY o.ts DESC LIMIT 1),
+                           (SELECT o.price_num FROM price_observations o
+                            WHERE o.product_id = h.id ORDER BY o.ts LIMIT 1)
+                       ) AS start_price
+                FROM price_history h
+                WHERE h.current_price_num IS NOT NULL
+            )
+            WHERE start_price > current_price_num
+              AND (start_price - current_price_num) * 100.0 / start_price >= ?
+            ORDER BY drop_pct DESC
+            LIMIT ?
+        """, (since, min_pct, limit)).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+    return [dict(row) for row in rows]
+
+
+def last_price_event_id():
+    """Id of the newest stored price event (0 if none)."""
+    conn = connect_db()
+    try:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM price_events").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def get_price_events(after_id=None, limit=100, rule=None, conn=None):
+    """
+    Stored change events with id > after_id, oldest first, in the same shape
+    as the ones published live. `rule` (a price_alerts.AlertRule) applies the
+    same thresholds as a live subscription, in SQL.
+    """
+    where = ["e.id > ?"]
+    params = [after_id or 0]
+    if rule is not None:
+        where.append(f"e.kind IN ({', '.join('?' * len(rule.kinds))})")
+        params.extend(sorted(rule.kinds))
+        if rule.pid is not None:
+            where.append("h.pid = ?")
+            params.append(rule.pid)
+        if rule.all_time_low:
+            where.append("e.all_time_low = 1")
+        if rule.min_drop is not None:
+            where.append("ABS(e.delta) >= ?")
+            params.append(rule.min_drop)
+        if rule.min_pct is not None:
+            where.append("ABS(e.pct) >= ?")
+            params.append(rule.min_pct)
+    params.append(limit)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_db()
+    try:
+        rows = conn.execute(f"""
+            SELECT e.id, h.pid, h.title, h.link, e.ts, e.kind, e.old_price_num, e.new_price_num,
+                   e.delta, e.pct, e.all_time_low
+            FROM price_events e JOIN price_history h ON h.id = e.product_id
+            WHERE {' AND '.join(where)}
+            ORDER BY e.id
+            LIMIT ?
+        """, params).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+    return [
+        {"id": id_, "pid": pid, "title": title, "link": link, "ts": ts, "kind": kind,
+         "old_price": old, "new_price": new, "delta": delta, "pct": pct, "all_time_low": bool(low)}
+        for id_, pid, title, link, ts, kind, old, new, delta, pct, low in rows
+    ]
 
 
 if __name__ == "__main__":
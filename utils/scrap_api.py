@@ -0,0 +1,371 @@
+# utils/scrap_api.py
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from . import price_alerts, scrap, scrap_jobs
+
+router = APIRouter(prefix="/scrap", tags=["Price tracker"])
+
+
+def _epoch(value: Optional[datetime]):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+# ---------------------------
+# Product listing
+# ---------------------------
+MAX_PAGE_SIZE = 1000
+PRODUCT_CHUNK = 200   # rows read per threadpool call while a page streams
+
+
+async def _stream_page(read, first, requested, limit):
+    """
+    JSON body written chunk by chunk: {"items": [...], "count": n, "next_cursor": ...}.
+    `first` is the first chunk, read with `requested` rows; read(cursor, n)
+    fetches the next n rows in one threadpool call. Each read asks for at
+    most one row past the page, which tells whether there is a next page.
+    """
+    yield '{"items":['
+    count = 0
+    chunk = first
+    last_key = None
+    next_cursor = None
+    while True:
+        page = chunk[:limit - count]
+        if page:
+            yield ("," if count else "") + ",".join(json.dumps(item, ensure_ascii=False) for _, item in page)
+            count += len(page)
+            last_key = page[-1][0]
+        if len(chunk) > len(page):
+            next_cursor = scrap.encode_cursor(*last_key)
+            break
+        if len(chunk) < requested:
+            break
+        requested = min(PRODUCT_CHUNK, limit - count + 1)
+        chunk = await run_in_threadpool(read, scrap.encode_cursor(*last_key), requested)
+    yield f'],"count":{count},"next_cursor":{json.dumps(next_cursor)}}}'
+
+
+@router.get("/products", summary="Tracked products, newest first, with keyset pagination")
+async def list_products(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    remark: Optional[str] = Query(None, description="new | decreased | increased | same | changed"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    q: Optional[str] = Query(None, description="Text to find in the title"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset, e.g. Title,Price,Link"),
+):
+    wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+    def read(after, n):
+        # The query is built, drained and closed in one threadpool call, so every
+        # sqlite step runs on the thread that opened the connection
+        return list(scrap.iter_products(wanted, after, n, min_price, max_price, remark, min_rating, q))
+
+    requested = min(PRODUCT_CHUNK, limit + 1)
+    try:
+        # Reading the first chunk up front also turns bad arguments into a 400
+        first = await run_in_threadpool(read, cursor, requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(_stream_page(read, first, requested, limit), media_type="application/json")
+
+
+# ---------------------------
+# Price history
+# ---------------------------
+@router.get("/history/{pid}", summary="Price history of one product")
+async def product_history(
+    pid: str,
+    start: Optional[datetime] = Query(None, description="ISO date/time or epoch seconds; default first observation"),
+    end: Optional[datetime] = Query(None, description="ISO date/time or epoch seconds; default now"),
+    bucket: str = Query("raw", pattern="^(raw|hour|day|week)$",
+                        description="raw change points, or min/max/last per hour/day/week"),
+):
+    try:
+        series = await run_in_threadpool(
+            scrap.price_series, pid, _epoch(start), _epoch(end), None if bucket == "raw" else bucket
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if series is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return series
+
+
+@router.get("/price-drops", summary="Products that got cheaper over the last N days")
+async def price_drops(
+    days: float = Query(30, gt=0, le=3650),
+    min_pct: float = Query(0, ge=0, le=100),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    drops = await run_in_threadpool(scrap.price_drops, days, min_pct, limit)
+    return {"days": days, "count": len(drops), "products": drops}
+
+
+# ---------------------------
+# Background crawl jobs
+# ---------------------------
+MAX_CRAWL_PAGES = 200
+SSE_POLL_INTERVAL = 0.5   # seconds between checks for job updates
+SSE_KEEPALIVE = 15        # seconds of silence before a keep-alive comment
+
+
+class CrawlJobRequest(BaseModel):
+    url: str = Field(..., description="Flipkart search URL")
+    pages: int = Field(1, ge=1, le=MAX_CRAWL_PAGES)
+    workers: int = Field(scrap.DEFAULT_WORKERS, ge=1, le=32)
+
+
+def _job_links(job):
+    job_id = job["id"]
+    return {**job, "status_url": f"/scrap/jobs/{job_id}", "events_url": f"/scrap/jobs/{job_id}/events"}
+
+
+@router.post("/jobs", summary="Start a background multi-page crawl")
+def start_crawl_job(payload: CrawlJobRequest, background_tasks: BackgroundTasks):
+    """A crawl of the same URL that is still queued or running is returned instead of starting another."""
+    job, started = scrap_jobs.start_job(payload.url, payload.pages, payload.workers)
+    if started:
+        background_tasks.add_task(scrap_jobs.run_job, job["id"])
+    return {**_job_links(job), "coalesced": not started}
+
+
+@router.get("/jobs", summary="Recent crawl jobs")
+def list_crawl_jobs(limit: int = Query(50, ge=1, le=500)):
+    return {"jobs": [_job_links(job) for job in scrap_jobs.list_jobs(limit)]}
+
+
+@router.get("/jobs/{job_id}", summary="Crawl job status and progress")
+def crawl_job_status(job_id: str):
+    job = scrap_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_links(job)
+
+
+@router.post("/jobs/{job_id}/cancel", summary="Stop a crawl job after the page in flight")
+def cancel_crawl_job(job_id: str):
+    try:
+        job = scrap_jobs.cancel_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_links(job)
+
+
+@router.post("/jobs/{job_id}/resume", summary="Continue a stopped crawl job from its last completed page")
+def resume_crawl_job(job_id: str, background_tasks: BackgroundTasks):
+    try:
+        job = scrap_jobs.resume_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    background_tasks.add_task(scrap_jobs.run_job, job_id)
+    return _job_links(job)
+
+
+@router.get("/jobs/{job_id}/events", summary="Server-sent events with the job's progress")
+async def crawl_job_events(job_id: str, request: Request):
+    """
+    text/event-stream: a `progress` event with the job row on every update
+    (pages done, products processed, price changes), ending once the job stops.
+    """
+    if await run_in_threadpool(scrap_jobs.get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        seen = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            version = scrap_jobs.job_version(job_id)
+            if version != seen:
+                seen = version
+                job = await run_in_threadpool(scrap_jobs.get_job, job_id)
+                yield f"event: progress\ndata: {json.dumps(job)}\n\n"
+                last_sent = time.monotonic()
+                if job["status"] not in scrap_jobs.ACTIVE:
+                    break
+            elif time.monotonic() - last_sent > SSE_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ---------------------------
+# Price change events and alerts
+# ---------------------------
+REPLAY_PAGE = 500   # stored events read per query while an alert feed replays or catches up
+
+
+def _alert_rule(kinds, min_drop, min_pct, all_time_low, pid):
+    return price_alerts.AlertRule(
+        kinds=[k.strip() for k in kinds.split(",") if k.strip()],
+        min_drop=min_drop, min_pct=min_pct, all_time_low=all_time_low, pid=pid,
+    )
+
+
+def alert_rule(
+    kinds: str = Query("decrease", description="Comma-separated: new, decrease, increase"),
+    min_drop: Optional[float] = Query(None, ge=0, description="Minimum change in rupees"),
+    min_pct: Optional[float] = Query(None, ge=0, description="Minimum change in percent"),
+    all_time_low: bool = Query(False, description="Only prices below every earlier observation"),
+    pid: Optional[str] = Query(None, description="Only this product"),
+):
+    try:
+        return _alert_rule(kinds, min_drop, min_pct, all_time_low, pid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/events", summary="Stored price change events, oldest first")
+async def list_price_events(
+    after_id: int = Query(0, ge=0, description="last_id from the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    rule: price_alerts.AlertRule = Depends(alert_rule),
+):
+    events = await run_in_threadpool(scrap.get_price_events, after_id, limit, rule)
+    return {"events": events, "count": len(events), "last_id": events[-1]["id"] if events else after_id}
+
+
+async def _stored_events(rule, after_id):
+    """Every stored event after after_id, REPLAY_PAGE at a time, until caught up."""
+    while True:
+        page = await run_in_threadpool(scrap.get_price_events, after_id, REPLAY_PAGE, rule)
+        for event in page:
+            after_id = event["id"]
+            yield event
+        if len(page) < REPLAY_PAGE:
+            return
+
+
+async def _alert_feed(rule, after_id):
+    """
+    ("price", event) for the stored events after `after_id` (default: the
+    newest one now), then for live ones as they are committed; None while
+    idle. The subscription starts before the replay, so nothing committed
+    in between is lost; events already sent are skipped. When the live
+    queue overflowed, ("dropped", {"dropped", "after_id"}) is sent and the
+    missed events are read back from price_events before going live again.
+    """
+    if after_id is None:
+        after_id = await run_in_threadpool(scrap.last_price_event_id)
+    sub = price_alerts.bus.subscribe(rule)
+    try:
+        last_id = after_id
+        dropped = 0
+        catch_up = True
+        while True:
+            if catch_up:
+                async for event in _stored_events(rule, last_id):
+                    last_id = event["id"]
+                    yield "price", event
+                catch_up = False
+            event = await sub.get(SSE_KEEPALIVE)
+            if sub.dropped > dropped:
+                # Events older than this one were lost: re-read everything after
+                # the last one sent, this one included
+                yield "dropped", {"dropped": sub.dropped - dropped, "after_id": last_id}
+                dropped = sub.dropped
+                catch_up = True
+            elif event is None:
+                yield None   # idle: time for a keep-alive
+            elif event["id"] > last_id:
+                last_id = event["id"]
+                yield "price", event
+    finally:
+        price_alerts.bus.unsubscribe(sub)
+
+
+@router.get("/alerts", summary="Server-sent events for price changes matching the thresholds")
+async def price_alert_stream(
+    request: Request,
+    after_id: Optional[int] = Query(None, ge=0, description="Replay stored events after this id first"),
+    rule: price_alerts.AlertRule = Depends(alert_rule),
+):
+    """
+    text/event-stream: one `price` event per matching change, with the event
+    id as the SSE id, so a reconnecting EventSource resumes from Last-Event-ID.
+    A `dropped` event ({"dropped": n, "after_id": id}) means the client fell
+    behind the live feed; the missed events follow, read back from storage
+    (/scrap/events?after_id=id serves the same).
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        after_id = int(last_event_id)
+
+    async def stream():
+        feed = _alert_feed(rule, after_id)
+        try:
+            async for item in feed:
+                if await request.is_disconnected():
+                    break
+                if item is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                kind, data = item
+                if kind == "price":
+                    yield f"id: {data['id']}\nevent: price\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                else:
+                    yield f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            await feed.aclose()
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/alerts/ws")
+async def price_alert_socket(
+    websocket: WebSocket,
+    after_id: Optional[int] = None,
+    kinds: str = "decrease",
+    min_drop: Optional[float] = None,
+    min_pct: Optional[float] = None,
+    all_time_low: bool = False,
+    pid: Optional[str] = None,
+):
+    """Same feed as /scrap/alerts, one JSON message per event; a {"type": "dropped", ...} message marks a gap."""
+    try:
+        rule = _alert_rule(kinds, min_drop, min_pct, all_time_low, pid)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    await websocket.accept()
+    feed = _alert_feed(rule, after_id)
+    # Nothing is sent while idle, so watch for the client going away separately
+    receiver = asyncio.create_task(websocket.receive())
+    try:
+        async for item in feed:
+            if receiver.done():
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.create_task(websocket.receive())
+            if item is None:
+                continue
+            kind, data = item
+            await websocket.send_json(data if kind == "price" else {"type": kind, **data})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        await feed.aclose()
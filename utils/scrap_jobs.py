@@ -0,0 +1,429 @@
+# utils/scrap_jobs.py
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from . import scrap
+
+# A job's row in crawl_jobs is updated after every committed page, so a run
+# that is cancelled or killed can continue from last_page + 1. owner is the
+# "host:pid" running the job, which refreshes heartbeat_at while it lives.
+CRAWL_JOBS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS crawl_jobs (
+        id TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        max_pages INTEGER NOT NULL,
+        workers INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        last_page INTEGER NOT NULL DEFAULT 0,
+        products INTEGER NOT NULL DEFAULT 0,
+        changes INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        owner TEXT,
+        heartbeat_at REAL
+    )
+"""
+
+ACTIVE = {"queued", "running", "cancelling"}
+RESUMABLE = {"cancelled", "failed", "interrupted"}
+JOB_FIELDS = ("id", "url", "max_pages", "workers", "status", "last_page", "products",
+              "changes", "error", "created_at", "updated_at")
+
+WAIT_POLL = 1.0        # seconds between status reads while waiting on a job
+HEARTBEAT_EVERY = 30.0  # seconds between heartbeats of the jobs this process owns
+STALE_AFTER = 120.0     # seconds without a heartbeat before a job counts as abandoned
+RECOVER_EVERY = 30.0    # seconds between checks for abandoned jobs
+
+
+# Remarks that count as a price change in the job progress
+CHANGE_PREFIXES = ("Price Increased", "Price Decreased", "Price Changed")
+
+_cancel_events = {}   # job_id -> threading.Event, for jobs running in this process
+_versions = {}        # job_id -> counter bumped on every update (SSE listeners poll it)
+_lock = threading.Lock()
+_schema_ready = False
+_next_recovery = 0.0
+_heartbeat = None
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _owner():
+    # Read per call: a forked worker must not claim jobs under its parent's pid
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _connect():
+    """Tracker DB with crawl_jobs; every RECOVER_EVERY seconds, abandoned jobs are marked interrupted."""
+    global _schema_ready, _next_recovery
+    conn = scrap.connect_db()
+    with _lock:
+        if not _schema_ready:
+            with conn:
+                conn.execute(CRAWL_JOBS_SCHEMA)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(crawl_jobs)")}
+                for name, decl in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                    if name not in columns:
+                        conn.execute(f"ALTER TABLE crawl_jobs ADD COLUMN {name} {decl}")
+            _schema_ready = True
+        recover = time.monotonic() >= _next_recovery
+        if recover:
+            _next_recovery = time.monotonic() + RECOVER_EVERY
+    if recover:
+        _recover(conn)
+    return conn
+
+
+def _owner_gone(job_id, owner):
+    """True when owner is a process on this host that is no longer running the job."""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        with _lock:
+            return job_id not in _cancel_events
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass   # exists, owned by another user
+    return False
+
+
+def _recover(conn):
+    """
+    Mark active jobs interrupted when their owner process has exited or has
+    sent no heartbeat for STALE_AFTER seconds. Jobs run by other live
+    workers keep going.
+    """
+    stale_before = time.time() - STALE_AFTER
+    rows = conn.execute(f"SELECT id, owner, heartbeat_at FROM crawl_jobs "
+                        f"WHERE status IN ({', '.join('?' * len(ACTIVE))})", tuple(ACTIVE)).fetchall()
+    gone = [job_id for job_id, owner, beat in rows
+            if beat is None or beat < stale_before or _owner_gone(job_id, owner)]
+    if not gone:
+        return
+    with conn:
+        conn.executemany(
+            f"UPDATE crawl_jobs SET status = 'interrupted', updated_at = ? "
+            f"WHERE id = ? AND status IN ({', '.join('?' * len(ACTIVE))})",
+            [(_now(), job_id, *ACTIVE) for job_id in gone],
+        )
+    with _lock:
+        for job_id in gone:
+            _versions[job_id] = _versions.get(job_id, 0) + 1
+    logging.warning(f"Marked {len(gone)} crawl job(s) interrupted: their process is gone")
+
+
+def _cancel_requested(conn, job_ids):
+    """Set the cancel event of every job in job_ids that another process asked to stop."""
+    if not job_ids:
+        return
+    rows = conn.execute(f"SELECT id FROM crawl_jobs WHERE status = 'cancelling' "
+                        f"AND id IN ({', '.join('?' * len(job_ids))})", tuple(job_ids)).fetchall()
+    with _lock:
+        for (job_id,) in rows:
+            event = _cancel_events.get(job_id)
+            if event is not None:
+                event.set()
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(HEARTBEAT_EVERY)
+        with _lock:
+            job_ids = list(_cancel_events)
+        if not job_ids:
+            continue
+        conn = scrap.connect_db()
+        try:
+            with conn:
+                conn.executemany("UPDATE crawl_jobs SET heartbeat_at = ? WHERE id = ? AND owner = ?",
+                                 [(time.time(), job_id, _owner()) for job_id in job_ids])
+            _cancel_requested(conn, job_ids)
+        except sqlite3.Error:
+            logging.exception("Crawl job heartbeat failed")
+        finally:
+            conn.close()
+
+
+def _start_heartbeat():
+    global _heartbeat
+    with _lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_heartbeat_loop, name="crawl-job-heartbeat", daemon=True)
+            _heartbeat.start()
+
+
+def _reset_after_fork():
+    # The child inherits neither the parent's jobs nor its heartbeat thread
+    global _heartbeat
+    _cancel_events.clear()
+    _heartbeat = None
+
+
+if hasattr(os, "register_at_fork"):   # not on Windows
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _claim(job_id):
+    """Register job_id (just queued) as owned by this process, with a fresh cancel event."""
+    with _lock:
+        _cancel_events[job_id] = threading.Event()
+    _start_heartbeat()
+
+
+def _update(job_id, **fields):
+    fields["updated_at"] = _now()
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                f"UPDATE crawl_jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+    finally:
+        conn.close()
+    with _lock:
+        _versions[job_id] = _versions.get(job_id, 0) + 1
+
+
+def get_job(job_id):
+    conn = _connect()
+    try:
+        row = conn.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM crawl_jobs WHERE id = ?",
+                           (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(zip(JOB_FIELDS, row)) if row else None
+
+
+def list_jobs(limit=50):
+    conn = _connect()
+    try:
+        rows = conn.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM crawl_jobs "
+                            f"ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(JOB_FIELDS, row)) for row in rows]
+
+
+def _active_job(conn, url, statuses=("queued", "running")):
+    row = conn.execute(
+        f"SELECT {', '.join(JOB_FIELDS)} FROM crawl_jobs WHERE url = ? "
+        f"AND status IN ({', '.join('?' * len(statuses))}) ORDER BY created_at DESC LIMIT 1",
+        (url, *statuses),
+    ).fetchone()
+    return dict(zip(JOB_FIELDS, row)) if row else None
+
+
+def active_job(url):
+    """The newest queued/running job for url (not one being cancelled), or None."""
+    conn = _connect()
+    try:
+        return _active_job(conn, url)
+    finally:
+        conn.close()
+
+
+def job_version(job_id):
+    with _lock:
+        return _versions.get(job_id, 0)
+
+
+# ---------------------------
+# Lifecycle
+# ---------------------------
+def _insert_job(conn, url, max_pages, workers):
+    job_id = uuid.uuid4().hex
+    now = _now()
+    conn.execute(
+        "INSERT INTO crawl_jobs (id, url, max_pages, workers, status, created_at, updated_at, owner, heartbeat_at) "
+        "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)", (job_id, url, max_pages, workers, now, now, _owner(), time.time())
+    )
+    return job_id
+
+
+def create_job(url, max_pages, workers=scrap.DEFAULT_WORKERS):
+    """A new queued job, even if url already has one (see start_job)."""
+    conn = _connect()
+    try:
+        with conn:
+            job_id = _insert_job(conn, url, max_pages, workers)
+    finally:
+        conn.close()
+    _claim(job_id)
+    return job_id
+
+
+def start_job(url, max_pages, workers=scrap.DEFAULT_WORKERS):
+    """
+    (job, started): the queued/running job for url, or a new one with
+    started=True that the caller must run (run_job). Every Flipkart crawl
+    goes through here, so on-demand scrapes, /scrap/jobs and the schedule
+    share one crawl per URL.
+    """
+    conn = _connect()
+    try:
+        # Write lock before the lookup: no other process can add a job in between
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            job = _active_job(conn, url)
+            job_id = None if job else _insert_job(conn, url, max_pages, workers)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+    if job is not None:
+        return job, False
+    _claim(job_id)
+    return get_job(job_id), True
+
+
+def wait_job(job_id, timeout=None):
+    """The job once it is no longer active (or at timeout), whichever process runs it."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        if job is None or job["status"] not in ACTIVE:
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            return job
+        time.sleep(WAIT_POLL)
+
+
+def crawl(url, max_pages, workers=scrap.DEFAULT_WORKERS, timeout=None):
+    """Run a crawl of url in this thread, or wait for the one already running; returns the job."""
+    job, started = start_job(url, max_pages, workers)
+    if started:
+        run_job(job["id"])
+    return wait_job(job["id"], timeout)
+
+
+def resume_job(job_id):
+    """Queue a stopped job again; it continues after its last committed page. Returns the job or None."""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT url, status FROM crawl_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            url, status = row
+            if status not in RESUMABLE:
+                raise ValueError(f"Job is {status}; only {', '.join(sorted(RESUMABLE))} jobs can be resumed")
+            # A job still being cancelled keeps crawling until its owner notices
+            other = _active_job(conn, url, tuple(ACTIVE))
+            if other is not None:
+                raise ValueError(f"Job {other['id']} is already crawling this URL")
+            conn.execute("UPDATE crawl_jobs SET status = 'queued', error = NULL, updated_at = ?, "
+                         "owner = ?, heartbeat_at = ? WHERE id = ?", (_now(), _owner(), time.time(), job_id))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+    _claim(job_id)
+    with _lock:
+        _versions[job_id] = _versions.get(job_id, 0) + 1
+    return get_job(job_id)
+
+
+def cancel_job(job_id):
+    """
+    Ask a queued/running job to stop after the page in flight. Returns the
+    job or None. A job owned by another live process is marked cancelling;
+    its owner picks the request up on its next page or heartbeat.
+    """
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT status, owner, heartbeat_at FROM crawl_jobs WHERE id = ?",
+                           (job_id,)).fetchone()
+        if row is None:
+            return None
+        status, owner, beat = row
+        if status not in ACTIVE:
+            raise ValueError(f"Job is already {status}")
+        with _lock:
+            event = _cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        abandoned = event is None and (beat is None or beat < time.time() - STALE_AFTER
+                                       or _owner_gone(job_id, owner))
+        # Abandoned: nobody is left to stop, so the job is cancelled outright
+        with conn:
+            conn.execute(
+                f"UPDATE crawl_jobs SET status = ?, updated_at = ? "
+                f"WHERE id = ? AND status IN ({', '.join('?' * len(ACTIVE))})",
+                ("cancelled" if abandoned else "cancelling", _now(), job_id, *ACTIVE),
+            )
+    finally:
+        conn.close()
+    with _lock:
+        _versions[job_id] = _versions.get(job_id, 0) + 1
+    return get_job(job_id)
+
+
+def run_job(job_id):
+    """Crawl the job's remaining pages (run in a background task)."""
+    job = get_job(job_id)
+    with _lock:
+        cancel = _cancel_events.setdefault(job_id, threading.Event())
+    _start_heartbeat()
+    if job is None or cancel.is_set():
+        if job is not None:
+            _update(job_id, status="cancelled")
+        return
+
+    progress = {"products": job["products"], "changes": job["changes"]}
+
+    def on_page(page, products):
+        progress["products"] += len(products)
+        progress["changes"] += sum(1 for p in products if str(p.get("Remark", "")).startswith(CHANGE_PREFIXES))
+        _update(job_id, last_page=page, **progress)
+        conn = scrap.connect_db()
+        try:
+            _cancel_requested(conn, [job_id])
+        finally:
+            conn.close()
+
+    # Only a still-queued job starts; one cancelled while queued stops here
+    conn = _connect()
+    try:
+        with conn:
+            started = conn.execute(
+                "UPDATE crawl_jobs SET status = 'running', owner = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'queued'", (_owner(), time.time(), _now(), job_id)
+            ).rowcount
+    finally:
+        conn.close()
+    if not started:
+        if get_job(job_id)["status"] == "cancelling":
+            _update(job_id, status="cancelled")
+        with _lock:
+            _cancel_events.pop(job_id, None)
+        return
+    try:
+        result = scrap.scrape_flipkart(job["url"], max_pages=job["max_pages"], workers=job["workers"],
+                                       start_page=job["last_page"] + 1, cancel=cancel, on_page=on_page)
+        _update(job_id, status="cancelled" if result["cancelled"] else "finished")
+    except Exception as e:
+        logging.exception(f"Crawl job {job_id} failed")
+        _update(job_id, status="failed", error=str(e))
+    finally:
+        with _lock:
+            _cancel_events.pop(job_id, None)
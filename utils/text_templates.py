@@ -0,0 +1,109 @@
+# utils/text_templates.py
+import os
+import hashlib
+import threading
+from functools import lru_cache
+from typing import List
+
+from jinja2 import FileSystemLoader, meta
+from jinja2.bccache import Bucket, FileSystemBytecodeCache
+from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+# Text formats rendered with Jinja2 (loops, conditionals, filters).
+# Plain .txt templates keep the simple {{key}} substitution.
+JINJA_EXTENSIONS = {".j2", ".yaml", ".yml", ".json", ".cfg", ".ini", ".tmpl"}
+
+# Buffer this many template chunks before each write when streaming to disk
+STREAM_BUFFER = 64
+
+
+def is_jinja_template(template_path: str) -> bool:
+    return os.path.splitext(template_path)[1].lower() in JINJA_EXTENSIONS
+
+
+class ContentHashBytecodeCache(FileSystemBytecodeCache):
+    """
+    On-disk Jinja bytecode cache keyed by the SHA-256 of the template source,
+    so a template is compiled once per content, across renames, restarts
+    and worker processes. The environment class is part of the key: sandboxed
+    environments compile operators differently, so their code is not shared.
+    """
+
+    def get_bucket(self, environment, name, filename, source):
+        key = hashlib.sha256(f"{type(environment).__name__}\0{source}".encode("utf-8")).hexdigest()
+        bucket = Bucket(environment, key, key)
+        self.load_bytecode(bucket)
+        return bucket
+
+
+_bytecode_cache = ContentHashBytecodeCache(pattern="__hld_jinja_%s.cache")
+
+
+@lru_cache(maxsize=None)
+def get_environment(directory: str) -> ImmutableSandboxedEnvironment:
+    """
+    One Environment per template folder; it also keeps compiled templates in
+    memory. Templates are user uploads, so they run sandboxed: no access to
+    private/dunder attributes or to methods that mutate the render context.
+    """
+    return ImmutableSandboxedEnvironment(
+        loader=FileSystemLoader(directory),
+        bytecode_cache=_bytecode_cache,
+        keep_trailing_newline=True,
+        auto_reload=True,
+        cache_size=400,
+    )
+
+
+def _load(template_path: str):
+    directory, name = os.path.split(os.path.abspath(template_path))
+    return get_environment(directory).get_template(name)
+
+
+_digests = {}   # abs path -> (mtime_ns, size, sha256)
+_digests_lock = threading.Lock()
+
+
+def template_digest(template_path: str) -> str:
+    """SHA-256 of a template file, recomputed only when its mtime/size change."""
+    key = os.path.abspath(template_path)
+    stat = os.stat(key)
+    with _digests_lock:
+        cached = _digests.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    with open(key, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    with _digests_lock:
+        _digests[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def extract_jinja_variables(template_path: str) -> List[str]:
+    """Top-level variables a Jinja template expects (loop variables excluded)."""
+    directory, name = os.path.split(os.path.abspath(template_path))
+    env = get_environment(directory)
+    source, _, _ = env.loader.get_source(env, name)
+    return sorted(meta.find_undeclared_variables(env.parse(source)))
+
+
+def render_jinja(template_path: str, context: dict, max_chars: int = None):
+    """
+    Render to a string. With max_chars, stop consuming the template once that
+    much text is produced (for previews). Returns (text, truncated).
+    """
+    parts = []
+    size = 0
+    for chunk in _load(template_path).generate(**context):
+        parts.append(chunk)
+        size += len(chunk)
+        if max_chars is not None and size >= max_chars:
+            return "".join(parts)[:max_chars], True
+    return "".join(parts), False
+
+
+def stream_jinja_to_file(template_path: str, context: dict, output_path: str):
+    """Render straight into output_path in buffered chunks, never building the whole output."""
+    stream = _load(template_path).stream(**context)
+    stream.enable_buffering(STREAM_BUFFER)
+    stream.dump(output_path, encoding="utf-8")
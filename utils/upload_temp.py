@@ -1,11 +1,19 @@
 # upload_temp.py
-from fastapi import UploadFile, File, HTTPException, Body, APIRouter
-from fastapi.responses import FileResponse
+from fastapi import UploadFile, File, HTTPException, Body, APIRouter, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
-from datetime import datetime
-import os, re, uuid, base64
-from typing import Dict
-from .config import TEMPLATE_DIR
+from datetime import datetime, timezone
+from contextlib import closing
+import os, re, uuid, base64, logging, threading, sqlite3, hashlib, json
+from typing import Dict, List, Optional
+import aiofiles
+import aiofiles.os
+from watchdog.events import FileSystemEventHandler, EVENT_TYPE_OPENED, EVENT_TYPE_CLOSED_NO_WRITE
+from watchdog.observers import Observer
+from .config import BASE_DIR, TEMPLATE_DIR
+from .doc_generator import extract_placeholders, extract_text_placeholders
+from .text_templates import is_jinja_template, extract_jinja_variables
 
 
 # from REST_TEST.main import TEMPLATE_DIR
@@ -22,6 +30,7 @@ router = APIRouter(prefix="/templates", tags=["Templates"])
 
 ALLOWED_EXTENSIONS = {".docx", ".txt", ".j2", ".yaml", ".yml", ".json", ".cfg", ".ini", ".tmpl"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
+REGISTRY_DB = BASE_DIR / "outputs" / "template_registry.db"
 
 # ---------------------------
 # Helper utilities
@@ -42,6 +51,237 @@ def is_inside_directory(base_dir: Path, target_path: Path) -> bool:
     except Exception:
         return False
 
+def _temp_upload_path(safe_name: str) -> Path:
+    # Dot-prefixed so the listing never shows a half-written upload
+    return TEMPLATE_DIR / f".{safe_name}.{uuid.uuid4().hex}.part"
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already covers this ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+# ---------------------------
+# Template registry
+# ---------------------------
+class TemplateRegistry:
+    """
+    Per-template metadata: size, mtime, SHA-256 and placeholder list.
+    Computed once when a template is uploaded (or first seen), persisted in
+    SQLite and served from memory afterwards. A record is recomputed only
+    when the file's size or mtime no longer match it. If the placeholders
+    could not be read, placeholder_error says why (and the list is empty).
+    """
+
+    def __init__(self, directory: Path, db_file: Path):
+        self.directory = directory
+        self.db_file = db_file
+        self._records = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._records is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            with closing(self._connect()) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS templates (
+                        name TEXT PRIMARY KEY,
+                        size INTEGER,
+                        mtime_ns INTEGER,
+                        sha256 TEXT,
+                        placeholders TEXT,
+                        placeholder_error TEXT
+                    )
+                """)
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(templates)")}
+                if "placeholder_error" not in columns:
+                    conn.execute("ALTER TABLE templates ADD COLUMN placeholder_error TEXT")
+                conn.commit()
+                rows = conn.execute("SELECT * FROM templates").fetchall()
+            self._records = {row["name"]: self._record(row["name"], row["size"], row["mtime_ns"],
+                                                       row["sha256"], json.loads(row["placeholders"]),
+                                                       row["placeholder_error"])
+                             for row in rows}
+        return self._records
+
+    @staticmethod
+    def _record(name, size, mtime_ns, sha256, placeholders, placeholder_error=None) -> Dict:
+        modified = datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc)
+        return {
+            "name": name,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "modified": modified.isoformat().replace("+00:00", "Z"),
+            "sha256": sha256,
+            "etag": f'"{sha256}"',
+            "placeholders": placeholders,
+            "placeholder_error": placeholder_error,
+        }
+
+    def _extract(self, path: Path):
+        """(placeholders, error): error is None unless the template could not be read."""
+        try:
+            if path.suffix.lower() == ".docx":
+                return extract_placeholders(str(path)), None
+            if is_jinja_template(str(path)):
+                return extract_jinja_variables(str(path)), None
+            return extract_text_placeholders(str(path)), None
+        except Exception as e:
+            logging.exception(f"Could not extract placeholders from {path.name}")
+            return [], f"{type(e).__name__}: {e}"
+
+    def register(self, name: str) -> Optional[Dict]:
+        """(Re)compute and persist the record of one template."""
+        path = self.directory / name
+        try:
+            stat = path.stat()
+            with path.open("rb") as f:
+                sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+        except FileNotFoundError:
+            self.remove(name)
+            return None
+
+        record = self._record(name, stat.st_size, stat.st_mtime_ns, sha256, *self._extract(path))
+        with self._lock:
+            self._load()[name] = record
+            with closing(self._connect()) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO templates (name, size, mtime_ns, sha256, placeholders, placeholder_error) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, record["size"], record["mtime_ns"], sha256, json.dumps(record["placeholders"]),
+                     record["placeholder_error"])
+                )
+                conn.commit()
+        return record
+
+    def get(self, name: str, stat: os.stat_result = None) -> Optional[Dict]:
+        """Record of a template, or None if the file does not exist."""
+        if stat is None:
+            try:
+                stat = (self.directory / name).stat()
+            except FileNotFoundError:
+                self.remove(name)
+                return None
+
+        with self._lock:
+            record = self._load().get(name)
+        if record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            return record
+        return self.register(name)
+
+    def remove(self, name: str):
+        with self._lock:
+            if self._load().pop(name, None) is None:
+                return
+            with closing(self._connect()) as conn:
+                conn.execute("DELETE FROM templates WHERE name = ?", (name,))
+                conn.commit()
+
+
+template_registry = TemplateRegistry(TEMPLATE_DIR, REGISTRY_DB)
+
+# ---------------------------
+# Directory index
+# ---------------------------
+class _IndexEventHandler(FileSystemEventHandler):
+    def __init__(self, index: "TemplateIndex"):
+        self.index = index
+
+    def on_any_event(self, event):
+        # Reads (downloads) do not change the listing
+        if event.event_type in (EVENT_TYPE_OPENED, EVENT_TYPE_CLOSED_NO_WRITE):
+            return
+        self.index.invalidate()
+
+
+class TemplateIndex:
+    """
+    Cached listing of the template folder. It is rebuilt only after an
+    upload/delete (explicit invalidate) or a filesystem event seen by
+    the watchdog observer, instead of on every request.
+    """
+
+    def __init__(self, directory: Path, registry: TemplateRegistry):
+        self.directory = directory
+        self.registry = registry
+        self._items = None
+        self._etag = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._observer = None
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._items = None
+            self._etag = None
+
+    def _start_watching(self):
+        with self._lock:
+            if self._observer is not None:
+                return
+            self._observer = Observer()
+            self._observer.daemon = True
+        try:
+            self._observer.schedule(_IndexEventHandler(self), str(self.directory), recursive=False)
+            self._observer.start()
+        except Exception:
+            # Still correct without the watcher: upload/delete invalidate explicitly
+            logging.exception(f"Could not watch {self.directory}; relying on explicit invalidation")
+
+    def _scan(self) -> List[Dict]:
+        items = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                record = self.registry.get(entry.name, entry.stat())
+                if record is None:
+                    continue
+                items.append({
+                    "name": record["name"],
+                    "size": record["size"],
+                    "modified": record["modified"],
+                    "sha256": record["sha256"],
+                })
+        items.sort(key=lambda item: item["name"])
+        return items
+
+    def snapshot(self):
+        """(items, etag) of the current listing."""
+        self._start_watching()
+        with self._lock:
+            if self._items is not None:
+                return list(self._items), self._etag
+            generation = self._generation
+
+        items = self._scan()
+        etag = '"' + hashlib.sha256(json.dumps(items, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+
+        with self._lock:
+            # Keep the result only if nothing changed while scanning
+            if generation == self._generation:
+                self._items = items
+                self._etag = etag
+        return list(items), etag
+
+    def items(self) -> List[Dict]:
+        return self.snapshot()[0]
+
+    def names(self) -> List[str]:
+        return [item["name"] for item in self.items()]
+
+
+template_index = TemplateIndex(TEMPLATE_DIR, template_registry)
+
 # ---------------------------
 # Endpoints (attached to router!)
 # ---------------------------
@@ -62,22 +302,28 @@ async def upload_template(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Invalid file path")
 
     size = 0
+    tmp = _temp_upload_path(safe_name)
     try:
-        with dest.open("wb") as out_file:
+        async with aiofiles.open(tmp, "wb") as out_file:
             while True:
                 chunk = await file.read(1024 * 1024)  # 1 MB
                 if not chunk:
                     break
                 size += len(chunk)
                 if size > MAX_FILE_SIZE:
-                    out_file.close()
-                    dest.unlink(missing_ok=True)
                     raise HTTPException(status_code=413, detail="File too large")
-                out_file.write(chunk)
+                await out_file.write(chunk)
+        await aiofiles.os.replace(tmp, dest)
     finally:
         await file.close()
+        if await aiofiles.os.path.exists(tmp):
+            await aiofiles.os.remove(tmp)
 
-    return {"filename": safe_name, "size": size, "path": str(dest)}
+    record = await run_in_threadpool(template_registry.register, safe_name)
+    template_index.invalidate()
+    return {"filename": safe_name, "size": size, "path": str(dest),
+            "sha256": record["sha256"], "placeholders": record["placeholders"],
+            "placeholder_error": record["placeholder_error"]}
 
 @router.post("/upload-base64", summary="Upload template file as base64 JSON")
 def upload_template_base64(payload: Dict = Body(...)):
@@ -102,31 +348,37 @@ def upload_template_base64(payload: Dict = Body(...)):
     if len(decoded) > MAX_FILE_SIZE:
         raise HTTPException(status_code=413, detail="File too large")
 
-    with dest.open("wb") as f:
+    tmp = _temp_upload_path(safe_name)
+    with tmp.open("wb") as f:
         f.write(decoded)
+    os.replace(tmp, dest)
 
-    return {"filename": safe_name, "size": len(decoded), "path": str(dest)}
+    record = template_registry.register(safe_name)
+    template_index.invalidate()
+    return {"filename": safe_name, "size": len(decoded), "path": str(dest),
+            "sha256": record["sha256"], "placeholders": record["placeholders"],
+            "placeholder_error": record["placeholder_error"]}
 
 @router.get("/", summary="List available templates")
-def list_templates():
-    items = []
-    for p in sorted(TEMPLATE_DIR.iterdir()):
-        if p.is_file():
-            stat = p.stat()
-            items.append({
-                "name": p.name,
-                "size": stat.st_size,
-                "modified": datetime.utcfromtimestamp(stat.st_mtime).isoformat() + "Z"
-            })
-    return items
+def list_templates(request: Request):
+    items, etag = template_index.snapshot()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(items, headers=headers)
 
 @router.get("/{filename}", summary="Download a template file")
-def download_template(filename: str):
+def download_template(filename: str, request: Request):
     safe_name = secure_filename(filename)
     dest = TEMPLATE_DIR / safe_name
-    if not dest.exists():
+    record = template_registry.get(safe_name)
+    if record is None:
         raise HTTPException(status_code=404, detail="Not found")
-    return FileResponse(path=str(dest), filename=safe_name, media_type="application/octet-stream")
+    headers = {"ETag": record["etag"], "Cache-Control": "no-cache"}
+    if _etag_matches(request, record["etag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path=str(dest), filename=safe_name, media_type="application/octet-stream",
+                        headers=headers)
 
 @router.delete("/{filename}", summary="Delete a template file")
 def delete_template(filename: str):
@@ -135,4 +387,6 @@ def delete_template(filename: str):
     if not dest.exists():
         raise HTTPException(status_code=404, detail="Not found")
     dest.unlink()
+    template_registry.remove(safe_name)
+    template_index.invalidate()
     return {"deleted": safe_name}
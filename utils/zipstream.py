@@ -0,0 +1,64 @@
+# utils/zipstream.py
+import io
+import zipfile
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that zipfile writes into and we drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries, compression=zipfile.ZIP_DEFLATED):
+    """
+    Build a ZIP archive on the fly and yield it chunk by chunk.
+    `entries` is an iterable of (arcname, data) where data is either bytes
+    or a path to a file on disk. Files are copied in CHUNK_SIZE reads, so
+    memory stays flat whatever the archive size and it can feed a
+    StreamingResponse directly.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression) as zf:
+        for arcname, data in entries:
+            if isinstance(data, (bytes, bytearray)):
+                zf.writestr(arcname, data)
+            else:
+                zinfo = zipfile.ZipInfo.from_file(data, arcname)
+                zinfo.compress_type = compression
+                with open(data, "rb") as src, zf.open(zinfo, "w") as dest:
+                    while True:
+                        block = src.read(CHUNK_SIZE)
+                        if not block:
+                            break
+                        dest.write(block)
+                        chunk = sink.drain()
+                        if chunk:
+                            yield chunk
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()